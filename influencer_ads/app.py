@@ -3,11 +3,19 @@ import os
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from gmail_client import GmailClient
-from classifier import SponsorshipClassifier
+from imap_client import IMAP_PROVIDERS, ImapClient
+from gmail_query import DEFAULT_EXCLUSIONS, PROMOTIONS_EXCLUSION
+from google_api import reset_credentials
+from quota_scheduler import gmail_scheduler
+from classifier import CLOVA_MAX_CONCURRENCY, ClovaAPIError, SponsorshipClassifier
 from translation_client import TranslationClient
 from schedule_analyzer import ScheduleAnalyzer
 from email_manager import EmailManager
+from prefilter import BulkMailPrefilter, SKIP_REASONS
+from attachments import AttachmentTextExtractor, document_attachments, with_attachment_text
+from reply_outbox import ReplyOutbox
 from calendar_client import CalendarClient
+from backfill_job import BackfillJob, format_progress, list_jobs
 import pandas as pd
 
 # 환경 변수 로드
@@ -192,8 +200,8 @@ with col3:
 st.markdown("<br>", unsafe_allow_html=True)
 
 
-def initialize_clients():
-    """클라이언트 초기화"""
+def initialize_clients(mail_backend: str = 'gmail'):
+    """클라이언트 초기화 (mail_backend: 'gmail' 또는 IMAP_PROVIDERS의 메일 서비스 이름)"""
     try:
         # Naver HyperCLOVA API 키 확인
         clova_api_key = os.getenv('CLOVA_STUDIO_KEY', 'nv-bf2506d5f74f4d0c921a472cb24d8c44tQby')
@@ -214,8 +222,11 @@ def initialize_clients():
             """)
             return None, None, None, None, None, None
         
-        # Gmail 클라이언트 초기화
-        gmail_client = GmailClient()
+        # 메일 클라이언트 초기화 (Gmail API 또는 IMAP)
+        if mail_backend == 'gmail':
+            gmail_client = GmailClient()
+        else:
+            gmail_client = ImapClient.from_env(mail_backend)
         
         # 분류기 초기화
         classifier = SponsorshipClassifier(clova_api_key)
@@ -251,6 +262,18 @@ def initialize_clients():
         return None, None, None, None, None, None
 
 
+def apply_classification(item, result):
+    """분류 결과를 화면 항목에 반영 (일시적 API 오류로 결과가 없으면 다음 검색에서 다시 분류하도록 표시)"""
+    if result is None:
+        item['classification'] = 'unclear'
+        item['explanation'] = "일시적인 API 오류로 분류하지 못했습니다. 다시 검색하면 다시 분류합니다."
+        item['details'] = {}
+        item['classification_failed'] = True
+    else:
+        item['classification'], item['explanation'], item['details'] = result
+        item['classification_failed'] = False
+
+
 def display_email_card(email, classification, explanation, details, translation_data=None, schedule_data=None, email_manager=None, calendar_client=None, tab_prefix=""):
     """이메일 카드 UI (개선된 디자인)"""
     # 카테고리별 색상 및 라벨
@@ -389,10 +412,23 @@ def main():
         
         st.markdown("<br>", unsafe_allow_html=True)
         
+        # 메일 계정 선택
+        mail_backend = st.selectbox(
+            "📮 메일 계정",
+            options=['gmail'] + list(IMAP_PROVIDERS),
+            format_func=lambda x: {
+                'gmail': 'Gmail',
+                'naver': '네이버 메일 (IMAP)',
+                'daum': '다음 메일 (IMAP)'
+            }[x],
+            help="네이버/다음 메일은 .env 파일의 IMAP_USER, IMAP_PASSWORD로 접속합니다"
+        )
+        is_gmail = mail_backend == 'gmail'
+        
         max_emails = st.slider(
             "📊 가져올 이메일 수",
             min_value=5,
-            max_value=50,
+            max_value=500,
             value=20,
             step=5
         )
@@ -421,16 +457,114 @@ def main():
         elif search_option == 'unread':
             search_query = "is:unread"
         
+        # 검색 제외 조건
+        exclude_promotions = st.checkbox(
+            "🚫 프로모션 탭 제외",
+            value=False,
+            help="자동 검색에서 Gmail 프로모션 탭(-category:promotions) 메일을 제외합니다"
+        )
+        exclusions = DEFAULT_EXCLUSIONS + ([PROMOTIONS_EXCLUSION] if exclude_promotions else [])
+        
+        # 기간 백필 옵션
+        backfill_mode = st.checkbox(
+            "🗓️ 기간을 나눠 전체 검색 (백필)",
+            value=False,
+            help="긴 기간을 한 달 단위로 나눠 동시에 검색한 뒤 합칩니다. 과거 메일을 한 번에 정리할 때 사용하세요"
+        )
+        backfill_range = None
+        if backfill_mode:
+            today = datetime.now().date()
+            backfill_range = st.date_input(
+                "검색 기간",
+                value=(today - timedelta(days=365), today)
+            )
+        
+        # 증분 동기화 옵션
+        incremental_sync = st.checkbox(
+            "⚡ 새 이메일만 가져오기",
+            value=True,
+            help="마지막으로 가져온 이후 도착한 이메일만 조회하고 분류합니다"
+        )
+        
+        # 2단계 조회 옵션
+        metadata_first = st.checkbox(
+            "📨 후보 이메일만 본문 다운로드",
+            value=True,
+            help="제목/발신자/요약만 먼저 받아 협찬 후보로 보이는 이메일만 본문을 받고 분류합니다"
+        )
+        
+        # 대화 단위 분류 옵션
+        thread_mode = st.checkbox(
+            "💬 대화(스레드) 단위로 분류",
+            value=False,
+            help="같은 대화의 메일을 묶어 한 번에 분류합니다. 이미 회신한 대화는 새 메일이 올 때까지 건너뜁니다",
+            disabled=not is_gmail
+        ) and is_gmail
+        
+        # 처리 상태 라벨 옵션
+        use_labels = st.checkbox(
+            "🏷️ 처리 결과를 Gmail 라벨로 저장",
+            value=True,
+            help="분류한 메일에 CREA/Processed, CREA/Tier1 등의 라벨을 달고, 다음 검색부터 처리한 메일은 제외합니다"
+        )
+        
+        # 대량 발송 메일 사전 필터 옵션
+        use_prefilter = st.checkbox(
+            "🧹 뉴스레터/광고 메일 사전 필터",
+            value=True,
+            help="Precedence, 프로모션 탭, 발송 서비스 도메인, 수신 거부 링크 등 헤더로 대량 발송 메일을 찾아 번역/분류 없이 '협찬 아님'으로 처리합니다"
+        )
+        
+        # 스트리밍 분류 옵션
+        stream_classify = st.checkbox(
+            "📡 분류 결과 바로 표시 (스트리밍)",
+            value=False,
+            help="메일을 한 통씩 스트리밍으로 분류해 응답 전체를 기다리지 않고 카테고리가 나오는 즉시 표시합니다. 여러 메일을 묶어 보내는 기본 방식보다 API 호출이 많습니다"
+        )
+        
+        # 첨부파일 읽기 옵션
+        read_attachments = st.checkbox(
+            "📎 모호한 메일은 첨부파일까지 읽기",
+            value=True,
+            help="분류가 애매하거나 대량 발송처럼 보이지만 문서가 첨부된 메일은 PDF/DOCX 미디어킷의 텍스트까지 읽어 분류합니다. 같은 첨부파일은 다시 받지 않습니다"
+        )
+        
+        # Gmail 할당량 예산 (초당 사용자 한도 기준)
+        if is_gmail:
+            budget = gmail_scheduler.status()
+            fetch_calls = (
+                {'threads.list': 1, 'threads.get': max_emails} if thread_mode
+                else {'messages.list': -(-max_emails // 50), 'messages.get': max_emails * (2 if metadata_first else 1)}
+            )
+            st.caption(
+                f"⏱️ Gmail 할당량 {budget['available_units']:.0f}/{budget['capacity']:.0f}단위 사용 가능 · "
+                f"이번 조회 예상 대기 {gmail_scheduler.estimate_seconds(fetch_calls):.1f}초 · "
+                f"누적 {budget['used_units']}단위, 대기 {budget['wait_seconds']}초"
+            )
+        
         st.markdown("<br>", unsafe_allow_html=True)
         
         # 토큰 재설정 버튼 추가
         if st.button("🔄 인증 토큰 재설정", help="Gmail 인증 문제가 있을 때 사용"):
             if os.path.exists('token.pickle'):
                 os.remove('token.pickle')
+            reset_credentials('token.pickle')
             st.success("✅ 인증 토큰이 삭제되었습니다. 새로 인증하세요.")
         
         fetch_button = st.button("📥 이메일 가져오기", type="primary", use_container_width=True)
         
+        # 백필 작업 결과 (python backfill_job.py 로 실행한 전체 메일함 분류)
+        backfill_jobs = list_jobs()
+        if is_gmail and backfill_jobs:
+            with st.expander("🗂️ 백필 작업"):
+                job_name = st.selectbox("작업 선택", options=backfill_jobs)
+                backfill_job = BackfillJob.open(job_name, read_only=True)
+                st.caption(f"🔍 {backfill_job.query or '(전체 메일함)'}")
+                st.caption(format_progress(backfill_job.progress()))
+                if st.button("📂 백필 결과 불러오기", use_container_width=True):
+                    st.session_state['classified_emails'] = backfill_job.load_results()
+                    st.rerun()
+        
         st.markdown("<br><br>", unsafe_allow_html=True)
         
         st.markdown("""
@@ -457,18 +591,47 @@ def main():
     # 메인 영역
     if fetch_button:
         with st.spinner("🔄 이메일을 가져오는 중..."):
-            gmail_client, classifier, translation_client, schedule_analyzer, email_manager, calendar_client = initialize_clients()
+            gmail_client, classifier, translation_client, schedule_analyzer, email_manager, calendar_client = initialize_clients(mail_backend)
             
             if gmail_client is None or classifier is None:
                 return
             
+            if metadata_first:
+                gmail_client.relevance_filter = GmailClient.is_sponsorship_candidate
+            gmail_client.exclude_processed = use_labels
+            
+            # 이전 분류 결과가 없으면 체크포인트를 무시하고 전체 검색
+            previous_emails = st.session_state.get('classified_emails', []) if incremental_sync else []
+            reset_sync = not previous_emails
+            
             # 이메일 가져오기
-            if search_option == 'auto':
-                emails = gmail_client.search_sponsorship_emails(max_results=max_emails)
+            base_query = gmail_client.sponsorship_query(exclusions) if search_option == 'auto' else search_query
+            if thread_mode:
+                emails = gmail_client.get_threads(query=base_query, max_results=max_emails)
+            elif backfill_mode and backfill_range and len(backfill_range) == 2:
+                start_date, end_date = backfill_range
+                emails = gmail_client.backfill_emails(
+                    base_query,
+                    start=datetime.combine(start_date, datetime.min.time()),
+                    end=datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+                    max_results=max_emails
+                )
+            elif search_option == 'auto':
+                emails = gmail_client.search_sponsorship_emails(
+                    max_results=max_emails,
+                    incremental=incremental_sync,
+                    reset=reset_sync,
+                    exclusions=exclusions
+                )
+            elif incremental_sync:
+                emails = gmail_client.sync_emails(query=search_query, max_results=max_emails, reset=reset_sync)
             else:
                 emails = gmail_client.get_emails(query=search_query, max_results=max_emails)
             
-            if not emails:
+            if not emails and previous_emails:
+                st.info("📭 마지막으로 가져온 이후 새 이메일이 없습니다.")
+            
+            elif not emails:
                 st.warning("⚠️ 검색된 이메일이 없습니다.")
                 
                 # 디버깅 정보 표시
@@ -504,17 +667,58 @@ def main():
                 
                 return
             
-            st.success(f"✅ {len(emails)}개의 이메일을 가져왔습니다.")
+            else:
+                st.success(f"✅ {len(emails)}개의 이메일을 가져왔습니다.")
+            
+            # 2단계 조회 통계
+            stats = gmail_client.fetch_stats
+            if metadata_first and stats['metadata_fetched']:
+                st.caption(
+                    f"📨 {stats['metadata_fetched']}개 중 {stats['skipped']}개는 후보가 아니어서 본문을 받지 않았습니다 · "
+                    # Gmail은 sizeEstimate 기준 추정치 (필드 마스크와 gzip 때문에 실제 전송량은 더 작음)
+                    f"{'받은 본문 예상 크기' if is_gmail else '전송량'} {stats['bytes_transferred'] / 1024:.0f}KB "
+                    f"(절감 약 {stats['bytes_skipped'] / 1024:.0f}KB) · " + (
+                        f"Gmail 할당량 {stats['quota_units']}단위 "
+                        f"(1단계 조회 시 {stats['quota_units_single_phase']}단위)" if is_gmail
+                        else f"IMAP 명령 {stats['round_trips']}회"
+                    )
+                )
+            
+            # 지난 검색에서 일시적 API 오류로 분류하지 못한 메일은 증분 동기화가 다시 가져오지 않으므로 여기서 다시 분류
+            fetched_ids = {email['id'] for email in emails}
+            retry_emails = [item['email'] for item in previous_emails
+                            if item.get('classification_failed') and item['email']['id'] not in fetched_ids]
+            if retry_emails:
+                st.info(f"🔁 지난번에 분류하지 못한 {len(retry_emails)}개 메일을 다시 분류합니다.")
+                emails = emails + retry_emails
         
         # 이메일 분류
         classified_emails = []
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        import time
+        prefilter = BulkMailPrefilter() if use_prefilter else None
+        attachment_extractor = AttachmentTextExtractor(gmail_client) if read_attachments else None
         
+        # 1단계: 사전 필터, 번역, 모호한 메일의 첨부파일 읽기 (분류할 내용 준비)
+        to_classify = []
         for i, email in enumerate(emails):
-            status_text.text(f"분류 및 분석 중... ({i+1}/{len(emails)})")
+            status_text.text(f"번역 및 전처리 중... ({i+1}/{len(emails)})")
+            
+            # 대량 발송 메일은 번역/분류 API를 호출하지 않음
+            skip_reason = prefilter.apply(email) if prefilter else None
+            if skip_reason:
+                classification, explanation, details = prefilter.skip_result(skip_reason)
+                classified_emails.append({
+                    'email': email,
+                    'classification': classification,
+                    'explanation': explanation,
+                    'details': details,
+                    'translation_data': None,
+                    'schedule_data': None
+                })
+                progress_bar.progress((i + 1) / len(emails) / 2)
+                continue
             
             # 번역 수행
             translation_data = None
@@ -530,32 +734,133 @@ def main():
                     'body': translation_data['translated_body']
                 }
             
-            # 분류 수행
-            classification, explanation, details = classifier.classify_email(email_for_classification)
+            # 사전 필터가 모호하다고 본 메일은 첨부파일 텍스트를 포함해 분류
+            attachment_text = ''
+            if attachment_extractor and prefilter and prefilter.is_ambiguous(email):
+                attachment_text = attachment_extractor.extract(email)
+                email_for_classification = with_attachment_text(email_for_classification, attachment_text)
             
-            # 일정 분석 수행
-            schedule_data = None
-            if schedule_analyzer:
-                schedule_data = schedule_analyzer.analyze_schedule(email_for_classification)
-            
-            classified_emails.append({
+            item = {
                 'email': email,
-                'classification': classification,
-                'explanation': explanation,
-                'details': details,
+                'classification': None,
+                'explanation': '',
+                'details': {},
                 'translation_data': translation_data,
-                'schedule_data': schedule_data
-            })
-            
-            progress_bar.progress((i + 1) / len(emails))
-            
-            # API 제한 방지: 각 요청 사이에 1초 대기
-            if i < len(emails) - 1:  # 마지막 요청 후에는 대기 안함
-                time.sleep(1)
+                'schedule_data': None,
+                'attachment_text': attachment_text
+            }
+            classified_emails.append(item)
+            to_classify.append((item, email_for_classification))
+            progress_bar.progress((i + 1) / len(emails) / 2)
+        
+        # 2단계: 여러 메일을 한 요청에 묶어 동시에 분류 (API 제한은 clova_scheduler가 관리)
+        def show_classify_progress(done: int, total: int):
+            status_text.text(f"분류 중... ({done}/{total})")
+            progress_bar.progress(0.5 + done / max(total, 1) / 2)
+        
+        if stream_classify:
+            # 한 통씩 스트리밍으로 분류하며 카테고리가 도착하는 즉시 표시
+            for position, (item, email_for_classification) in enumerate(to_classify):
+                subject = item['email'].get('subject', '')
+                show_classify_progress(position, len(to_classify))
+                
+                def show_category(category: str):
+                    status_text.text(
+                        f"분류 중... ({position + 1}/{len(to_classify)}) {subject} → "
+                        f"{classifier.get_category_display_name(category)}"
+                    )
+                
+                try:
+                    result = classifier.classify_email_stream(email_for_classification, on_category=show_category)
+                except ClovaAPIError as e:
+                    print(f"분류 오류: {str(e)}")
+                    result = None
+                apply_classification(item, result)
+            show_classify_progress(len(to_classify), len(to_classify))
+        else:
+            results = classifier.classify_emails(
+                [email_for_classification for _, email_for_classification in to_classify],
+                on_progress=show_classify_progress,
+                max_concurrency=CLOVA_MAX_CONCURRENCY
+            )
+            for (item, _), result in zip(to_classify, results):
+                apply_classification(item, result)
+        
+        # 분류가 애매하면 첨부파일까지 읽고 다시 분류
+        reclassify = []
+        for position, (item, email_for_classification) in enumerate(to_classify):
+            if (item['classification'] == 'unclear' and not item['classification_failed'] and attachment_extractor
+                    and not item['attachment_text'] and document_attachments(item['email'])):
+                attachment_text = attachment_extractor.extract(item['email'])
+                if attachment_text:
+                    item['attachment_text'] = attachment_text
+                    to_classify[position] = (item, with_attachment_text(email_for_classification, attachment_text))
+                    reclassify.append(to_classify[position])
+        if reclassify:
+            status_text.text(f"첨부파일을 포함해 다시 분류 중... ({len(reclassify)}개)")
+            results = classifier.classify_emails(
+                [email_for_classification for _, email_for_classification in reclassify],
+                max_concurrency=CLOVA_MAX_CONCURRENCY
+            )
+            for (item, _), result in zip(reclassify, results):
+                apply_classification(item, result)
+        
+        # 일정 분석 수행
+        if schedule_analyzer:
+            for item, email_for_classification in to_classify:
+                item['schedule_data'] = schedule_analyzer.analyze_schedule(email_for_classification)
         
         status_text.empty()
         progress_bar.empty()
         
+        # 사전 필터 통계
+        if prefilter and prefilter.stats['skipped']:
+            reasons = ', '.join(
+                f"{SKIP_REASONS[reason]} {count}개"
+                for reason, count in prefilter.stats['by_reason'].items() if count
+            )
+            st.caption(
+                f"🧹 {prefilter.stats['checked']}개 중 {prefilter.stats['skipped']}개를 "
+                f"대량 발송 메일로 보고 번역/분류를 건너뛰었습니다 ({reasons})"
+            )
+        
+        # 첨부파일 처리 통계
+        if attachment_extractor and any(attachment_extractor.stats.values()):
+            attachment_stats = attachment_extractor.stats
+            st.caption(
+                f"📎 첨부파일 {attachment_stats['downloaded']}개 다운로드, "
+                f"캐시 재사용 {attachment_stats['alias_hits'] + attachment_stats['hash_hits']}개, "
+                f"실패 {attachment_stats['failed']}개"
+            )
+        
+        # 일시적 API 오류로 분류하지 못한 메일 (처리 라벨을 달지 않아 다음 검색에 다시 포함)
+        failed_count = sum(1 for item, _ in to_classify if item['classification_failed'])
+        if failed_count:
+            st.warning(f"⚠️ {failed_count}개 메일은 일시적인 API 오류로 분류하지 못했습니다. 다시 검색하면 다시 분류합니다.")
+        
+        # 분류 결과 캐시 통계 (이전 세션에서 분류한 메일은 API를 다시 호출하지 않음)
+        if classifier.cache is not None and classifier.cache.stats['hits']:
+            cache_stats = classifier.cache.stats
+            st.caption(
+                f"🗃️ 분류 캐시 {cache_stats['hits']}개 재사용 (적중률 {classifier.cache.hit_rate() * 100:.0f}%), "
+                f"새로 분류 {cache_stats['misses']}개"
+            )
+        
+        # 처리 완료 라벨 적용 (대화는 포함된 모든 메일에 적용)
+        if use_labels and classified_emails:
+            processed = {}
+            for item in classified_emails:
+                if item.get('classification_failed'):
+                    continue
+                for message_id in item['email'].get('message_ids', [item['email']['id']]):
+                    processed[message_id] = item['classification']
+            if not gmail_client.mark_processed(processed):
+                st.warning("⚠️ 일부 메일에 처리 라벨을 달지 못했습니다. 다음 검색에 다시 포함될 수 있습니다.")
+        
+        # 증분 동기화인 경우 새 결과를 기존 결과 앞에 추가 (중복 제외)
+        new_ids = {item['email']['id'] for item in classified_emails}
+        classified_emails += [item for item in previous_emails if item['email']['id'] not in new_ids]
+        
         # 세션 상태에 저장
         st.session_state['classified_emails'] = classified_emails
         
@@ -729,29 +1034,53 @@ def main():
                 
                 col1, col2 = st.columns(2)
                 
+                # 보낼편지함 (세션 상태에 유지)
+                if 'reply_outbox' not in st.session_state:
+                    st.session_state['reply_outbox'] = ReplyOutbox()
+                outbox = st.session_state['reply_outbox']
+                
                 with col1:
-                    if st.button("📤 회신 전송", type="primary"):
-                        # Gmail 클라이언트 초기화
+                    if st.button("📥 보낼편지함에 추가", type="primary"):
                         try:
-                            gmail_client = GmailClient()
-                            result = gmail_client.send_reply(
+                            outbox.add(
+                                GmailClient(),
                                 reply_email_id,
                                 reply_subject,
                                 reply_body,
-                                sender_email
+                                sender_email,
+                                email_data=selected_email['email']
                             )
-                            
-                            if result['success']:
-                                st.success(result['message'])
-                            else:
-                                st.error(result['message'])
+                            st.success("회신을 보낼편지함에 추가했습니다.")
                         except Exception as e:
-                            st.error(f"Gmail 클라이언트 초기화 실패: {str(e)}")
+                            st.error(f"회신 준비 실패: {str(e)}")
                 
                 with col2:
                     if st.button("💾 템플릿 저장"):
                         email_manager.update_reply_template(template_type, reply_subject, reply_body)
                         st.success("템플릿이 저장되었습니다.")
+                
+                # 보낼편지함 목록과 일괄 전송
+                if len(outbox):
+                    st.markdown(f"### 📬 보낼편지함 ({len(outbox)}개)")
+                    for item in list(outbox.items):
+                        col_item, col_remove = st.columns([5, 1])
+                        with col_item:
+                            st.write(f"**{item['subject']}** → {item['recipient']}")
+                        with col_remove:
+                            if st.button("🗑️", key=f"outbox_remove_{item['id']}"):
+                                outbox.remove(item['id'])
+                                st.rerun()
+                    
+                    if st.button(f"📤 {len(outbox)}개 회신 일괄 전송", type="primary"):
+                        try:
+                            with st.spinner("회신을 보내는 중..."):
+                                result = outbox.send_all(GmailClient())
+                            if result['sent']:
+                                st.success(f"✅ {len(result['sent'])}개 회신이 전송되었습니다.")
+                            if result['failed']:
+                                st.error(f"❌ {len(result['failed'])}개 회신을 보내지 못했습니다. 보낼편지함에 남겨 두었습니다.")
+                        except Exception as e:
+                            st.error(f"회신 전송 중 오류가 발생했습니다: {str(e)}")
         
         with tab7:
             st.header("📅 캘린더 관리")
@@ -0,0 +1,229 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+from mime_parser import decode_bytes
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF 추출은 선택 기능 (pip install pypdf)
+    PdfReader = None
+
+# 다운로드할 첨부파일 최대 크기 (바이트)
+MAX_ATTACHMENT_BYTES = 10 * 1024 * 1024
+
+# PDF에서 텍스트를 읽을 최대 페이지 수
+MAX_PDF_PAGES = 20
+
+# DOCX 압축 해제 후 document.xml 최대 크기 (압축 폭탄 방지)
+MAX_DOCX_XML_BYTES = 20 * 1024 * 1024
+
+# 첨부파일 하나에서 사용할 최대 글자 수, 메일 하나에서 읽을 최대 첨부파일 수
+MAX_ATTACHMENT_CHARS = 6000
+MAX_ATTACHMENTS_PER_EMAIL = 3
+
+# 추출한 텍스트 캐시 디렉토리
+ATTACHMENT_CACHE_DIR = 'attachment_cache'
+
+DOCX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# 확장자별 문서 종류 (Content-Type이 application/octet-stream인 첨부파일이 많아 확장자도 확인)
+DOCUMENT_EXTENSIONS = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.txt': 'text',
+    '.csv': 'text'
+}
+DOCUMENT_MIME_TYPES = {
+    'application/pdf': 'pdf',
+    DOCX_MIME_TYPE: 'docx',
+    'text/plain': 'text',
+    'text/csv': 'text'
+}
+
+_WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def document_kind(attachment: Dict) -> Optional[str]:
+    """텍스트를 추출할 수 있는 첨부파일이면 종류('pdf', 'docx', 'text'), 아니면 None"""
+    kind = DOCUMENT_MIME_TYPES.get(attachment.get('mime_type', ''))
+    if kind is None:
+        extension = os.path.splitext(attachment.get('filename', ''))[1].lower()
+        kind = DOCUMENT_EXTENSIONS.get(extension)
+    if kind == 'pdf' and PdfReader is None:
+        return None
+    return kind
+
+
+def document_attachments(email_data: Dict) -> List[Dict]:
+    """이메일(또는 대화)의 첨부파일 중 텍스트 추출 대상 (크기 제한 이내)"""
+    return [
+        attachment for attachment in email_data.get('attachments', [])
+        if document_kind(attachment) and attachment.get('size', 0) <= MAX_ATTACHMENT_BYTES
+    ]
+
+
+def extract_pdf_text(data: bytes, max_pages: int = MAX_PDF_PAGES, max_chars: int = MAX_ATTACHMENT_CHARS) -> str:
+    """PDF 앞쪽 max_pages 페이지의 텍스트 추출"""
+    reader = PdfReader(io.BytesIO(data))
+    texts = []
+    length = 0
+    for page in reader.pages[:max_pages]:
+        text = page.extract_text() or ''
+        texts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return '\n'.join(texts)[:max_chars]
+
+
+def extract_docx_text(data: bytes, max_chars: int = MAX_ATTACHMENT_CHARS) -> str:
+    """DOCX 본문(word/document.xml)의 문단 텍스트 추출"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        info = archive.getinfo('word/document.xml')
+        if info.file_size > MAX_DOCX_XML_BYTES:
+            raise ValueError(f"document.xml이 너무 큽니다 ({info.file_size}바이트)")
+        root = ElementTree.fromstring(archive.read(info))
+
+    paragraphs = []
+    length = 0
+    for paragraph in root.iter(f'{_WORD_NAMESPACE}p'):
+        text = ''.join(node.text or '' for node in paragraph.iter(f'{_WORD_NAMESPACE}t'))
+        if text:
+            paragraphs.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+    return '\n'.join(paragraphs)[:max_chars]
+
+
+def extract_text(kind: str, data: bytes) -> str:
+    """문서 종류에 맞게 텍스트 추출 (공백 정리, 최대 MAX_ATTACHMENT_CHARS자)"""
+    if kind == 'pdf':
+        text = extract_pdf_text(data)
+    elif kind == 'docx':
+        text = extract_docx_text(data)
+    else:
+        text = decode_bytes(data[:MAX_ATTACHMENT_CHARS * 4])
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    return text.strip()[:MAX_ATTACHMENT_CHARS]
+
+
+class AttachmentTextCache:
+    """첨부파일 내용 해시(SHA-256)를 키로 추출한 텍스트를 저장하는 디스크 캐시
+
+    다운로드 전에는 '메시지 ID + 파트 위치' 별칭으로 같은 메일의 같은 첨부파일을 이미 받았는지 찾아
+    다운로드 자체를 건너뜁니다 (Gmail attachmentId는 조회할 때마다 달라질 수 있어 키로 쓰지 않음).
+    이름과 크기가 같아도 다른 메일의 첨부파일은 별칭으로 재사용하지 않고, 내려받은 뒤
+    내용 해시가 같을 때만(전달된 같은 파일 등) 추출 텍스트를 재사용합니다.
+    """
+
+    def __init__(self, cache_dir: str = ATTACHMENT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._alias_path = os.path.join(cache_dir, 'aliases.json')
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._aliases = self._load_aliases()
+
+    def _load_aliases(self) -> Dict[str, str]:
+        if os.path.exists(self._alias_path):
+            try:
+                with open(self._alias_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        return {}
+
+    @staticmethod
+    def alias_key(attachment: Dict) -> str:
+        return (f"{attachment.get('message_id', '')}:{attachment.get('part_index', '')}:"
+                f"{attachment.get('filename', '').strip().lower()}:{attachment.get('size', 0)}")
+
+    def _text_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f'{digest}.txt')
+
+    def get(self, digest: str) -> Optional[str]:
+        """해시에 해당하는 추출 텍스트 (없으면 None)"""
+        path = self._text_path(digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def get_by_alias(self, attachment: Dict) -> Optional[str]:
+        """같은 메일의 같은 첨부파일을 이미 처리했으면 그 텍스트 반환"""
+        digest = self._aliases.get(self.alias_key(attachment))
+        return self.get(digest) if digest else None
+
+    def put(self, digest: str, text: str, attachment: Dict):
+        """추출 텍스트 저장 및 메시지 ID + 파트 위치 별칭 등록"""
+        with self._lock:
+            with open(self._text_path(digest), 'w', encoding='utf-8') as f:
+                f.write(text)
+            self._aliases[self.alias_key(attachment)] = digest
+            with open(self._alias_path, 'w', encoding='utf-8') as f:
+                json.dump(self._aliases, f, ensure_ascii=False)
+
+
+class AttachmentTextExtractor:
+    """모호한 메일의 첨부파일(PDF/DOCX 등)만 내려받아 텍스트를 추출하는 선택 단계"""
+
+    def __init__(self, gmail_client, cache: Optional[AttachmentTextCache] = None):
+        """
+        Args:
+            gmail_client: 첨부파일 다운로드에 사용할 GmailClient
+            cache: 추출 텍스트 캐시 (기본: ATTACHMENT_CACHE_DIR)
+        """
+        self.gmail_client = gmail_client
+        self.cache = cache or AttachmentTextCache()
+        self.stats = {'downloaded': 0, 'alias_hits': 0, 'hash_hits': 0, 'failed': 0}
+
+    def attachment_text(self, attachment: Dict) -> str:
+        """첨부파일 하나의 텍스트 (캐시 → 다운로드 → 추출 순)"""
+        text = self.cache.get_by_alias(attachment)
+        if text is not None:
+            self.stats['alias_hits'] += 1
+            return text
+
+        data = self.gmail_client.get_attachment_data(attachment)
+        self.stats['downloaded'] += 1
+        digest = hashlib.sha256(data).hexdigest()
+
+        text = self.cache.get(digest)
+        if text is not None:
+            # 다른 이름으로 전달된 같은 파일: 다운로드는 했지만 다시 파싱하지 않음
+            self.stats['hash_hits'] += 1
+        else:
+            text = extract_text(document_kind(attachment), data)
+        self.cache.put(digest, text, attachment)
+        return text
+
+    def extract(self, email_data: Dict) -> str:
+        """
+        이메일의 문서 첨부파일 텍스트를 하나로 합쳐 반환 (없거나 모두 실패하면 빈 문자열)
+        """
+        sections = []
+        for attachment in document_attachments(email_data)[:MAX_ATTACHMENTS_PER_EMAIL]:
+            try:
+                text = self.attachment_text(attachment)
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"첨부파일 텍스트 추출 실패 ({attachment.get('filename')}): {e}")
+                continue
+            if text:
+                sections.append(f"[첨부파일: {attachment.get('filename', '')}]\n{text}")
+        return '\n\n'.join(sections)
+
+
+def with_attachment_text(email_data: Dict, attachment_text: str) -> Dict:
+    """본문 뒤에 첨부파일 텍스트를 붙인 분류용 이메일 정보"""
+    if not attachment_text:
+        return email_data
+    return {**email_data, 'body': f"{email_data.get('body', '')}\n\n{attachment_text}"}
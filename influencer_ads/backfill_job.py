@@ -0,0 +1,490 @@
+"""
+메일함 전체 백필(일괄 분류) 작업 - 중단 후 이어서 실행 가능
+
+검색 결과를 페이지 단위로 따라가며 분류하고, 분류 결과를 한 건씩 JSON Lines 파일에 바로 기록합니다.
+페이지 토큰과 현재 페이지의 메시지 ID는 체크포인트 파일에 저장하므로 프로세스가 종료되거나
+Streamlit이 다시 실행되어도 같은 작업 이름으로 실행하면 멈춘 곳부터 이어서 처리합니다.
+
+사용법:
+    python backfill_job.py --name 2024_전체 --query "after:2024/01/01"
+    python backfill_job.py --name 협찬_전체 --sponsorship
+    python backfill_job.py --name 협찬_전체 --sponsorship --concurrency 4
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from processed_ids import ProcessedIdSet
+
+# 백필 작업 폴더 (작업마다 하위 폴더에 checkpoint.json, results.jsonl 저장)
+BACKFILL_JOB_DIR = 'backfill_jobs'
+
+# list() 한 페이지 크기, 한 번에 본문을 가져와 분류할 메시지 수
+BACKFILL_PAGE_SIZE = 100
+BACKFILL_FETCH_SIZE = 20
+
+# 결과 파일에 저장할 본문 최대 글자 수 (결과를 다시 불러와 화면에 표시할 때 사용)
+RESULT_BODY_CHARS = 5000
+
+# 결과 파일에 저장할 이메일 정보 항목
+RESULT_EMAIL_FIELDS = [
+    'id', 'thread_id', 'subject', 'sender', 'date', 'snippet', 'label_ids',
+    'list_unsubscribe', 'message_id_header', 'references'
+]
+
+# 다시 처리할 상태 (그 밖의 상태는 처리 완료)
+RETRY_STATUSES = {'error'}
+
+
+def list_jobs(job_dir: str = BACKFILL_JOB_DIR) -> List[str]:
+    """저장된 백필 작업 이름 목록"""
+    if not os.path.isdir(job_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(job_dir)
+        if os.path.exists(os.path.join(job_dir, name, 'checkpoint.json'))
+    )
+
+
+class BackfillJob:
+    """체크포인트로 이어서 실행할 수 있는 메일함 백필 작업
+
+    작업 폴더의 파일:
+        checkpoint.json: 검색 쿼리, 다음 페이지 토큰, 현재 페이지의 메시지 ID, 진행 정보
+        results.jsonl: 메시지별 처리 상태와 분류 결과 (한 줄에 하나, 추가만 함)
+        processed.*: 처리가 끝난 메시지 ID 집합 (ProcessedIdSet)
+
+    체크포인트에는 상태별 개수와 그 개수에 반영된 results.jsonl 위치를 함께 저장하고,
+    시작할 때 그 뒤에 추가된 기록만 다시 읽습니다. 따라서 결과를 기록한 직후 종료되어도
+    같은 메시지를 다시 분류하지 않으며, 수백만 건 작업도 결과 파일 전체를 읽지 않고 바로 이어갑니다.
+    'error' 상태는 다음 실행 때 다시 처리합니다.
+    """
+
+    def __init__(self, name: str, query: str, job_dir: str = BACKFILL_JOB_DIR, read_only: bool = False):
+        """
+        Args:
+            name: 작업 이름 (폴더 이름으로 사용)
+            query: Gmail 검색 쿼리 (기존 작업과 다르면 ValueError)
+            job_dir: 작업 폴더의 상위 폴더
+            read_only: True이면 진행 상황과 결과 조회만 (다른 프로세스가 실행 중인 작업을 볼 때)
+        """
+        self.name = name
+        self.query = query
+        self.read_only = read_only
+        self.path = os.path.join(job_dir, name)
+        self.checkpoint_path = os.path.join(self.path, 'checkpoint.json')
+        self.results_path = os.path.join(self.path, 'results.jsonl')
+        if not read_only:
+            os.makedirs(self.path, exist_ok=True)
+
+        self.checkpoint = self._load_checkpoint()
+        created = self.checkpoint is None
+        if created:
+            self.checkpoint = {
+                'query': query,
+                'page': [],                # 처리 중인 페이지의 메시지 ID
+                'next_page_token': None,   # 현재 페이지 다음 페이지의 토큰
+                'pages_listed': 0,
+                'result_size_estimate': 0,
+                'finished': False,
+                'created_at': datetime.now().isoformat()
+            }
+        elif self.checkpoint['query'] != query:
+            raise ValueError(f"'{name}' 작업은 다른 검색 쿼리로 만들어졌습니다: {self.checkpoint['query']}")
+
+        self.done_ids = ProcessedIdSet(os.path.join(self.path, 'processed'), read_only=read_only)
+        self.status_counts: Dict[str, int] = dict(self.checkpoint.get('status_counts', {}))
+        self.retry_ids: Dict[str, None] = dict.fromkeys(self.checkpoint.get('retry_ids', []))
+        self._results_offset = self.checkpoint.get('results_offset', 0)
+        self._replay_results()
+        self._run_started = None
+        self._run_processed = 0
+        if created and not read_only:
+            self._save_checkpoint()
+
+    @classmethod
+    def open(cls, name: str, job_dir: str = BACKFILL_JOB_DIR, read_only: bool = False) -> 'BackfillJob':
+        """저장된 작업 열기 (쿼리는 체크포인트에서 읽음)"""
+        with open(os.path.join(job_dir, name, 'checkpoint.json'), 'r', encoding='utf-8') as f:
+            query = json.load(f)['query']
+        return cls(name, query, job_dir, read_only)
+
+    # ------------------------------------------------------------------
+    # 저장/복원
+    # ------------------------------------------------------------------
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_checkpoint(self):
+        """체크포인트를 임시 파일에 쓴 뒤 교체 (쓰는 도중 종료되어도 이전 체크포인트 유지)"""
+        # 개수와 위치를 저장하기 전에 처리 완료 ID를 디스크에 반영
+        self.done_ids.flush()
+        self.checkpoint['status_counts'] = self.status_counts
+        self.checkpoint['retry_ids'] = list(self.retry_ids)
+        self.checkpoint['results_offset'] = self._results_offset
+        self.checkpoint['updated_at'] = datetime.now().isoformat()
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _replay_results(self):
+        """체크포인트 이후 results.jsonl에 추가된 기록을 상태별 개수와 처리 완료 ID에 반영"""
+        records, self._results_offset = self._read_results(self._results_offset)
+        for record in records:
+            self._count_status(record['id'], record['status'])
+
+    def _count_status(self, message_id: str, status: str):
+        """메시지 하나의 상태 반영 (재시도 대상 → 처리 완료로 바뀌면 개수 이동)"""
+        if status in RETRY_STATUSES:
+            if message_id not in self.retry_ids:
+                self.retry_ids[message_id] = None
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            return
+        if message_id in self.retry_ids:
+            del self.retry_ids[message_id]
+            for retry_status in RETRY_STATUSES:
+                if self.status_counts.get(retry_status):
+                    self.status_counts[retry_status] -= 1
+                    break
+        self.done_ids.add(message_id)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _read_results(self, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        results.jsonl의 offset 이후 완전한 줄만 읽기 (다른 프로세스가 기록 중이어도 안전)
+
+        Returns:
+            (기록 리스트, 읽은 마지막 줄 다음 위치)
+        """
+        if not os.path.exists(self.results_path):
+            return [], 0
+        with open(self.results_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        complete = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:complete].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, offset + complete
+
+    def _truncate_partial_line(self):
+        """이전 실행이 기록 도중 종료되어 남은 불완전한 마지막 줄 제거 (이어 쓰기 전에 호출)"""
+        if not os.path.exists(self.results_path):
+            return
+        with open(self.results_path, 'rb+') as f:
+            data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                f.truncate(complete)
+
+    def _append_result(self, record: Dict):
+        """결과 한 건을 기록하고 디스크에 반영"""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(self.results_path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._results_offset += len(line)
+        self._count_status(record['id'], record['status'])
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+
+    def run(self, gmail_client, classify: Callable[[Dict], Tuple[str, str, Dict]], prefilter=None,
+            page_size: int = BACKFILL_PAGE_SIZE, fetch_size: int = BACKFILL_FETCH_SIZE,
+            delay: float = 1.0, mark_processed: bool = False,
+            on_progress: Optional[Callable[[Dict], None]] = None,
+            classify_batch: Optional[Callable[[List[Dict]], List[Tuple[str, str, Dict]]]] = None) -> Dict:
+        """
+        작업을 끝까지 실행 (중간에 멈추면(KeyboardInterrupt) 기록된 결과부터 다음 실행 때 이어서 처리)
+
+        Args:
+            gmail_client: GmailClient (list_message_page, get_emails_by_ids 사용)
+            classify: 이메일 정보를 받아 (분류, 설명, 세부 정보)를 반환하는 함수
+                (예: SponsorshipClassifier.classify_email)
+            prefilter: BulkMailPrefilter (대량 발송 메일은 분류 API 호출 없이 기록)
+            page_size: list() 한 페이지 크기
+            fetch_size: 한 번에 본문을 가져올 메시지 수
+            delay: 분류 API 호출 사이 대기 시간 (초)
+            mark_processed: True이면 분류 결과를 Gmail 라벨로도 저장
+            on_progress: 메시지를 처리할 때마다 progress()를 받을 함수
+            classify_batch: 이메일 리스트를 받아 같은 순서의 분류 결과 리스트를 반환하는 함수
+                (예: SponsorshipClassifier.classify_emails). 있으면 fetch_size개씩 한 번에 분류하고
+                classify와 delay는 사용하지 않음
+
+        Returns:
+            progress() 결과
+        """
+        if self.read_only:
+            raise RuntimeError(f"'{self.name}' 작업을 읽기 전용으로 열었습니다")
+        self._truncate_partial_line()
+        self._run_started = time.time()
+        self._run_processed = 0
+
+        def process(message_ids: List[str]):
+            """fetch_size개씩 처리"""
+            for start in range(0, len(message_ids), fetch_size):
+                processed = self._process_chunk(gmail_client, message_ids[start:start + fetch_size], classify,
+                                                prefilter, delay, on_progress, classify_batch)
+                if mark_processed and processed:
+                    gmail_client.mark_processed(processed)
+
+        # 이전 실행에서 실패한 메시지 먼저 다시 처리 (이번 실행의 실패는 다음 실행으로 넘김)
+        retry = list(self.retry_ids)
+        if retry:
+            process(retry)
+
+        while not self.checkpoint['finished']:
+            if not self.checkpoint['page']:
+                if self.checkpoint['pages_listed'] and not self.checkpoint['next_page_token']:
+                    self.checkpoint['finished'] = True
+                    self._save_checkpoint()
+                    break
+                self._list_next_page(gmail_client, page_size)
+                continue
+
+            pending = [
+                message_id for message_id in self.checkpoint['page']
+                if message_id not in self.retry_ids and message_id not in self.done_ids
+            ]
+            process(pending)
+
+            # 페이지를 모두 처리했으면 다음 페이지로 (에러 상태는 다음 실행 때 다시 처리)
+            self.checkpoint['page'] = []
+            if not self.checkpoint['next_page_token']:
+                self.checkpoint['finished'] = True
+            self._save_checkpoint()
+
+        return self.progress()
+
+    def _list_next_page(self, gmail_client, page_size: int):
+        """다음 페이지의 메시지 ID를 받아 체크포인트에 저장"""
+        page_token = self.checkpoint['next_page_token']
+        try:
+            message_ids, next_token, estimate = gmail_client.list_message_page(self.query, page_token, page_size)
+        except Exception as e:
+            if page_token is None:
+                raise
+            # 오래된 페이지 토큰은 만료될 수 있음 → 처음부터 다시 목록 조회 (처리한 메시지는 건너뜀)
+            print(f"페이지 토큰을 사용할 수 없어 처음부터 목록을 다시 조회합니다: {e}")
+            message_ids, next_token, estimate = gmail_client.list_message_page(self.query, None, page_size)
+
+        self.checkpoint['page'] = message_ids
+        self.checkpoint['next_page_token'] = next_token
+        self.checkpoint['pages_listed'] += 1
+        self.checkpoint['result_size_estimate'] = max(self.checkpoint['result_size_estimate'], estimate)
+        if not message_ids:
+            self.checkpoint['finished'] = True
+        self._save_checkpoint()
+
+    def _process_chunk(self, gmail_client, message_ids: List[str], classify: Callable, prefilter,
+                       delay: float, on_progress: Optional[Callable], classify_batch: Optional[Callable] = None) -> Dict[str, str]:
+        """메시지 묶음의 본문을 가져와 분류하고 하나씩 기록 → {메시지 ID: 분류}"""
+        skipped_before = gmail_client.fetch_stats['skipped']
+        emails = gmail_client.get_emails_by_ids(message_ids)
+        filtered = gmail_client.fetch_stats['skipped'] - skipped_before
+
+        # 받지 못한 메시지: 모두 후보 필터로 걸러진 것이면 'not_candidate', 아니면 다음 실행 때 다시 시도
+        returned = {email_data['id'] for email_data in emails}
+        missing = [message_id for message_id in message_ids if message_id not in returned]
+        missing_status = 'not_candidate' if len(missing) == filtered else 'error'
+        for message_id in missing:
+            self._append_result({'id': message_id, 'status': missing_status, 'processed_at': datetime.now().isoformat()})
+            self._run_processed += 1
+
+        reasons = {}
+        batch_results = {}
+        if classify_batch is not None:
+            # 사전 필터를 통과한 메일을 한 번에(묶음/동시 요청으로) 분류
+            reasons = {email_data['id']: prefilter.apply(email_data) if prefilter else None for email_data in emails}
+            to_classify = [email_data for email_data in emails if not reasons[email_data['id']]]
+            try:
+                results = classify_batch(to_classify) if to_classify else []
+            except Exception as e:
+                results = [e] * len(to_classify)
+            batch_results = {email_data['id']: result for email_data, result in zip(to_classify, results)}
+
+        processed = {}
+        for email_data in emails:
+            record = {'id': email_data['id'], 'processed_at': datetime.now().isoformat()}
+            try:
+                if email_data['id'] in reasons:
+                    reason = reasons[email_data['id']]
+                else:
+                    reason = prefilter.apply(email_data) if prefilter else None
+                if reason:
+                    classification, explanation, details = prefilter.skip_result(reason)
+                    record['status'] = 'prefiltered'
+                elif email_data['id'] in batch_results:
+                    result = batch_results[email_data['id']]
+                    if isinstance(result, Exception):
+                        raise result
+                    if result is None:
+                        # 일시적 API 오류 → 'error'로 기록해 다음 실행 때 다시 분류
+                        raise RuntimeError("일시적 API 오류로 분류하지 못했습니다")
+                    classification, explanation, details = result
+                    record['status'] = 'classified'
+                else:
+                    classification, explanation, details = classify(email_data)
+                    record['status'] = 'classified'
+                    time.sleep(delay)
+            except Exception as e:
+                print(f"분류 오류 ({email_data['id']}): {e}")
+                record.update({'status': 'error', 'error': str(e)})
+                classification = None
+
+            if classification is not None:
+                record.update({
+                    'classification': classification,
+                    'explanation': explanation,
+                    'details': details,
+                    'email': {
+                        **{field: email_data.get(field) for field in RESULT_EMAIL_FIELDS},
+                        'body': str(email_data.get('body', ''))[:RESULT_BODY_CHARS]
+                    }
+                })
+                processed[email_data['id']] = classification
+            self._append_result(record)
+            self._run_processed += 1
+            if on_progress is not None:
+                on_progress(self.progress())
+        return processed
+
+    # ------------------------------------------------------------------
+    # 진행 상황
+    # ------------------------------------------------------------------
+
+    def progress(self) -> Dict:
+        """
+        진행 상황
+
+        Returns:
+            처리 개수, 상태별 개수, 전체 추정치, 이번 실행의 분당 처리량, 남은 예상 시간(초)
+        """
+        by_status = {status: count for status, count in self.status_counts.items() if count}
+        done = sum(count for status, count in by_status.items() if status not in RETRY_STATUSES)
+
+        elapsed = time.time() - self._run_started if self._run_started else 0
+        per_minute = self._run_processed / elapsed * 60 if elapsed > 0 else 0.0
+        # resultSizeEstimate는 대략적인 값이므로 이미 처리한 개수보다 작으면 처리 개수를 사용
+        total = max(self.checkpoint['result_size_estimate'], done)
+        remaining = 0 if self.checkpoint['finished'] else max(0, total - done)
+        eta_seconds = remaining / per_minute * 60 if per_minute > 0 else None
+
+        return {
+            'name': self.name,
+            'done': done,
+            'by_status': by_status,
+            'total_estimate': total,
+            'pages_listed': self.checkpoint['pages_listed'],
+            'finished': self.checkpoint['finished'],
+            'per_minute': per_minute,
+            'eta_seconds': eta_seconds
+        }
+
+    def load_results(self) -> List[Dict]:
+        """
+        분류된 결과를 app.py의 classified_emails 형식으로 불러오기 (최신 기록 우선, 중복 제외)
+        """
+        records = {}
+        for record in self._read_results()[0]:
+            if 'classification' in record:
+                records[record['id']] = record
+
+        return [
+            {
+                'email': record['email'],
+                'classification': record['classification'],
+                'explanation': record['explanation'],
+                'details': record['details'],
+                'translation_data': None,
+                'schedule_data': None
+            }
+            for record in reversed(list(records.values()))
+        ]
+
+
+def format_progress(progress: Dict) -> str:
+    """진행 상황 한 줄 요약"""
+    eta = progress['eta_seconds']
+    eta_text = '완료' if progress['finished'] else (
+        f"남은 예상 {eta / 60:.0f}분" if eta is not None else "남은 시간 계산 중"
+    )
+    return (f"[{progress['name']}] {progress['done']}/{progress['total_estimate']}개 처리 · "
+            f"분당 {progress['per_minute']:.1f}개 · {eta_text}")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from classifier import SponsorshipClassifier
+    from gmail_client import GmailClient
+    from prefilter import BulkMailPrefilter
+
+    parser = argparse.ArgumentParser(description="메일함 전체 백필 (중단 후 같은 이름으로 실행하면 이어서 처리)")
+    parser.add_argument('--name', required=True, help="작업 이름")
+    parser.add_argument('--query', default='', help="Gmail 검색 쿼리 (기본: 전체 메일)")
+    parser.add_argument('--sponsorship', action='store_true', help="협찬 키워드 검색 쿼리 사용")
+    parser.add_argument('--delay', type=float, default=1.0, help="분류 API 호출 사이 대기 (초)")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="2 이상이면 메일을 묶어 동시에 분류 (--delay 대신 요청 속도 제한 사용)")
+    parser.add_argument('--all', action='store_true', help="협찬 후보가 아닌 메일도 본문을 받아 분류")
+    parser.add_argument('--labels', action='store_true', help="분류 결과를 Gmail 라벨로도 저장")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv('CLOVA_STUDIO_KEY')
+    if not api_key:
+        parser.error("CLOVA_STUDIO_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
+
+    query = GmailClient.sponsorship_query() if args.sponsorship else args.query
+    job = BackfillJob(args.name, query)
+    gmail_client = GmailClient(relevance_filter=None if args.all else GmailClient.is_sponsorship_candidate)
+    classifier = SponsorshipClassifier(api_key)
+
+    last_report = [0.0]
+
+    def report(progress: Dict):
+        if time.time() - last_report[0] >= 10:
+            last_report[0] = time.time()
+            print(format_progress(progress))
+
+    try:
+        progress = job.run(
+            gmail_client,
+            classifier.classify_email,
+            prefilter=BulkMailPrefilter(),
+            delay=args.delay,
+            mark_processed=args.labels,
+            on_progress=report,
+            classify_batch=(
+                (lambda emails: classifier.classify_emails(emails, max_concurrency=args.concurrency))
+                if args.concurrency > 1 else None
+            )
+        )
+    except KeyboardInterrupt:
+        # 결과는 한 건씩 기록되므로 다시 실행하면 이어서 처리
+        print("\n중단했습니다. 같은 --name으로 다시 실행하면 이어서 처리합니다.")
+        progress = job.progress()
+    finally:
+        classifier.close()
+    print(format_progress(progress))
+    print(f"상태별: {progress['by_status']} · 결과 파일: {job.results_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+HyperCLOVA 분류 벤치마크 (로컬 스텁 서버 사용)
+
+실제 HyperCLOVA API 대신 clova_stub_server.ClovaStubServer에 요청을 보내
+이메일 한 통의 분류가 화면에 나타날 때까지의 시간(첫 결과 시간)을 비교합니다.
+
+- 일반: 전체 응답을 받은 뒤 파싱 (classify_email)
+- 스트리밍: CATEGORY 줄이 도착하는 즉시 전달, 나머지도 끝까지 받음 (classify_email_stream)
+- 카테고리만: CATEGORY 줄을 받으면 연결을 끊어 생성 중단 (category_only=True)
+
+사용법:
+    python benchmark_clova.py [--emails 10] [--latency 0.5] [--token-interval 0.02]
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from classifier import ClovaAPI, SponsorshipClassifier
+from clova_stub_server import ClovaStubServer
+
+
+def _classifier(stub: ClovaStubServer) -> SponsorshipClassifier:
+    """스텁 서버로 요청하고 캐시를 쓰지 않는 분류기"""
+    classifier = SponsorshipClassifier('bench', use_cache=False)
+    classifier.clova_api = ClovaAPI(api_key='bench', request_id=str(uuid.uuid4()), host=stub.url)
+    return classifier
+
+
+def _measure(classifier: SponsorshipClassifier, emails, mode: str):
+    """이메일마다 (첫 결과까지 걸린 시간, 분류가 끝날 때까지 걸린 시간) 측정"""
+    first_results, totals = [], []
+    for email_data in emails:
+        first = {}
+        start = time.perf_counter()
+
+        def on_category(category: str):
+            first.setdefault('time', time.perf_counter() - start)
+
+        if mode == 'blocking':
+            classifier.classify_email(email_data)
+        else:
+            classifier.classify_email_stream(email_data, on_category=on_category,
+                                             category_only=(mode == 'category_only'))
+        total = time.perf_counter() - start
+        first_results.append(first.get('time', total))
+        totals.append(total)
+    return first_results, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HyperCLOVA 일반 vs 스트리밍 분류 첫 결과 시간 비교")
+    parser.add_argument('--emails', type=int, default=10, help="분류할 이메일 수")
+    parser.add_argument('--latency', type=float, default=0.5, help="첫 토큰까지의 시간 (초)")
+    parser.add_argument('--token-interval', type=float, default=0.02, help="토큰 하나의 생성 시간 (초)")
+    args = parser.parse_args()
+
+    emails = [
+        {'subject': f'협찬 제안 #{i}', 'sender': f'brand{i}@example.com', 'date': '2024-01-01',
+         'body': f'안녕하세요. 신제품 무선 이어폰 리뷰 영상 협찬을 제안드립니다 (#{i}).'}
+        for i in range(args.emails)
+    ]
+
+    print(f"[clova] 첫 토큰 {args.latency * 1000:.0f}ms, 토큰당 {args.token_interval * 1000:.0f}ms, "
+          f"이메일 {args.emails}개")
+    print(f"{'방식':>10} | {'첫 결과 평균 (ms)':>16} | {'첫 결과 p95 (ms)':>15} | "
+          f"{'이메일당 (ms)':>12} | {'생성 토큰':>8} | {'중단':>4}")
+    print('-' * 86)
+
+    with ClovaStubServer(latency=args.latency, token_interval=args.token_interval) as stub:
+        classifier = _classifier(stub)
+        baseline = None
+        for mode, label in [('blocking', '일반'), ('streaming', '스트리밍'), ('category_only', '카테고리만')]:
+            stub.reset_stats()
+            first_results, totals = _measure(classifier, emails, mode)
+            # 서버는 다음 토큰을 보낼 때 연결이 끊긴 것을 알게 되므로 마지막 요청의 중단이 집계될 때까지 대기
+            time.sleep(args.token_interval * 5)
+            first_mean = statistics.mean(first_results)
+            first_p95 = sorted(first_results)[max(0, int(len(first_results) * 0.95) - 1)]
+            baseline = baseline or first_mean
+            print(f"{label:>10} | {first_mean * 1000:>16.0f} | {first_p95 * 1000:>15.0f} | "
+                  f"{statistics.mean(totals) * 1000:>12.0f} | {stub.tokens_generated:>8} | "
+                  f"{stub.cancelled_count:>4}   ({baseline / first_mean:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
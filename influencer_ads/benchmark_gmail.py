@@ -0,0 +1,224 @@
+"""
+Gmail 클라이언트 벤치마크 (로컬 스텁 서버 사용)
+
+실제 Gmail API 대신 gmail_stub_server.GmailStubServer에 요청을 보내
+구현 방식별 소요 시간을 비교합니다.
+
+사용법:
+    python benchmark_gmail.py batch
+    python benchmark_gmail.py concurrent [--workers 4 8 16] [--body-size 2000000]
+    python benchmark_gmail.py fields [--fixture fixtures.json]
+    python benchmark_gmail.py startup [--trials 10]
+    python benchmark_gmail.py record --out fixtures.json   # 실제 메일함에서 픽스처 기록
+"""
+import argparse
+import json
+import time
+from typing import Callable, List
+
+import httplib2
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+from gmail_client import GmailClient
+from google_api import GzipHttp, PartialResponseRequest
+from gmail_stub_server import GmailStubServer, build_stub_service
+from quota_scheduler import QuotaScheduler
+
+
+def _unthrottled() -> QuotaScheduler:
+    """스텁 서버 측정용 스케줄러 (할당량 대기 없이 전송 방식 차이만 비교)"""
+    return QuotaScheduler(units_per_second=1e9)
+
+
+def _timed(func: Callable) -> float:
+    """함수를 실행하고 경과 시간(초)을 반환"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _sequential_get(service, message_ids: List[str]):
+    """기존 방식: 메시지마다 messages.get 요청을 하나씩 순차 실행"""
+    for message_id in message_ids:
+        service.users().messages().get(userId='me', id=message_id, format='full').execute()
+
+
+def bench_batch(args):
+    """순차 messages.get vs 배치 HTTP 요청 비교"""
+    print(f"[batch] 왕복 지연 {args.latency * 1000:.0f}ms, "
+          f"배치 하위 요청 {args.fail_every or '-'}개마다 429 주입")
+    print(f"{'메시지 수':>10} | {'순차 (s)':>10} | {'배치 (s)':>10} | {'속도 향상':>8}")
+    print('-' * 50)
+
+    with GmailStubServer(message_count=max(args.sizes), latency=args.latency,
+                         fail_every=args.fail_every) as stub:
+        service = build_stub_service(stub.url)
+        client = GmailClient(service=service, scheduler=_unthrottled())
+
+        for size in args.sizes:
+            message_ids = [msg['id'] for msg in stub.messages[:size]]
+
+            sequential = _timed(lambda: _sequential_get(service, message_ids))
+
+            fetched = []
+            batched = _timed(lambda: fetched.extend(client._batch_get_messages(message_ids)))
+            assert [msg['id'] for msg in fetched] == message_ids, "배치 결과 순서가 다릅니다"
+
+            print(f"{size:>10} | {sequential:>10.2f} | {batched:>10.2f} | {sequential / batched:>7.1f}x")
+
+
+def bench_concurrent(args):
+    """순차 messages.get vs 배치 요청 vs 스레드 풀 동시 조회 비교 (본문이 큰 메일)"""
+    print(f"[concurrent] 메시지 {args.count}개, 본문 {args.body_size:,}바이트, "
+          f"왕복 지연 {args.latency * 1000:.0f}ms")
+    print(f"{'방식':<16} | {'시간 (s)':>9} | {'속도 향상':>8}")
+    print('-' * 40)
+
+    with GmailStubServer(message_count=args.count, latency=args.latency,
+                         body_size=args.body_size) as stub:
+        message_ids = [msg['id'] for msg in stub.messages]
+        service = build_stub_service(stub.url)
+
+        sequential = _timed(lambda: _sequential_get(service, message_ids))
+        print(f"{'순차':<16} | {sequential:>9.2f} | {1.0:>7.1f}x")
+
+        client = GmailClient(service=service, scheduler=_unthrottled())
+        batched = _timed(lambda: client._batch_get_messages(message_ids))
+        print(f"{'배치':<16} | {batched:>9.2f} | {sequential / batched:>7.1f}x")
+
+        for workers in args.workers:
+            client = GmailClient(service=service, scheduler=_unthrottled(), max_workers=workers,
+                                 service_factory=lambda: build_stub_service(stub.url))
+            # 스레드별 서비스 생성 비용은 한 번뿐이므로 워밍업 후 측정
+            client._parallel_get_messages(message_ids[:workers])
+            fetched = []
+            pooled = _timed(lambda: fetched.extend(client._parallel_get_messages(message_ids)))
+            client.close()
+            assert [msg['id'] for msg in fetched] == message_ids, "스레드 풀 결과 순서가 다릅니다"
+            print(f"{f'스레드 풀 x{workers}':<16} | {pooled:>9.2f} | {sequential / pooled:>7.1f}x")
+
+
+class IdentityHttp(httplib2.Http):
+    """압축 없이 응답을 받는 httplib2.Http (gzip 비교 기준)"""
+
+    def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+        headers = dict(headers or {})
+        headers['accept-encoding'] = 'identity'
+        return super().request(uri, method, body, headers, *args, **kwargs)
+
+
+def bench_fields(args):
+    """fields 마스크/gzip 적용 전후 응답 크기와 지연 비교"""
+    variants = [
+        ('마스크 없음, 압축 없음', IdentityHttp, HttpRequest),
+        ('마스크 없음, 기본 httplib2', httplib2.Http, HttpRequest),
+        ('fields 마스크 + gzip', GzipHttp, PartialResponseRequest),
+    ]
+    print(f"[fields] 메시지 {args.count}개, 픽스처: {args.fixture or '생성 데이터'}")
+    print(f"{'방식':<28} | {'응답 바이트':>12} | {'full (s)':>9} | {'metadata (s)':>12}")
+    print('-' * 72)
+
+    with GmailStubServer(message_count=args.count, latency=args.latency,
+                         fixture_path=args.fixture) as stub:
+        message_ids = [msg['id'] for msg in stub.messages]
+        for name, http_class, request_builder in variants:
+            service = build_stub_service(stub.url, http=http_class(), request_builder=request_builder)
+            client = GmailClient(service=service, scheduler=_unthrottled())
+            stub.reset_stats()
+
+            full = _timed(lambda: client.get_emails(query='', max_results=args.count))
+            metadata = _timed(lambda: client._batch_get_messages(
+                message_ids, format='metadata', metadata_headers=['Subject', 'From', 'Date']))
+
+            print(f"{name:<28} | {stub.bytes_sent:>12,} | {full:>9.2f} | {metadata:>12.2f}")
+
+
+def bench_startup(args):
+    """서비스 생성 방식별 첫 요청까지 걸리는 시간 비교 (버튼 클릭마다 클라이언트를 만드는 경우)"""
+    print(f"[startup] 시도 {args.trials}회 평균, 왕복 지연 {args.latency * 1000:.0f}ms")
+    print(f"{'방식':<32} | {'첫 요청까지 (ms)':>16}")
+    print('-' * 52)
+
+    with GmailStubServer(message_count=10, latency=args.latency) as stub:
+        discovery_url = stub.url + 'discovery/{api}/{apiVersion}/rest'
+
+        def legacy():
+            # 기존 방식: 매번 디스커버리 문서를 네트워크로 받아 서비스 생성
+            service = build('gmail', 'v1', http=httplib2.Http(), discoveryServiceUrl=discovery_url,
+                            static_discovery=False, cache_discovery=False)
+            service.users().getProfile(userId='me').execute()
+
+        def static():
+            # 매번 생성하지만 번들된 정적 디스커버리 문서 사용
+            build_stub_service(stub.url).users().getProfile(userId='me').execute()
+
+        cached_service = build_stub_service(stub.url)
+
+        def cached():
+            # 프로세스 전체에서 한 번 만든 서비스 재사용
+            cached_service.users().getProfile(userId='me').execute()
+
+        for name, func in [('매번 생성 + 디스커버리 다운로드', legacy),
+                           ('매번 생성 + 정적 디스커버리', static),
+                           ('캐시된 서비스 재사용', cached)]:
+            elapsed = sum(_timed(func) for _ in range(args.trials)) / args.trials
+            print(f"{name:<32} | {elapsed * 1000:>16.1f}")
+
+
+def record_fixture(args):
+    """실제 Gmail 메일함에서 마스크 없는 full 메시지를 픽스처 파일로 기록"""
+    client = GmailClient()
+    results = client.service.users().messages().list(
+        userId='me', q=args.query, maxResults=args.count, fields='*'
+    ).execute()
+    messages = [
+        client.service.users().messages().get(
+            userId='me', id=message['id'], format='full', fields='*'
+        ).execute()
+        for message in results.get('messages', [])
+    ]
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(messages, f, ensure_ascii=False)
+    print(f"{len(messages)}개 메시지를 {args.out}에 기록했습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gmail 클라이언트 벤치마크")
+    parser.add_argument('--latency', type=float, default=0.03, help="HTTP 왕복 지연 (초)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch_parser = subparsers.add_parser('batch', help="순차 get vs 배치 get")
+    batch_parser.add_argument('--sizes', type=int, nargs='+', default=[20, 50, 500])
+    batch_parser.add_argument('--fail-every', type=int, default=0,
+                              help="N번째 하위 요청마다 429를 반환해 재시도 경로 측정")
+    batch_parser.set_defaults(func=bench_batch)
+
+    concurrent_parser = subparsers.add_parser('concurrent', help="순차 get vs 배치 vs 스레드 풀")
+    concurrent_parser.add_argument('--count', type=int, default=100)
+    concurrent_parser.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16])
+    concurrent_parser.add_argument('--body-size', type=int, default=500_000,
+                                   help="메시지 본문 크기 (바이트)")
+    concurrent_parser.set_defaults(func=bench_concurrent)
+
+    fields_parser = subparsers.add_parser('fields', help="fields 마스크/gzip 전후 응답 크기 비교")
+    fields_parser.add_argument('--count', type=int, default=100)
+    fields_parser.add_argument('--fixture', help="record 명령으로 기록한 메시지 JSON 파일")
+    fields_parser.set_defaults(func=bench_fields)
+
+    startup_parser = subparsers.add_parser('startup', help="서비스 생성 방식별 첫 요청까지 시간")
+    startup_parser.add_argument('--trials', type=int, default=10)
+    startup_parser.set_defaults(func=bench_startup)
+
+    record_parser = subparsers.add_parser('record', help="실제 메일함에서 픽스처 기록")
+    record_parser.add_argument('--query', default='')
+    record_parser.add_argument('--count', type=int, default=100)
+    record_parser.add_argument('--out', default='gmail_fixtures.json')
+    record_parser.set_defaults(func=record_fixture)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
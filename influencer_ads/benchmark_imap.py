@@ -0,0 +1,97 @@
+"""
+IMAP 클라이언트 벤치마크 (로컬 스텁 서버 사용)
+
+실제 네이버/다음 IMAP 서버 대신 imap_stub_server.ImapStubServer에 접속해
+조회 방식별 소요 시간과 새 메일 알림 지연을 측정합니다.
+
+사용법:
+    python benchmark_imap.py fetch [--sizes 20 100 500]
+    python benchmark_imap.py idle [--trials 5]
+"""
+import argparse
+import threading
+import time
+from typing import Callable
+
+from imap_client import ImapClient
+from imap_stub_server import ImapStubServer
+
+
+def _timed(func: Callable) -> float:
+    """함수를 실행하고 경과 시간(초)을 반환"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _client(stub: ImapStubServer, **kwargs) -> ImapClient:
+    client = ImapClient(stub.host, 'bench', 'bench', port=stub.port, use_ssl=False, **kwargs)
+    client.connect()
+    return client
+
+
+def bench_fetch(args):
+    """메시지마다 UID FETCH vs UID 범위 집합으로 묶은 UID FETCH 비교"""
+    print(f"[fetch] 왕복 지연 {args.latency * 1000:.0f}ms, 본문 {args.body_size}바이트")
+    print(f"{'메시지 수':>10} | {'개별 (s)':>10} | {'범위 (s)':>10} | {'속도 향상':>8} | {'왕복':>9}")
+    print('-' * 62)
+
+    with ImapStubServer(message_count=max(args.sizes), latency=args.latency,
+                        body_size=args.body_size) as stub:
+        single = _client(stub, fetch_chunk_size=1)
+        ranged = _client(stub)
+
+        for size in args.sizes:
+            uids = [msg.uid for msg in stub.messages[-size:]]
+            single.reset_fetch_stats()
+            ranged.reset_fetch_stats()
+            single_time = _timed(lambda: single._fetch_emails(uids))
+            ranged_time = _timed(lambda: ranged._fetch_emails(uids))
+            round_trips = f"{single.fetch_stats['round_trips']}→{ranged.fetch_stats['round_trips']}"
+            print(f"{size:>10} | {single_time:>10.2f} | {ranged_time:>10.2f} | "
+                  f"{single_time / ranged_time:>7.1f}x | {round_trips:>9}")
+
+        single.close()
+        ranged.close()
+
+
+def bench_idle(args):
+    """새 메일 도착부터 IDLE 알림을 받을 때까지의 지연 측정"""
+    print(f"[idle] 왕복 지연 {args.latency * 1000:.0f}ms")
+    with ImapStubServer(message_count=10, latency=args.latency) as stub:
+        client = _client(stub)
+        for trial in range(args.trials):
+            arrived_at = {}
+
+            def deliver():
+                time.sleep(0.2)
+                arrived_at['time'] = time.perf_counter()
+                stub.add_message()
+
+            threading.Thread(target=deliver, daemon=True).start()
+            notified = client.wait_for_new_mail(timeout=5)
+            delay = time.perf_counter() - arrived_at.get('time', time.perf_counter())
+            print(f"  {trial + 1}회: {'알림 수신' if notified else '시간 초과'}, 지연 {delay * 1000:.1f}ms")
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IMAP 클라이언트 벤치마크")
+    parser.add_argument('--latency', type=float, default=0.03, help="IMAP 명령 왕복 지연 (초)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fetch_parser = subparsers.add_parser('fetch', help="개별 FETCH vs 범위 FETCH")
+    fetch_parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 500])
+    fetch_parser.add_argument('--body-size', type=int, default=4000, help="메시지 본문 크기 (바이트)")
+    fetch_parser.set_defaults(func=bench_fetch)
+
+    idle_parser = subparsers.add_parser('idle', help="IDLE 새 메일 알림 지연")
+    idle_parser.add_argument('--trials', type=int, default=5)
+    idle_parser.set_defaults(func=bench_idle)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,15 @@
-import os
-import pickle
 from datetime import datetime, timedelta
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import streamlit as st
 
+from google_api import get_credentials, get_service
+
 # Google Calendar API 스코프
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# OAuth 토큰 저장 파일
+TOKEN_FILE = 'calendar_token.pickle'
+
 class CalendarClient:
     """Google Calendar API 클라이언트"""
     
@@ -20,31 +19,10 @@ class CalendarClient:
         self.credentials = None
         
     def authenticate(self):
-        """Google Calendar API 인증"""
+        """Google Calendar API 인증 (인증 정보와 서비스 객체는 프로세스 전체에서 한 번만 생성)"""
         try:
-            # 기존 토큰 확인
-            if os.path.exists('calendar_token.pickle'):
-                with open('calendar_token.pickle', 'rb') as token:
-                    self.credentials = pickle.load(token)
-            
-            # 토큰이 없거나 유효하지 않은 경우
-            if not self.credentials or not self.credentials.valid:
-                if self.credentials and self.credentials.expired and self.credentials.refresh_token:
-                    self.credentials.refresh(Request())
-                else:
-                    if not os.path.exists('credentials.json'):
-                        raise FileNotFoundError("credentials.json 파일을 찾을 수 없습니다.")
-                    
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        'credentials.json', SCOPES)
-                    self.credentials = flow.run_local_server(port=0)
-                
-                # 토큰 저장
-                with open('calendar_token.pickle', 'wb') as token:
-                    pickle.dump(self.credentials, token)
-            
-            # 서비스 빌드
-            self.service = build('calendar', 'v3', credentials=self.credentials)
+            self.credentials = get_credentials(TOKEN_FILE, SCOPES)
+            self.service = get_service('calendar', 'v3', TOKEN_FILE, SCOPES)
             return True
             
         except Exception as e:
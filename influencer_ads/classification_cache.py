@@ -0,0 +1,180 @@
+"""
+분류 결과 디스크 캐시 (SQLite)
+
+HyperCLOVA 분류 요청은 seed와 temperature가 고정되어 같은 입력에 같은 결과를 돌려주므로,
+정규화한 제목/본문 해시와 프롬프트 버전을 키로 결과를 저장해 다음 세션에서도 다시 호출하지 않습니다.
+
+- 키: sha256(프롬프트 버전 + 분류 종류 + 정규화한 제목 + 정규화한 본문)
+- 프롬프트 버전: 시스템 프롬프트, 모델 이름, 생성 옵션의 해시
+  (프롬프트를 고치면 버전이 바뀌어 이전 항목은 자동으로 무효화되고, 캐시를 열 때 삭제됨)
+- 최대 항목 수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+# 캐시 파일, 최대 항목 수
+CLASSIFICATION_CACHE_FILE = 'classification_cache.sqlite3'
+MAX_CACHE_ENTRIES = 50_000
+
+# 최대 항목 수를 넘으면 이 비율까지 줄임 (추가할 때마다 삭제하지 않도록 여유를 둠)
+EVICT_TO_RATIO = 0.9
+
+# 캐시 적중 시 최근 사용 시각을 모아 두었다가 이만큼 쌓이면 한 번에 기록
+# (기록 전에 프로세스가 끝나도 LRU 순서만 조금 어긋날 뿐 결과는 잃지 않음)
+TOUCH_FLUSH_HITS = 100
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """해시용 정규화 (유니코드 NFC, 공백 압축, 소문자)"""
+    text = unicodedata.normalize('NFC', str(text or ''))
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def prompt_version(system_prompt: str, model: str, **options) -> str:
+    """시스템 프롬프트 + 모델 + 생성 옵션 해시 (앞 16자리)"""
+    source = json.dumps({'prompt': system_prompt, 'model': model, 'options': options},
+                        ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+class ClassificationCache:
+    """(카테고리, 설명, 상세정보) 분류 결과를 저장하는 LRU 디스크 캐시
+
+    사용 예:
+        cache = ClassificationCache(version=prompt_version(prompt, 'HCX-005', temperature=0.3))
+        key = cache.key('email', subject, body)
+        result = cache.get(key)
+        if result is None:
+            result = ...분류...
+            cache.put(key, result)
+    """
+
+    def __init__(self, version: str, path: str = CLASSIFICATION_CACHE_FILE,
+                 max_entries: int = MAX_CACHE_ENTRIES):
+        """
+        Args:
+            version: 프롬프트 버전 (prompt_version 결과). 다른 버전의 항목은 삭제
+            path: SQLite 파일 경로 (':memory:'이면 메모리에만 저장)
+            max_entries: 최대 항목 수
+        """
+        self.version = version
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}  # 아직 기록하지 않은 키별 최근 사용 시각
+        # Streamlit은 스크립트를 여러 스레드에서 실행하므로 연결을 공유하고 잠금으로 보호
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS classifications (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                category TEXT NOT NULL,
+                explanation TEXT NOT NULL,
+                details TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON classifications (last_used)')
+        # 프롬프트나 모델이 바뀌어 다시 쓰지 않을 항목 정리
+        self._conn.execute('DELETE FROM classifications WHERE version != ?', (version,))
+        self._conn.commit()
+
+    def key(self, kind: str, subject: str, body: str) -> str:
+        """캐시 키 (kind: 'email', 'thread' 등 분류 요청 종류)"""
+        source = '\x00'.join([self.version, kind, normalize_text(subject), normalize_text(body)])
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, str, Dict]]:
+        """
+        저장된 분류 결과 (없으면 None)
+        
+        찾으면 최근 사용 시각을 메모리에 모아 두고 put, flush, close 때나
+        TOUCH_FLUSH_HITS번 적중할 때마다 한 번에 기록합니다 (적중마다 커밋하지 않음).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT category, explanation, details FROM classifications WHERE key = ? AND version = ?',
+                (key, self.version)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_FLUSH_HITS:
+                self._write_touched()
+                self._conn.commit()
+            self.stats['hits'] += 1
+        category, explanation, details = row
+        return category, explanation, json.loads(details)
+
+    def put(self, key: str, result: Tuple[str, str, Dict]):
+        """분류 결과 저장 (최대 항목 수를 넘으면 오래 사용하지 않은 항목 삭제)"""
+        category, explanation, details = result
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, self.version, category, explanation, json.dumps(details, ensure_ascii=False), now, now)
+            )
+            self.stats['writes'] += 1
+            self._write_touched()
+            self._evict()
+            self._conn.commit()
+
+    def flush(self):
+        """모아 둔 최근 사용 시각 기록"""
+        with self._lock:
+            if self._touched:
+                self._write_touched()
+                self._conn.commit()
+
+    def _write_touched(self):
+        """모아 둔 최근 사용 시각을 한 번에 UPDATE (커밋은 호출한 쪽에서)"""
+        if self._touched:
+            self._conn.executemany('UPDATE classifications SET last_used = ? WHERE key = ?',
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self):
+        count = self._conn.execute('SELECT COUNT(*) FROM classifications').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * EVICT_TO_RATIO)
+        self._conn.execute("""
+            DELETE FROM classifications WHERE key IN (
+                SELECT key FROM classifications ORDER BY last_used LIMIT ?
+            )
+        """, (excess,))
+        self.stats['evictions'] += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM classifications').fetchone()[0]
+
+    def hit_rate(self) -> float:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute('DELETE FROM classifications')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
@@ -1,21 +1,166 @@
 import requests
-from typing import Dict, Tuple
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
 import os
+import random
+import re
+import time
 import uuid
 import json
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from classification_cache import ClassificationCache, prompt_version
+from quota_scheduler import QuotaScheduler, clova_scheduler
+
+# 분류 요청 생성 옵션 (seed가 고정되어 같은 입력이면 같은 결과 → 결과 캐시 가능)
+CLASSIFY_TEMPERATURE = 0.3
+CLASSIFY_MAX_TOKENS = 1000
+
+# 여러 이메일 묶음 분류: 한 요청의 최대 이메일 수, 이메일 본문 토큰 예산, 이메일당 응답 토큰
+BATCH_MAX_EMAILS = 8
+BATCH_MAX_INPUT_TOKENS = 6000
+BATCH_OUTPUT_TOKENS_PER_EMAIL = 300
+# 응답에 구역이 없거나 형식이 깨진 이메일을 다시 묶어 요청할 횟수 (그래도 실패하면 한 통씩 분류)
+BATCH_MAX_ATTEMPTS = 2
+
+# 묶음 요청의 이메일 구분자와 응답 구역 머리글
+BATCH_EMAIL_START = '<<<EMAIL {}>>>'
+BATCH_EMAIL_END = '<<<END EMAIL {}>>>'
+BATCH_RESULT_PATTERN = re.compile(r'^[ \t*#]*<<<\s*RESULT\s+(\d+)\s*>>>[ \t*]*$', re.MULTILINE)
+
+# 동시에 보낼 기본 최대 요청 수 (AsyncClovaAPI, 연결 풀 크기)
+CLOVA_MAX_CONCURRENCY = 4
+
+# 요청 제한 시간 (초), 일시적 오류 재시도 횟수와 지수 백오프 (기본 대기, 최대 대기 초)
+CLOVA_TIMEOUT = 30
+CLOVA_MAX_RETRIES = 3
+CLOVA_BACKOFF_BASE = 1.0
+CLOVA_BACKOFF_MAX = 30.0
+# 다시 시도하면 성공할 수 있는 상태 코드 (속도 제한, 서버 오류)
+CLOVA_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 스트리밍 응답에서 줄바꿈까지 도착한 CATEGORY 줄 (줄이 끝나야 카테고리가 확정됨)
+STREAM_CATEGORY_PATTERN = re.compile(r'^[ \t*#]*CATEGORY[ \t*]*:(.*)\n', re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (한글은 글자당 1개, 영문은 3~4글자당 1개 정도 → UTF-8 3바이트당 1개)"""
+    return len(text.encode('utf-8')) // 3 + 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 기다릴 초로 변환 (없거나 읽을 수 없으면 None)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    attempt번째 재시도 전 대기 시간 (초)
+    
+    서버가 Retry-After를 보냈으면 그만큼 기다리고, 아니면 지수 백오프의 절반 + 무작위 지터
+    (동시에 실패한 요청들이 같은 순간에 다시 몰리지 않도록)
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, CLOVA_BACKOFF_BASE)
+    backoff = min(CLOVA_BACKOFF_MAX, CLOVA_BACKOFF_BASE * 2 ** attempt)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """SSE(server-sent events) 응답 줄을 (event, data)로 묶기 (빈 줄에서 이벤트 하나가 끝남)"""
+    event, data = 'message', []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, '\n'.join(data)
+            event, data = 'message', []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data.append(value)
+    if data:
+        yield event, '\n'.join(data)
+
+
+def parse_streamed_category(text: str) -> Optional[str]:
+    """지금까지 받은 응답에서 CATEGORY 줄이 끝났으면 카테고리 반환 (아직이면 None)"""
+    match = STREAM_CATEGORY_PATTERN.search(text)
+    if match is None:
+        return None
+    return match.group(1).strip('[]* \t').lower() or None
+
+
+class ClovaAPIError(Exception):
+    """HyperCLOVA API가 200이 아닌 상태 코드를 반환한 경우
+    
+    retryable이 True이면 일시적인 오류(속도 제한, 서버 오류)로 나중에 다시 요청하면 성공할 수 있고,
+    False이면 같은 요청을 다시 보내도 실패하는 최종 오류(잘못된 요청, 인증 실패 등)입니다.
+    """
+    
+    def __init__(self, status_code: int, response_text: str, retry_after: Optional[float] = None):
+        self.status_code = status_code
+        self.response_text = response_text
+        # 서버가 알려준 재시도 대기 시간 (초, Retry-After 헤더)
+        self.retry_after = retry_after
+        self.retryable = status_code in CLOVA_RETRYABLE_STATUS
+        # 상세한 오류 정보 출력
+        super().__init__(f"API 오류: Status: {status_code}, Response: {response_text}")
+
+
+class ClovaConnectionError(ClovaAPIError):
+    """연결 실패, 연결 끊김, 시간 초과 등 응답을 받지 못한 경우 (일시적 오류)"""
+    
+    def __init__(self, message: str, retryable: bool = True):
+        Exception.__init__(self, f"네트워크 오류: {message}")
+        self.status_code = None
+        self.response_text = ''
+        self.retry_after = None
+        self.retryable = retryable
 
 
 class ClovaAPI:
     """Naver HyperCLOVA API 클라이언트 (최신 v3 API)"""
     
-    def __init__(self, api_key: str, request_id: str):
+    def __init__(self, api_key: str, request_id: str, pool_size: int = CLOVA_MAX_CONCURRENCY,
+                 max_retries: int = CLOVA_MAX_RETRIES, host: str = "https://clovastudio.stream.ntruss.com"):
         # Naver CLOVA Studio API Key (Naver Cloud Platform > CLOVA Studio에서 발급)
         self.api_key = api_key
         # 요청 추적을 위한 고유 ID (자동 생성됨)
         self.request_id = request_id
-        # HyperCLOVA X 최신 API 엔드포인트 (v3)
-        self.host = "https://clovastudio.stream.ntruss.com"
-        self.api_url = f"{self.host}/v3/chat-completions/HCX-005"
+        # HyperCLOVA X 최신 API 엔드포인트 (v3, 벤치마크에서는 로컬 스텁 서버 주소)
+        self.host = host
+        self.model = "HCX-005"
+        self.api_url = f"{self.host}/v3/chat-completions/{self.model}"
+        # 일시적 오류를 다시 시도할 횟수 (0이면 재시도하지 않음)
+        self.max_retries = max_retries
+        # 요청마다 TCP/TLS 연결을 새로 맺지 않도록 연결을 유지하는 세션 (동시 요청 수만큼 풀 유지)
+        self.session = self._create_session(pool_size)
+    
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        # 재시도는 Retry-After와 요청 ID를 다뤄야 하므로 send()에서 직접 처리
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+        session.mount('https://', adapter)
+        return session
     
     def chat(self, messages: list, temperature: float = 0.5, max_tokens: int = 1000) -> str:
         """
@@ -29,14 +174,50 @@ class ClovaAPI:
         Returns:
             생성된 응답 텍스트
         """
-        # v3 API는 Authorization Bearer 토큰 방식 사용
+        return self.send(self.build_headers(self.request_id), self.build_payload(messages, temperature, max_tokens))
+    
+    def chat_stream(self, messages: list, temperature: float = 0.5, max_tokens: int = 1000,
+                    on_text: Optional[Callable[[str], None]] = None,
+                    stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        HyperCLOVA Chat API 스트리밍 호출 (SSE)
+        
+        토큰이 도착할 때마다 지금까지 생성된 전체 텍스트를 on_text로 넘기고,
+        stop_when이 True를 반환하면 연결을 끊어 생성을 중단합니다.
+        (일시적 오류로 다시 요청하면 on_text는 처음부터 다시 받은 텍스트로 호출됨)
+        
+        Args:
+            messages: 대화 메시지 리스트
+            temperature: 생성 다양성 (0.0~1.0)
+            max_tokens: 최대 토큰 수
+            on_text: 지금까지 생성된 텍스트를 받을 함수
+            stop_when: 지금까지 생성된 텍스트로 더 받을 필요가 없는지 판단하는 함수
+        
+        Returns:
+            생성된 응답 텍스트 (중간에 멈췄으면 그때까지의 텍스트)
+        """
+        return self.send(
+            self.build_headers(self.request_id, stream=True),
+            self.build_payload(messages, temperature, max_tokens),
+            on_text=on_text,
+            stop_when=stop_when
+        )
+    
+    def build_headers(self, request_id: str, stream: bool = False) -> Dict:
+        """요청 헤더 (v3 API는 Authorization Bearer 토큰 방식 사용)"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",  # Bearer 토큰 형식
-            "X-NCP-CLOVASTUDIO-REQUEST-ID": self.request_id,  # 요청 추적 ID
+            "X-NCP-CLOVASTUDIO-REQUEST-ID": request_id,  # 요청 추적 ID
             "Content-Type": "application/json; charset=utf-8"
         }
-        
-        # v3 API의 메시지 형식 변환
+        if stream:
+            # 스트리밍 응답(SSE) 요청
+            headers["Accept"] = "text/event-stream"
+        return headers
+    
+    @staticmethod
+    def build_payload(messages: list, temperature: float, max_tokens: int) -> Dict:
+        """요청 본문 (v3 API의 메시지 형식으로 변환)"""
         formatted_messages = []
         for msg in messages:
             formatted_messages.append({
@@ -47,7 +228,7 @@ class ClovaAPI:
                 }]
             })
         
-        payload = {
+        return {
             "messages": formatted_messages,
             "topP": 0.8,
             "topK": 0,
@@ -58,29 +239,175 @@ class ClovaAPI:
             "includeAiFilters": True,
             "seed": 0
         }
+    
+    def send(self, headers: Dict, payload: Dict,
+             on_retry: Optional[Callable[[ClovaAPIError, float], None]] = None,
+             on_text: Optional[Callable[[str], None]] = None,
+             stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        요청을 보내고 응답 텍스트 반환 (블로킹, AsyncClovaAPI는 작업 스레드에서 호출)
+        
+        속도 제한(429), 서버 오류(5xx), 연결 끊김/시간 초과는 최대 max_retries번 다시 보냅니다.
+        재시도에도 같은 헤더를 쓰므로 요청 ID(X-NCP-CLOVASTUDIO-REQUEST-ID)가 유지되어
+        서버 로그에서 한 요청으로 추적됩니다.
+        
+        Args:
+            headers: build_headers() 결과
+            payload: build_payload() 결과
+            on_retry: 재시도 전에 (오류, 대기 시간)을 받을 함수
+            on_text, stop_when: 스트리밍 요청일 때 chat_stream 참고
         
+        Raises:
+            ClovaAPIError: 최종 오류이거나 재시도를 모두 실패한 경우 (retryable로 구분)
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._send_once(headers, payload, on_text, stop_when)
+            except ClovaAPIError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                wait = backoff_delay(attempt, e.retry_after)
+                attempt += 1
+                print(f"HyperCLOVA 요청 재시도 {attempt}/{self.max_retries} ({wait:.1f}초 후): {str(e)}")
+                if on_retry is not None:
+                    on_retry(e, wait)
+                time.sleep(wait)
+    
+    def _send_once(self, headers: Dict, payload: Dict, on_text: Optional[Callable] = None,
+                   stop_when: Optional[Callable] = None) -> str:
+        stream = headers.get("Accept") == "text/event-stream"
         try:
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                result_data = response.json()
-                # v3 API 응답 형식에 맞게 파싱
-                if 'result' in result_data and 'message' in result_data['result']:
-                    return result_data['result']['message']['content']
-                elif 'message' in result_data:
-                    # content가 배열 형태일 수 있음
-                    content = result_data['message'].get('content', '')
-                    if isinstance(content, list) and len(content) > 0:
-                        return content[0].get('text', '')
-                    return str(content)
-                else:
-                    return str(result_data)
-            else:
-                # 상세한 오류 정보 출력
-                error_detail = f"Status: {response.status_code}, Response: {response.text}"
-                raise Exception(f"API 오류: {error_detail}")
+            response = self.session.post(self.api_url, headers=headers, json=payload,
+                                         timeout=CLOVA_TIMEOUT, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError) as e:
+            # 연결 실패, 시간 초과, 응답 본문을 받는 도중 끊김
+            raise ClovaConnectionError(str(e))
         except requests.exceptions.RequestException as e:
-            raise Exception(f"네트워크 오류: {str(e)}")
+            raise ClovaConnectionError(str(e), retryable=False)
+        
+        if response.status_code != 200:
+            raise ClovaAPIError(response.status_code, response.text,
+                                parse_retry_after(response.headers.get('Retry-After')))
+        if stream:
+            return self._read_stream(response, on_text, stop_when)
+        return self.parse_response(response.json())
+    
+    def _read_stream(self, response, on_text: Optional[Callable[[str], None]],
+                     stop_when: Optional[Callable[[str], bool]]) -> str:
+        """SSE 응답을 읽으며 생성된 텍스트 누적 (token 이벤트는 조각, result 이벤트는 전체 응답)"""
+        # text/event-stream은 charset이 없으면 requests가 ISO-8859-1로 해석하므로 지정
+        response.encoding = 'utf-8'
+        text = ''
+        try:
+            for event, data in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                if event == 'error':
+                    status = json.loads(data).get('status', {})
+                    code = str(status.get('code', ''))
+                    raise ClovaAPIError(int(code[:3]) if code[:3].isdigit() else 500, data)
+                if event not in ('token', 'result'):
+                    continue
+                content = self.parse_response(json.loads(data))
+                text = content if event == 'result' else text + content
+                if on_text is not None:
+                    on_text(text)
+                if event == 'result' or (stop_when is not None and stop_when(text)):
+                    break
+        except requests.exceptions.RequestException as e:
+            # 응답을 받는 도중 연결이 끊긴 경우
+            raise ClovaConnectionError(str(e))
+        finally:
+            # 끝까지 읽지 않고 연결을 닫으면 서버가 생성을 중단함
+            response.close()
+        return text
+    
+    def close(self):
+        self.session.close()
+    
+    @staticmethod
+    def parse_response(result_data: Dict) -> str:
+        """v3 API 응답 형식에 맞게 파싱"""
+        if 'result' in result_data and 'message' in result_data['result']:
+            return result_data['result']['message']['content']
+        elif 'message' in result_data:
+            # content가 배열 형태일 수 있음
+            content = result_data['message'].get('content', '')
+            if isinstance(content, list) and len(content) > 0:
+                return content[0].get('text', '')
+            return str(content)
+        else:
+            return str(result_data)
+
+
+class AsyncClovaAPI:
+    """asyncio용 HyperCLOVA API 클라이언트 (요청 형식과 응답 처리는 ClovaAPI와 같음)
+    
+    requests는 블로킹 라이브러리이므로 요청은 동시 요청 수만큼의 작업 스레드에서 보내고,
+    이벤트 루프에서는 세마포어로 동시에 진행 중인 요청 수를, clova_scheduler로 초당 요청 수를 제한합니다.
+    Streamlit이나 CLI 같은 동기 코드에서는 run_sync(...)로 실행합니다.
+    """
+    
+    def __init__(self, api_key: str, max_concurrency: int = CLOVA_MAX_CONCURRENCY,
+                 scheduler: Optional[QuotaScheduler] = None):
+        """
+        Args:
+            api_key: Naver CLOVA Studio API 키
+            max_concurrency: 동시에 보낼 최대 요청 수
+            scheduler: 요청 속도 조절기 (기본: 프로세스 공용 clova_scheduler)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.api = ClovaAPI(api_key=api_key, request_id=str(uuid.uuid4()), pool_size=self.max_concurrency)
+        self.model = self.api.model
+        self.scheduler = scheduler or clova_scheduler
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='clova')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """현재 이벤트 루프의 세마포어 (run_sync마다 새 루프가 만들어지므로 루프별로 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def _acquire_rate(self):
+        """이벤트 루프를 막지 않고 요청 토큰이 생길 때까지 대기"""
+        while not self.scheduler.try_acquire('chat-completions'):
+            await asyncio.sleep(max(0.05, self.scheduler.estimate_seconds({'chat-completions': 1})))
+    
+    async def chat(self, messages: list, temperature: float = 0.5, max_tokens: int = 1000) -> str:
+        """ClovaAPI.chat의 비동기 버전 (요청마다 새 요청 ID 사용)"""
+        async with self._get_semaphore():
+            await self._acquire_rate()
+            headers = self.api.build_headers(str(uuid.uuid4()))
+            payload = self.api.build_payload(messages, temperature, max_tokens)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.api.send, headers, payload, self._on_retry)
+    
+    def _on_retry(self, error: ClovaAPIError, wait: float):
+        """속도 제한을 받으면 다른 요청도 같은 시간 동안 멈추도록 버킷을 비움 (작업 스레드에서 호출)"""
+        if error.status_code == 429:
+            self.scheduler.penalize(wait)
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.api.close()
+
+
+def run_sync(coro):
+    """
+    코루틴을 동기 코드(Streamlit 스크립트, CLI 작업)에서 실행하고 결과 반환
+    
+    이미 이벤트 루프가 실행 중인 스레드(예: Jupyter)에서는 별도 스레드의 새 루프에서 실행합니다.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
 
 class SponsorshipClassifier:
@@ -95,28 +422,85 @@ class SponsorshipClassifier:
         'unclear': '정보 불충분 (추가 확인 필요)'
     }
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache: Optional[ClassificationCache] = None, use_cache: bool = True):
         """
         Args:
             api_key: Naver CLOVA Studio API 키 (환경 변수 CLOVA_STUDIO_KEY에서 로드)
+            cache: 분류 결과 캐시 (기본: CLASSIFICATION_CACHE_FILE, 프롬프트 버전은 자동 계산)
+            use_cache: False이면 캐시 없이 매번 API 호출
         """
         # API 키 저장 (Naver Cloud Platform > CLOVA Studio에서 발급받은 키)
         self.api_key = api_key
         # 각 요청마다 고유한 UUID 생성
         self.clova_api = ClovaAPI(api_key=api_key, request_id=str(uuid.uuid4()))
+        # 프롬프트, 모델, 생성 옵션이 바뀌면 버전이 달라져 이전 캐시 항목은 사용하지 않음
+        self.prompt_version = prompt_version(
+            self._get_system_prompt() + self._get_batch_instructions(),
+            self.clova_api.model,
+            temperature=CLASSIFY_TEMPERATURE,
+            max_tokens=CLASSIFY_MAX_TOKENS
+        )
+        if cache is None and use_cache:
+            cache = ClassificationCache(self.prompt_version)
+        self.cache = cache
+        # 동시 분류에 쓰는 클라이언트 (연결 풀과 작업 스레드를 호출마다 새로 만들지 않도록 유지)
+        self._async_api: Optional[AsyncClovaAPI] = None
+    
+    def close(self):
+        """연결 풀과 작업 스레드를 닫고 모아 둔 캐시 기록을 반영"""
+        if self._async_api is not None:
+            self._async_api.close()
+            self._async_api = None
+        self.clova_api.close()
+        if self.cache is not None:
+            self.cache.flush()
     
     def classify_email(self, email_data: Dict) -> Tuple[str, str, Dict]:
         """
         이메일을 분류하고 상세 정보 추출
         
         Args:
-            email_data: 이메일 데이터 (subject, sender, body 등)
+            email_data: 이메일 데이터 (subject, sender, body 등).
+                GmailClient.get_threads가 반환한 대화 정보도 대화 전체를 한 번에 분류
+        
+        Returns:
+            (카테고리, 설명, 상세정보) 튜플
+        
+        Raises:
+            ClovaAPIError: 재시도해도 해결되지 않은 일시적 오류 (retryable=True, 나중에 다시 분류)
+        """
+        kind, email_content = self._item_content(email_data)
+        return self._classify_content(email_content, self._cache_key(kind, email_data))
+    
+    def classify_email_stream(self, email_data: Dict, on_category: Optional[Callable[[str], None]] = None,
+                              category_only: bool = False) -> Tuple[str, str, Dict]:
+        """
+        스트리밍(SSE)으로 분류해 CATEGORY 줄이 도착하는 즉시 on_category로 전달
+        
+        응답 형식상 CATEGORY가 가장 먼저 오므로 전체 응답(설명, 상세정보)을 기다리지 않고
+        화면에 분류를 먼저 보여줄 수 있습니다. 캐시에 있으면 API를 호출하지 않고 바로 전달합니다.
+        
+        Args:
+            email_data: 이메일 정보 (get_threads의 대화 정보도 가능)
+            on_category: 카테고리를 받을 함수
+            category_only: True이면 카테고리를 받는 즉시 생성을 중단
+                (설명과 상세정보는 비어 있고 캐시하지 않음)
         
         Returns:
             (카테고리, 설명, 상세정보) 튜플
+        
+        Raises:
+            ClovaAPIError: 재시도해도 해결되지 않은 일시적 오류 (retryable=True, 나중에 다시 분류)
         """
-        # 이메일 내용 준비
-        email_content = f"""
+        kind, email_content = self._item_content(email_data)
+        return self._classify_content(email_content, self._cache_key(kind, email_data),
+                                      on_category=on_category or (lambda category: None),
+                                      category_only=category_only)
+    
+    @staticmethod
+    def _email_content(email_data: Dict) -> str:
+        """분류 요청에 보낼 이메일 내용"""
+        return f"""
 제목: {email_data.get('subject', '')}
 발신자: {email_data.get('sender', '')}
 날짜: {email_data.get('date', '')}
@@ -124,30 +508,272 @@ class SponsorshipClassifier:
 본문:
 {email_data.get('body', email_data.get('snippet', ''))}
 """
+    
+    @staticmethod
+    def _thread_content(thread_data: Dict) -> str:
+        """분류 요청에 보낼 대화 내용"""
+        return f"""
+다음은 메일 {thread_data.get('message_count', 1)}개로 이루어진 협찬 협의 대화입니다.
+대화 전체를 읽고, 가장 최근에 제안되거나 합의된 조건을 기준으로 하나만 분류하세요.
+
+제목: {thread_data.get('subject', '')}
+상대방: {thread_data.get('sender', '')}
+마지막 메일 날짜: {thread_data.get('date', '')}
+
+대화 내용:
+{thread_data.get('body', thread_data.get('snippet', ''))}
+"""
+    
+    def _item_content(self, item: Dict) -> Tuple[str, str]:
+        """이메일/대화 구분 → (캐시 종류, 분류 요청 내용)"""
+        if 'message_count' in item:
+            return 'thread', self._thread_content(item)
+        return 'email', self._email_content(item)
+    
+    def classify_emails(self, emails: List[Dict], delay: float = 0.0,
+                        on_progress: Optional[Callable[[int, int], None]] = None,
+                        max_concurrency: int = 1) -> List[Tuple[str, str, Dict]]:
+        """
+        여러 이메일을 묶어 적은 수의 API 호출로 분류
+        
+        시스템 프롬프트는 요청마다 한 번만 보내고, 토큰 예산(BATCH_MAX_INPUT_TOKENS) 안에서
+        최대 BATCH_MAX_EMAILS개의 이메일을 번호 붙인 구분자로 감싸 한 요청에 담습니다.
+        응답은 번호별 구역으로 나눠 파싱하고, 구역이 없거나 형식이 깨진 이메일만 다시 묶어 요청합니다.
+        BATCH_MAX_ATTEMPTS번 안에 결과를 받지 못한 이메일은 한 통씩 분류합니다.
+        한 통씩 보낸 요청이 재시도 후에도 일시적 오류로 끝나면 'unclear'로 기록하지 않고
+        결과를 None으로 남깁니다 (호출한 쪽에서 다음에 다시 분류).
+        
+        Args:
+            emails: 이메일 정보 리스트 (get_threads의 대화 정보도 가능)
+            delay: API 요청 사이 대기 시간 (초, 캐시 적중은 대기하지 않음)
+            on_progress: (분류를 마친 개수, 전체 개수)를 받을 함수
+            max_concurrency: 2 이상이면 AsyncClovaAPI로 요청을 동시에 보냄
+                (delay 대신 동시 요청 수와 clova_scheduler로 속도 제한)
+        
+        Returns:
+            emails와 같은 순서의 (카테고리, 설명, 상세정보) 튜플 리스트 (일시적 오류는 None)
+        """
+        if max_concurrency > 1:
+            return run_sync(self.aclassify_emails(emails, max_concurrency, on_progress))
+        
+        run = _ClassificationRun(self, emails, on_progress)
+        requests_sent = 0
+        while True:
+            batch_requests = run.next_requests()
+            if not batch_requests:
+                return run.results
+            for request in batch_requests:
+                if requests_sent and delay:
+                    time.sleep(delay)
+                requests_sent += 1
+                self.clova_api.request_id = str(uuid.uuid4())
+                try:
+                    response = self.clova_api.chat(
+                        request['messages'],
+                        temperature=CLASSIFY_TEMPERATURE,
+                        max_tokens=request['max_tokens']
+                    )
+                except Exception as e:
+                    run.apply(request, None, e)
+                else:
+                    run.apply(request, response)
+    
+    async def aclassify_emails(self, emails: List[Dict], max_concurrency: int = CLOVA_MAX_CONCURRENCY,
+                               on_progress: Optional[Callable[[int, int], None]] = None,
+                               async_api: Optional[AsyncClovaAPI] = None) -> List[Tuple[str, str, Dict]]:
+        """
+        classify_emails의 비동기 버전 (같은 차례의 요청을 최대 max_concurrency개씩 동시에 보냄)
+        
+        Args:
+            emails: 이메일 정보 리스트
+            max_concurrency: 동시에 보낼 최대 요청 수 (async_api를 넘기면 그 설정을 사용)
+            on_progress: (분류를 마친 개수, 전체 개수)를 받을 함수
+            async_api: 여러 작업이 함께 쓸 AsyncClovaAPI (없으면 분류기가 유지하는 클라이언트 사용)
+        
+        Returns:
+            emails와 같은 순서의 (카테고리, 설명, 상세정보) 튜플 리스트 (일시적 오류는 None)
+        """
+        api = async_api or self._get_async_api(max_concurrency)
+        run = _ClassificationRun(self, emails, on_progress)
+        
+        async def send(request: Dict):
+            try:
+                response = await api.chat(
+                    request['messages'],
+                    temperature=CLASSIFY_TEMPERATURE,
+                    max_tokens=request['max_tokens']
+                )
+            except Exception as e:
+                run.apply(request, None, e)
+            else:
+                run.apply(request, response)
+        
+        while True:
+            batch_requests = run.next_requests()
+            if not batch_requests:
+                return run.results
+            await asyncio.gather(*(send(request) for request in batch_requests))
+    
+    def _get_async_api(self, max_concurrency: int) -> AsyncClovaAPI:
+        """분류기가 유지하는 AsyncClovaAPI (동시 요청 수가 바뀌었을 때만 새로 만듦, close()에서 닫음)"""
+        api = self._async_api
+        if api is None or api.max_concurrency != max(1, max_concurrency):
+            if api is not None:
+                api.close()
+            api = self._async_api = AsyncClovaAPI(self.api_key, max_concurrency)
+        return api
+    
+    @staticmethod
+    def _pack_batches(contents: List[str]) -> List[List[int]]:
+        """토큰 예산과 최대 개수 안에서 순서대로 묶은 위치 리스트"""
+        batches, current, current_tokens = [], [], 0
+        for position, content in enumerate(contents):
+            tokens = estimate_tokens(content)
+            if current and (len(current) >= BATCH_MAX_EMAILS or current_tokens + tokens > BATCH_MAX_INPUT_TOKENS):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(position)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _single_messages(self, email_content: str) -> List[Dict]:
+        """이메일 하나를 분류하는 요청 메시지"""
+        return [
+            {
+                "role": "system",
+                "content": self._get_system_prompt()
+            },
+            {
+                "role": "user",
+                "content": email_content
+            }
+        ]
+    
+    def _batch_messages(self, contents: List[str]) -> List[Dict]:
+        """이메일 여러 개를 번호 붙인 구분자로 감싸 한 번에 분류하는 요청 메시지"""
+        blocks = [
+            f"{BATCH_EMAIL_START.format(number)}\n{content.strip()}\n{BATCH_EMAIL_END.format(number)}"
+            for number, content in enumerate(contents, 1)
+        ]
+        return [
+            {
+                "role": "system",
+                "content": self._get_system_prompt() + self._get_batch_instructions()
+            },
+            {
+                "role": "user",
+                "content": f"다음 이메일 {len(contents)}개를 각각 분류하세요.\n\n" + '\n\n'.join(blocks)
+            }
+        ]
+    
+    def _parse_batch_result(self, result: str, count: int) -> Dict[int, Tuple[str, str, Dict]]:
+        """
+        묶음 응답을 이메일별 결과로 나누기
+        
+        Returns:
+            {이메일 번호(1부터): (카테고리, 설명, 상세정보)} (구역이 없거나 형식이 깨진 번호는 제외)
+        """
+        parsed = {}
+        for number, section in self._split_batch_result(result).items():
+            if not 1 <= number <= count:
+                continue
+            result = self._validate_result(self._parse_classification_result(section))
+            if result is not None:
+                parsed[number] = result
+        return parsed
+    
+    @staticmethod
+    def _split_batch_result(result: str) -> Dict[int, str]:
+        """묶음 응답을 '<<<RESULT 번호>>>' 머리글 기준으로 나누기 (같은 번호가 또 나오면 처음 것 사용)"""
+        matches = list(BATCH_RESULT_PATTERN.finditer(result))
+        sections = {}
+        for position, match in enumerate(matches):
+            end = matches[position + 1].start() if position + 1 < len(matches) else len(result)
+            sections.setdefault(int(match.group(1)), result[match.end():end])
+        return sections
+    
+    def _cache_key(self, kind: str, email_data: Dict) -> Optional[str]:
+        """정규화한 제목과 본문으로 만든 캐시 키 (캐시를 쓰지 않으면 None)"""
+        if self.cache is None:
+            return None
+        return self.cache.key(
+            kind,
+            email_data.get('subject', ''),
+            email_data.get('body', email_data.get('snippet', ''))
+        )
+    
+    def _classify_content(self, email_content: str, cache_key: Optional[str] = None,
+                          on_category: Optional[Callable[[str], None]] = None,
+                          category_only: bool = False) -> Tuple[str, str, Dict]:
+        """분류할 내용을 HyperCLOVA에 보내고 결과 파싱 (캐시에 있으면 API 호출 생략)"""
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if on_category is not None:
+                    on_category(cached[0])
+                return cached
+        return self._request_classification(email_content, cache_key, on_category, category_only)
+    
+    def _request_classification(self, email_content: str, cache_key: Optional[str] = None,
+                                on_category: Optional[Callable[[str], None]] = None,
+                                category_only: bool = False) -> Tuple[str, str, Dict]:
+        """
+        이메일 하나를 HyperCLOVA에 분류 요청 (성공하면 캐시에 저장)
+        
+        on_category가 있으면 스트리밍으로 요청해 카테고리를 먼저 전달합니다.
+        """
+        streamed = {'category': None}
+        
+        def on_text(text: str):
+            if streamed['category'] is None:
+                category = parse_streamed_category(text)
+                if category is not None:
+                    streamed['category'] = category if category in self.CATEGORIES else 'unclear'
+                    on_category(streamed['category'])
         
         # HyperCLOVA API 호출
         try:
-            # 메시지 구성
-            messages = [
-                {
-                    "role": "system",
-                    "content": self._get_system_prompt()
-                },
-                {
-                    "role": "user",
-                    "content": email_content
-                }
-            ]
-            
             # API 호출 (매 요청마다 새로운 UUID 생성)
             self.clova_api.request_id = str(uuid.uuid4())
-            result = self.clova_api.chat(messages, temperature=0.3, max_tokens=1000)
+            if on_category is None:
+                result = self.clova_api.chat(
+                    self._single_messages(email_content),
+                    temperature=CLASSIFY_TEMPERATURE,
+                    max_tokens=CLASSIFY_MAX_TOKENS
+                )
+            else:
+                result = self.clova_api.chat_stream(
+                    self._single_messages(email_content),
+                    temperature=CLASSIFY_TEMPERATURE,
+                    max_tokens=CLASSIFY_MAX_TOKENS,
+                    on_text=on_text,
+                    stop_when=(lambda text: streamed['category'] is not None) if category_only else None
+                )
             
-            # 결과 파싱
-            category, explanation, details = self._parse_classification_result(result)
+            # 결과 파싱 (묶음 분류와 같은 기준으로 카테고리 정규화 및 검사)
+            (category, explanation, details), cacheable = self._parse_single_result(result)
+            if category_only:
+                # 카테고리만 받고 중단한 응답은 설명과 상세정보가 없음
+                category = streamed['category'] or 'unclear'
+                explanation, details, cacheable = '', {}, False
+            if streamed['category'] is None and on_category is not None:
+                on_category(category)
+            
+            # 형식이 맞는 전체 응답만 캐시 (오류는 다음에 다시 시도, 카테고리만 받은 응답은 저장하지 않음)
+            if cache_key is not None and cacheable:
+                self.cache.put(cache_key, (category, explanation, details))
             
             return category, explanation, details
         
+        except ClovaAPIError as e:
+            if e.retryable:
+                # 일시적 오류는 'unclear'로 기록하지 않고 호출한 쪽에서 나중에 다시 분류
+                raise
+            print(f"분류 오류: {str(e)}")
+            return 'unclear', f'오류 발생: {str(e)}', {}
+        
         except Exception as e:
             print(f"분류 오류: {str(e)}")
             return 'unclear', f'오류 발생: {str(e)}', {}
@@ -189,6 +815,36 @@ DETAILS:
 - 특이사항: [기타 주목할 내용]
 """
     
+    def _get_batch_instructions(self) -> str:
+        """여러 이메일을 한 요청으로 분류할 때 시스템 프롬프트 뒤에 붙이는 응답 형식 안내"""
+        return """
+
+여러 이메일이 '<<<EMAIL 번호>>>'와 '<<<END EMAIL 번호>>>' 사이에 하나씩 주어지면,
+각 이메일마다 '<<<RESULT 번호>>>' 줄을 먼저 쓰고 그 아래에 위 형식(CATEGORY, EXPLANATION, DETAILS)으로 답하세요.
+번호는 이메일 구분자의 번호를 그대로 사용하고, 주어진 순서대로 모든 이메일에 빠짐없이 답하세요.
+"""
+    
+    def _validate_result(self, result: Tuple[str, str, Dict]) -> Optional[Tuple[str, str, Dict]]:
+        """카테고리를 정규화('[tier1]' → 'tier1')하고 형식이 맞는 결과만 반환 (목록에 없는 카테고리나 빈 설명이면 None)"""
+        category, explanation, details = result
+        category = category.strip('[]* ').lower()
+        if category in self.CATEGORIES and explanation:
+            return category, explanation, details
+        return None
+    
+    def _parse_single_result(self, result: str) -> Tuple[Tuple[str, str, Dict], bool]:
+        """
+        이메일 하나의 응답 파싱 → (결과, 캐시 가능 여부)
+        
+        형식이 맞지 않는 응답은 캐시하지 않는 'unclear' 결과로 바꿔 다음에 다시 분류되게 합니다.
+        """
+        parsed = self._parse_classification_result(result)
+        validated = self._validate_result(parsed)
+        if validated is not None:
+            return validated, True
+        print(f"분류 응답 형식 오류 (카테고리: {parsed[0]!r})")
+        return ('unclear', f"응답 형식을 해석하지 못했습니다 (카테고리: {parsed[0] or '없음'})", parsed[2]), False
+    
     def _parse_classification_result(self, result: str) -> Tuple[str, str, Dict]:
         """OpenAI 응답 파싱"""
         lines = result.strip().split('\n')
@@ -226,3 +882,101 @@ DETAILS:
         """카테고리 표시명 반환"""
         return self.CATEGORIES.get(category, '알 수 없음')
 
+
+class _ClassificationRun:
+    """classify_emails 한 번의 진행 상태
+    
+    어떤 이메일을 어떤 요청으로 묶을지와 응답을 어떻게 반영할지를 여기서 정하고,
+    요청을 보내는 방식(순서대로 / asyncio로 동시에)은 호출한 쪽이 정합니다.
+    """
+    
+    def __init__(self, classifier: SponsorshipClassifier, emails: List[Dict],
+                 on_progress: Optional[Callable[[int, int], None]] = None):
+        self.classifier = classifier
+        self.on_progress = on_progress
+        items = [classifier._item_content(item) for item in emails]
+        self.contents = [content for _, content in items]
+        self.keys = [classifier._cache_key(kind, item) for (kind, _), item in zip(items, emails)]
+        self.results: List[Optional[Tuple[str, str, Dict]]] = [None] * len(emails)
+        self.pending: List[int] = []
+        # 재시도 후에도 일시적 오류로 끝난 이메일 위치 (결과는 None으로 남김)
+        self.failed: List[int] = []
+        self.attempt = 0
+        
+        for index, key in enumerate(self.keys):
+            cached = classifier.cache.get(key) if key is not None else None
+            if cached is not None:
+                self.results[index] = cached
+            else:
+                self.pending.append(index)
+        self._report()
+    
+    def next_requests(self) -> List[Dict]:
+        """
+        다음 차례에 보낼 요청 목록 (모두 분류했으면 빈 리스트)
+        
+        처음 BATCH_MAX_ATTEMPTS 차례는 남은 이메일을 묶어 보내고(혼자 남은 이메일은 일반 요청),
+        그 뒤에는 한 통씩 보냅니다.
+        
+        Returns:
+            [{'indexes': 이메일 위치 리스트, 'messages': 요청 메시지, 'max_tokens': 최대 응답 토큰}]
+        """
+        if not self.pending:
+            return []
+        self.attempt += 1
+        if self.attempt > BATCH_MAX_ATTEMPTS:
+            groups = [[index] for index in self.pending]
+        else:
+            batches = self.classifier._pack_batches([self.contents[index] for index in self.pending])
+            groups = [[self.pending[position] for position in batch] for batch in batches]
+        self.pending = []
+        
+        requests_ = []
+        for indexes in groups:
+            if len(indexes) == 1:
+                messages = self.classifier._single_messages(self.contents[indexes[0]])
+                max_tokens = CLASSIFY_MAX_TOKENS
+            else:
+                messages = self.classifier._batch_messages([self.contents[index] for index in indexes])
+                max_tokens = BATCH_OUTPUT_TOKENS_PER_EMAIL * len(indexes)
+            requests_.append({'indexes': indexes, 'messages': messages, 'max_tokens': max_tokens})
+        return requests_
+    
+    def apply(self, request: Dict, response: Optional[str], error: Optional[Exception] = None):
+        """응답(또는 오류)을 결과에 반영 (묶음에서 결과를 받지 못한 이메일은 다음 차례로)"""
+        indexes = request['indexes']
+        if len(indexes) == 1:
+            index = indexes[0]
+            if getattr(error, 'retryable', False):
+                print(f"일시적 오류로 분류하지 못했습니다 (다음에 다시 시도): {str(error)}")
+                self.failed.append(index)
+            elif error is not None:
+                # 최종 오류는 같은 요청을 다시 보내도 실패하므로 'unclear'로 기록 (캐시하지 않음)
+                print(f"분류 오류: {str(error)}")
+                self.results[index] = ('unclear', f'오류 발생: {str(error)}', {})
+            else:
+                result, cacheable = self.classifier._parse_single_result(response)
+                if cacheable:
+                    self._set_result(index, result)
+                else:
+                    self.results[index] = result
+        else:
+            if error is not None:
+                print(f"묶음 분류 오류: {str(error)}")
+            parsed = {} if error is not None else self.classifier._parse_batch_result(response, len(indexes))
+            for number, index in enumerate(indexes, 1):
+                if number in parsed:
+                    self._set_result(index, parsed[number])
+                else:
+                    self.pending.append(index)
+        self._report()
+    
+    def _set_result(self, index: int, result: Tuple[str, str, Dict]):
+        self.results[index] = result
+        if self.keys[index] is not None:
+            self.classifier.cache.put(self.keys[index], result)
+    
+    def _report(self):
+        if self.on_progress is not None:
+            done = sum(1 for result in self.results if result is not None) + len(self.failed)
+            self.on_progress(done, len(self.results))
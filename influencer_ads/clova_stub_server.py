@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+# 스텁 서버가 돌려줄 분류 응답 (SponsorshipClassifier 시스템 프롬프트의 응답 형식)
+SAMPLE_CLASSIFICATION = """CATEGORY: tier2
+EXPLANATION: 영상 1개당 고정 금액 100만원을 지급하고, 조회수 10만회를 넘으면 1만회당 5만원을 추가로 지급한다고 명시되어 있습니다. 제품 판매에 따른 수수료는 언급되지 않았습니다.
+DETAILS:
+- 고정금액: 영상 1개당 100만원
+- 조회수보상: 있음 (10만회 초과 시 1만회당 5만원)
+- 판매수수료: 없음
+- 제품/서비스: 무선 이어폰 신제품
+- 특이사항: 업로드 후 2주간 고정 댓글 유지 요청
+"""
+
+
+class ClovaStubServer:
+    """벤치마크용 로컬 HyperCLOVA chat-completions(v3) 스텁 서버
+
+    실제 API처럼 첫 토큰까지 `latency`초가 걸리고 이후 `token_interval`초마다 토큰을 하나씩 생성합니다.
+    Accept: text/event-stream 요청에는 token 이벤트를 생성되는 대로 보내고(SSE) 마지막에 result 이벤트를,
+    그 밖의 요청에는 생성이 모두 끝난 뒤 JSON 응답을 한 번에 보냅니다.
+    클라이언트가 스트림 도중 연결을 끊으면 생성을 멈추고 cancelled_count를 늘립니다.
+    """
+
+    def __init__(self, latency: float = 0.5, token_interval: float = 0.02,
+                 response_text: str = SAMPLE_CLASSIFICATION, token_chars: int = 2):
+        """
+        Args:
+            latency: 요청을 받은 뒤 첫 토큰이 생성될 때까지의 시간 (초)
+            token_interval: 토큰 하나를 생성하는 시간 (초)
+            response_text: 응답 텍스트
+            token_chars: 토큰 하나의 글자 수 (한글은 대략 1~2글자가 토큰 하나)
+        """
+        self.latency = latency
+        self.token_interval = token_interval
+        self.tokens = self._split_tokens(response_text, token_chars)
+        self.request_count = 0
+        self.tokens_generated = 0
+        self.cancelled_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @staticmethod
+    def _split_tokens(text: str, token_chars: int) -> List[str]:
+        return [text[i:i + token_chars] for i in range(0, len(text), token_chars)]
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'ClovaStubServer':
+        """백그라운드 스레드에서 서버 시작"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """서버 종료"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.request_count = 0
+            self.tokens_generated = 0
+            self.cancelled_count = 0
+
+    def _count(self, tokens: int = 0, requests: int = 0, cancelled: int = 0):
+        with self._lock:
+            self.tokens_generated += tokens
+            self.request_count += requests
+            self.cancelled_count += cancelled
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                stub._count(requests=1)
+                if '/v3/chat-completions/' not in self.path:
+                    self._send_json(404, {'status': {'code': '40400', 'message': 'Not Found'}})
+                elif 'text/event-stream' in self.headers.get('Accept', ''):
+                    self._stream()
+                else:
+                    time.sleep(stub.latency + stub.token_interval * (len(stub.tokens) - 1))
+                    stub._count(tokens=len(stub.tokens))
+                    self._send_json(200, {
+                        'status': {'code': '20000', 'message': 'OK'},
+                        'result': {'message': {'role': 'assistant', 'content': ''.join(stub.tokens)}}
+                    })
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_event(self, event: str, data: dict):
+                """SSE 이벤트 하나를 chunked 전송 조각으로 바로 보냄"""
+                chunk = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode('ascii') + chunk + b'\r\n')
+                self.wfile.flush()
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                time.sleep(stub.latency)
+                sent = 0
+                try:
+                    for position, token in enumerate(stub.tokens):
+                        if position:
+                            time.sleep(stub.token_interval)
+                        self._write_event('token', {'message': {'role': 'assistant', 'content': token}})
+                        sent += 1
+                    self._write_event('result', {
+                        'message': {'role': 'assistant', 'content': ''.join(stub.tokens)},
+                        'finishReason': 'stop'
+                    })
+                    self.wfile.write(b'0\r\n\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 필요한 부분만 받고 연결을 끊음 → 생성 중단
+                    stub._count(cancelled=1)
+                    self.close_connection = True
+                finally:
+                    stub._count(tokens=sent)
+
+        return Handler
@@ -23,6 +23,8 @@ class EmailManager:
                 self.favorites = []
         else:
             self.favorites = []
+        # 찜 여부 확인용 ID 집합 (목록을 매번 훑지 않도록)
+        self.favorite_ids = {item['id'] for item in self.favorites}
         
         # 회신 템플릿 로드
         if os.path.exists(self.replies_file):
@@ -114,15 +116,19 @@ class EmailManager:
         }
         
         # 중복 확인
-        if not any(item['id'] == favorite_item['id'] for item in self.favorites):
+        if favorite_item['id'] not in self.favorite_ids:
             self.favorites.append(favorite_item)
+            self.favorite_ids.add(favorite_item['id'])
             self.save_data()
             return True
         return False
     
     def remove_from_favorites(self, email_id: str):
         """찜 목록에서 제거"""
+        if email_id not in self.favorite_ids:
+            return
         self.favorites = [item for item in self.favorites if item['id'] != email_id]
+        self.favorite_ids.discard(email_id)
         self.save_data()
     
     def get_favorites(self) -> List[Dict]:
@@ -131,7 +137,7 @@ class EmailManager:
     
     def is_favorite(self, email_id: str) -> bool:
         """찜 여부 확인"""
-        return any(item['id'] == email_id for item in self.favorites)
+        return email_id in self.favorite_ids
     
     def get_reply_template(self, classification: str) -> Dict:
         """분류에 따른 회신 템플릿 반환"""
@@ -1,55 +1,104 @@
 import os
-import pickle
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 import base64
-from typing import List, Dict
+from email.header import Header
+from email.mime.text import MIMEText
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+
+from google_api import build_service, get_credentials, get_service
+from gmail_query import (CATEGORY_LABELS, DEFAULT_EXCLUSIONS, DEFAULT_WINDOW_DAYS, PROCESSED_LABEL,
+                         SPONSORSHIP_KEYWORDS, STRONG_SPONSORSHIP_KEYWORDS, build_query, date_windows,
+                         window_query)
+from mime_parser import (MAX_BODY_BYTES, attachment_part, decode_part_data, extract_body, parse_message,
+                         strip_quoted_text)
+from quota_scheduler import GMAIL_QUOTA_UNITS as QUOTA_UNITS, QuotaScheduler, gmail_scheduler
 
 # Gmail API 스코프 설정
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.readonly',
-    'https://www.googleapis.com/auth/gmail.send'
+    'https://www.googleapis.com/auth/gmail.send',
+    'https://www.googleapis.com/auth/gmail.modify'  # 처리 상태 라벨 적용
 ]
 
+# Gmail 배치 요청 한 번에 담을 하위 요청 수 (최대 100개, 50개 이하 권장)
+BATCH_SIZE = 50
+# 배치 내에서 실패한 하위 요청의 최대 재시도 횟수
+BATCH_MAX_RETRIES = 3
+# 재시도할 가치가 있는 HTTP 상태 코드 (속도 제한 및 일시적 서버 오류)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# 403 응답 중 속도 제한을 뜻하는 reason 값
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# OAuth 토큰 저장 파일
+TOKEN_FILE = 'token.pickle'
+
+# 증분 동기화 체크포인트(historyId) 저장 파일
+SYNC_STATE_FILE = 'sync_state.json'
+
+# batchModify 한 번에 보낼 수 있는 최대 메시지 수
+BATCH_MODIFY_SIZE = 1000
+
+# 대화 요약 문서에서 메시지 하나당, 문서 전체의 최대 글자 수
+THREAD_MESSAGE_CHARS = 2000
+THREAD_DOCUMENT_CHARS = 8000
+
+# 회신 작성에 필요한 원본 메시지 헤더 (캐시된 정보가 없을 때 metadata로 조회)
+REPLY_HEADERS = ['Subject', 'From', 'Message-ID', 'References']
+
+# 회신 일괄 전송 시 배치 요청 하나에 담을 메시지 수 (전송은 무거운 요청이라 작게 유지)
+SEND_BATCH_SIZE = 10
+
+# 2단계 조회 시 1단계(metadata)에서 받을 헤더
+METADATA_HEADERS = ['Subject', 'From', 'Date', 'List-Unsubscribe', 'Precedence', 'Return-Path']
+
 
 class GmailClient:
     """Gmail API를 사용하여 이메일을 가져오는 클라이언트"""
     
-    def __init__(self):
-        self.service = None
-        self.authenticate()
+    def __init__(self, service=None, relevance_filter: Optional[Callable[[Dict], bool]] = None,
+                 max_body_bytes: Optional[int] = MAX_BODY_BYTES, exclude_processed: bool = False,
+                 scheduler: Optional[QuotaScheduler] = None, max_workers: int = 1,
+                 service_factory: Optional[Callable[[], object]] = None):
+        """
+        Args:
+            service: 이미 생성된 Gmail API 서비스 객체 (없으면 OAuth 인증 후 생성)
+            relevance_filter: 지정하면 2단계 조회 사용. metadata로 파싱한 이메일을 받아
+                본문까지 다운로드할지 결정하는 함수 (예: GmailClient.is_sponsorship_candidate)
+            max_body_bytes: 본문으로 디코딩할 최대 바이트 수 (None이면 제한 없음)
+            exclude_processed: True이면 검색 시 처리 완료 라벨(PROCESSED_LABEL)이 붙은 메일 제외
+            scheduler: 요청 속도를 조절할 할당량 스케줄러 (기본: 프로세스 공용 gmail_scheduler)
+            max_workers: 2 이상이면 messages.get/threads.get을 배치 요청 대신 스레드 풀에서 동시에 실행
+                (본문이 매우 큰 메일이나 첨부파일처럼 배치 응답 하나에 담기 버거운 경우)
+            service_factory: 작업 스레드별 서비스 객체를 만드는 함수
+                (없으면 인증 정보로 스레드마다 새 AuthorizedHttp를 가진 서비스 생성)
+        """
+        self.service = service
+        self.relevance_filter = relevance_filter
+        self.max_body_bytes = max_body_bytes
+        self.exclude_processed = exclude_processed
+        self.scheduler = scheduler or gmail_scheduler
+        self.max_workers = max(1, max_workers)
+        self.service_factory = service_factory
+        self.credentials = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread_local = threading.local()
+        self._label_ids: Dict[str, str] = {}
+        self.reset_fetch_stats()
+        if self.service is None:
+            self.authenticate()
     
     def authenticate(self):
-        """Gmail API 인증 처리"""
-        creds = None
-        
-        # token.pickle 파일이 있으면 기존 인증 정보 로드
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
-        
-        # 유효한 인증 정보가 없으면 새로 로그인
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                if not os.path.exists('credentials.json'):
-                    raise FileNotFoundError(
-                        "credentials.json 파일이 없습니다. "
-                        "Google Cloud Console에서 OAuth 2.0 클라이언트 ID를 생성하고 "
-                        "credentials.json 파일을 다운로드하세요."
-                    )
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-            
-            # 인증 정보 저장
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
-        
-        self.service = build('gmail', 'v1', credentials=creds)
+        """Gmail API 인증 처리 (인증 정보와 서비스 객체는 프로세스 전체에서 한 번만 생성)"""
+        self.credentials = get_credentials(TOKEN_FILE, SCOPES)
+        self.service = get_service('gmail', 'v1', TOKEN_FILE, SCOPES)
     
     def get_emails(self, query: str = '', max_results: int = 10) -> List[Dict]:
         """
@@ -63,183 +112,1113 @@ class GmailClient:
             이메일 정보 리스트
         """
         try:
-            # 이메일 ID 목록 가져오기
-            results = self.service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=max_results
-            ).execute()
-            
-            messages = results.get('messages', [])
-            
-            if not messages:
-                return []
+            return self._fetch_emails(query, max_results)
+        except Exception as e:
+            self._report_error(e)
+            return []
+    
+    def _fetch_emails(self, query: str, max_results: int) -> List[Dict]:
+        """검색 쿼리에 맞는 이메일 조회 (오류는 호출한 쪽으로 전달)"""
+        return list(self.iter_emails(query, limit=max_results))
+    
+    def iter_emails(self, query: str = '', limit: Optional[int] = None,
+                    page_size: int = BATCH_SIZE) -> Iterator[Dict]:
+        """
+        검색 결과를 페이지 단위로 따라가며 이메일을 하나씩 반환하는 제너레이터
+        
+        nextPageToken을 따라 다음 페이지를 조회하므로 결과 개수 제한이 없습니다.
+        한 페이지를 돌려주는 동안 다음 페이지(목록과 본문)를 백그라운드 스레드에서 미리 가져오므로
+        이메일을 받는 대로 처리하는 호출자는 페이지 사이에서 기다리지 않습니다 (get_emails처럼 결과를
+        모두 모으는 경우에는 차이가 없음). 스레드별 서비스를 만들 수 없으면(인증 정보나 service_factory가
+        없으면) 앞 페이지를 모두 소비한 뒤에 다음 페이지를 요청합니다.
+        중간에 반복을 멈추면 진행 중인 미리 가져오기는 본문 조회(messages.get) 전에 중단됩니다.
+        
+        Args:
+            query: Gmail 검색 쿼리
+            limit: 가져올 최대 이메일 개수 (None이면 전체)
+            page_size: 페이지당 메시지 수 (list() 최대 500)
+        
+        Yields:
+            이메일 정보 (get_emails와 같은 형식)
+        """
+        executor = None
+        if self.service_factory is not None or self.credentials is not None:
+            self._refresh_credentials()
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gmail-prefetch')
+        
+        page_token = None
+        remaining = limit
+        prefetched = None
+        cancelled = threading.Event()
+        
+        try:
+            while remaining is None or remaining > 0:
+                if prefetched is not None:
+                    emails, page_token, fetched = prefetched.result()
+                else:
+                    emails, page_token, fetched = self._fetch_email_page(query, page_token, page_size, remaining)
+                if not fetched:
+                    return
+                
+                if remaining is not None:
+                    remaining -= fetched
+                
+                # 이 페이지를 돌려주는 동안 다음 페이지를 미리 요청 (한 페이지만 앞서감)
+                prefetched = None
+                if executor is not None and page_token and (remaining is None or remaining > 0):
+                    prefetched = executor.submit(self._prefetch_email_page, query, page_token, page_size, remaining,
+                                                 cancelled)
+                
+                yield from emails
+                
+                if not page_token:
+                    return
+        finally:
+            if executor is not None:
+                # 호출한 쪽이 더 읽지 않으므로 진행 중인 미리 가져오기가 본문을 받지 않도록 알림
+                cancelled.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fetch_email_page(self, query: str, page_token: Optional[str], page_size: int,
+                          remaining: Optional[int],
+                          cancelled: Optional[threading.Event] = None) -> Tuple[List[Dict], Optional[str], int]:
+        """
+        검색 결과 한 페이지의 이메일 조회 → (이메일 목록, 다음 페이지 토큰, 목록의 메시지 수)
+        
+        cancelled가 목록 조회 뒤에 설정되어 있으면 본문을 받지 않고 빈 페이지를 반환합니다.
+        """
+        message_ids, page_token, _ = self.list_message_page(
+            query,
+            page_token,
+            page_size if remaining is None else min(page_size, remaining)
+        )
+        if cancelled is not None and cancelled.is_set():
+            return [], None, 0
+        return self.get_emails_by_ids(message_ids), page_token, len(message_ids)
+    
+    def _prefetch_email_page(self, query: str, page_token: Optional[str], page_size: int,
+                             remaining: Optional[int],
+                             cancelled: threading.Event) -> Tuple[List[Dict], Optional[str], int]:
+        """미리 가져오기 스레드에서 _fetch_email_page 실행 (호출한 쪽과 서비스 객체를 같이 쓰지 않도록 전용 서비스 사용)"""
+        self._thread_local.prefetching = True
+        return self._fetch_email_page(query, page_token, page_size, remaining, cancelled)
+    
+    def list_message_page(self, query: str = '', page_token: Optional[str] = None,
+                          page_size: int = 500) -> Tuple[List[str], Optional[str], int]:
+        """
+        검색 결과 한 페이지의 메시지 ID 목록 조회
+        
+        Args:
+            query: Gmail 검색 쿼리
+            page_token: 이전 페이지 응답의 nextPageToken (None이면 첫 페이지)
+            page_size: 페이지당 메시지 수 (list() 최대 500)
+        
+        Returns:
+            (메시지 ID 리스트, 다음 페이지 토큰 또는 None, 전체 결과 수 추정치)
+        """
+        results = self._execute(self._active_service().users().messages().list(
+            userId='me',
+            q=self._search_query(query),
+            maxResults=max(1, min(page_size, 500)),
+            pageToken=page_token
+        ), 'messages.list')
+        
+        message_ids = [message['id'] for message in results.get('messages', [])]
+        return message_ids, results.get('nextPageToken'), results.get('resultSizeEstimate', 0)
+    
+    def get_emails_by_ids(self, message_ids: List[str]) -> List[Dict]:
+        """
+        메시지 ID 목록의 이메일 정보 조회 (relevance_filter가 있으면 후보만 반환)
+        
+        Returns:
+            이메일 정보 리스트 (message_ids 순서, 조회/파싱에 실패한 메시지는 제외)
+        """
+        emails = []
+        for msg in self._get_full_messages(message_ids):
+            try:
+                emails.append(self._parse_email(msg))
+            except Exception as e:
+                # 형식이 깨진 이메일 하나 때문에 전체 결과를 잃지 않도록 건너뜀
+                print(f"이메일 파싱 오류 ({msg.get('id')}): {e}")
+        return emails
+    
+    def backfill_emails(self, query: str, start: datetime, end: Optional[datetime] = None,
+                        window_days: int = DEFAULT_WINDOW_DAYS, max_results: Optional[int] = None,
+                        max_workers: int = 8) -> List[Dict]:
+        """
+        긴 기간의 메일을 기간 구간별로 나눠 가져오기 (백필)
+        
+        기간을 window_days일 단위 after:/before: 구간으로 나눠 구간마다 list()를 동시에 실행하고,
+        최신순으로 합치면서 중복을 제거한 뒤 본문을 가져옵니다.
+        
+        Args:
+            query: Gmail 검색 쿼리
+            start: 검색 시작 시각
+            end: 검색 종료 시각 (기본: 현재)
+            window_days: 구간 하나의 길이 (일)
+            max_results: 가져올 최대 이메일 개수 (None이면 기간 내 전체)
+            max_workers: 동시에 조회할 구간 수
+        
+        Returns:
+            이메일 정보 리스트 (최신순)
+        """
+        try:
+            message_ids = self.list_message_ids_windowed(
+                query, start, end or datetime.now(), window_days, max_workers
+            )
+            if max_results is not None:
+                message_ids = message_ids[:max_results]
             
-            # 각 이메일의 상세 정보 가져오기
-            emails = []
-            for message in messages:
-                msg = self.service.users().messages().get(
+            return self.get_emails_by_ids(message_ids)
+        
+        except Exception as e:
+            self._report_error(e)
+            return []
+    
+    def list_message_ids_windowed(self, query: str, start: datetime, end: datetime,
+                                  window_days: int = DEFAULT_WINDOW_DAYS, max_workers: int = 8) -> List[str]:
+        """
+        기간 구간별 list() 결과를 합친 메시지 ID 목록 (최신순, 중복 제거)
+        
+        스레드별 서비스를 만들 수 있으면(인증 정보나 service_factory가 있으면) 구간들을 동시에 조회하고,
+        아니면 구간을 차례로 조회합니다.
+        """
+        windows = date_windows(start, end, window_days)
+        can_parallelize = self.service_factory is not None or self.credentials is not None
+        
+        if max_workers > 1 and len(windows) > 1 and can_parallelize:
+            self._refresh_credentials()
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(windows)),
+                                    thread_name_prefix='gmail-list') as executor:
+                listings = list(executor.map(
+                    lambda window: self._list_window(self._thread_service(), query, window),
+                    windows
+                ))
+        else:
+            listings = [self._list_window(self.service, query, window) for window in windows]
+        
+        self._count_quota('messages.list', sum(pages for _, pages in listings))
+        return list(dict.fromkeys(
+            message_id for message_ids, _ in listings for message_id in message_ids
+        ))
+    
+    def _list_window(self, service, query: str, window: Tuple[int, int]) -> Tuple[List[str], int]:
+        """한 기간 구간의 모든 페이지를 조회해 (메시지 ID 목록, 요청한 페이지 수) 반환"""
+        after, before = window
+        message_ids = []
+        pages = 0
+        page_token = None
+        
+        while True:
+            self.scheduler.acquire('messages.list')
+            try:
+                results = service.users().messages().list(
                     userId='me',
-                    id=message['id'],
-                    format='full'
+                    q=self._search_query(window_query(query, after, before)),
+                    maxResults=500,
+                    pageToken=page_token
                 ).execute()
-                
-                email_data = self._parse_email(msg)
-                emails.append(email_data)
+            except HttpError as e:
+                if self._is_rate_limited(e):
+                    self.scheduler.penalize()
+                raise
+            pages += 1
+            message_ids.extend(message['id'] for message in results.get('messages', []))
             
-            return emails
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return message_ids, pages
+    
+    def _execute(self, request, method: str) -> Dict:
+        """
+        할당량 스케줄러로 속도를 조절하며 단일 API 요청 실행
+        
+        Args:
+            request: googleapiclient 요청 객체
+            method: 할당량 계산용 메서드 이름 (예: 'messages.list')
         
+        Returns:
+            API 응답
+        """
+        self.scheduler.acquire(method)
+        try:
+            response = request.execute()
+        except HttpError as e:
+            if self._is_rate_limited(e):
+                self.scheduler.penalize()
+            raise
+        self._count_quota(method)
+        return response
+    
+    @staticmethod
+    def _error_reason(e: HttpError) -> str:
+        """HttpError 응답 본문의 첫 번째 reason 값 (없으면 빈 문자열)"""
+        try:
+            error = json.loads(e.content).get('error', {})
+            return error.get('errors', [{}])[0].get('reason', '')
+        except (ValueError, TypeError, AttributeError, IndexError):
+            return ''
+    
+    @classmethod
+    def _is_rate_limited(cls, e: Exception) -> bool:
+        """속도 제한(429, 403 rateLimitExceeded) 오류인지 확인"""
+        if not isinstance(e, HttpError):
+            return False
+        status = e.resp.status
+        return status == 429 or (status == 403 and cls._error_reason(e) in RATE_LIMIT_REASONS)
+    
+    def _report_error(self, e: Exception):
+        """Gmail API 오류 원인 안내 출력"""
+        error_msg = str(e)
+        print(f"이메일 가져오기 오류: {error_msg}")
+        
+        # 구체적인 오류 메시지 제공
+        if self._is_rate_limited(e):
+            print("Gmail API 요청 속도 제한에 걸렸습니다. 잠시 후 다시 시도하세요.")
+        elif isinstance(e, HttpError) and self._error_reason(e) in ('quotaExceeded', 'dailyLimitExceeded'):
+            print("Gmail API 일일 할당량을 초과했습니다.")
+        elif "403" in error_msg or "Forbidden" in error_msg:
+            print("Gmail API 권한이 없습니다. OAuth 동의 화면 설정을 확인하세요.")
+        elif "401" in error_msg or "Unauthorized" in error_msg:
+            print("Gmail API 인증이 실패했습니다. 토큰을 재설정하세요.")
+        elif "quota" in error_msg.lower():
+            print("Gmail API 일일 할당량을 초과했습니다.")
+        elif "not found" in error_msg.lower():
+            print("Gmail API가 활성화되지 않았습니다.")
+    
+    def sync_emails(self, query: str = '', max_results: int = 20, reset: bool = False) -> List[Dict]:
+        """
+        마지막 동기화 이후 새로 도착한 이메일만 가져오기 (증분 동기화)
+        
+        쿼리별로 마지막 historyId를 sync_state.json에 저장해두고,
+        다음 호출 때는 users.history.list로 그 이후 추가된 메시지만 조회합니다.
+        historyId가 만료된 경우에는 마지막 동기화 시각 이후(after:)로 검색합니다.
+        
+        Args:
+            query: Gmail 검색 쿼리
+            max_results: 한 번에 가져올 최대 이메일 개수
+                (초과분의 메시지 ID는 체크포인트에 남겨 다음 동기화 때 먼저 가져옴)
+            reset: True이면 저장된 체크포인트를 무시하고 전체 검색
+        
+        Returns:
+            새 이메일 정보 리스트 (최신순)
+        """
+        state = self._load_sync_state()
+        checkpoint = None if reset else state.get(query)
+        
+        try:
+            if checkpoint is None:
+                # 목록 조회 전에 historyId를 기록해야 그 사이 도착한 메일을 놓치지 않음
+                history_id = self._get_current_history_id()
+                emails = self._fetch_emails(query, max_results)
+                pending_ids = []
+            else:
+                history_id, emails, pending_ids = self._fetch_emails_since(query, checkpoint, max_results)
         except Exception as e:
-            error_msg = str(e)
-            print(f"이메일 가져오기 오류: {error_msg}")
-            
-            # 구체적인 오류 메시지 제공
-            if "403" in error_msg or "Forbidden" in error_msg:
-                print("Gmail API 권한이 없습니다. OAuth 동의 화면 설정을 확인하세요.")
-            elif "401" in error_msg or "Unauthorized" in error_msg:
-                print("Gmail API 인증이 실패했습니다. 토큰을 재설정하세요.")
-            elif "quota" in error_msg.lower():
-                print("Gmail API 일일 할당량을 초과했습니다.")
-            elif "not found" in error_msg.lower():
-                print("Gmail API가 활성화되지 않았습니다.")
-            
+            self._report_error(e)
             return []
+        
+        state[query] = {
+            'history_id': history_id,
+            'synced_at': int(time.time())
+        }
+        if pending_ids:
+            # 이번에 가져오지 못한 새 메일 (다음 동기화 때 먼저 가져옴)
+            state[query]['pending_ids'] = pending_ids
+        self._save_sync_state(state)
+        
+        return emails
     
-    def _parse_email(self, msg: Dict) -> Dict:
-        """이메일 메시지 파싱"""
-        headers = msg['payload']['headers']
+    def _fetch_emails_since(self, query: str, checkpoint: Dict, max_results: int):
+        """체크포인트 이후 추가된 이메일 조회 → (새 historyId, 이메일 리스트, 다음에 가져올 메시지 ID)"""
+        # 지난 동기화에서 max_results를 넘어 가져오지 못한 메일
+        pending_ids = checkpoint.get('pending_ids', [])
+        added_ids = []
+        page_token = None
         
-        # 헤더에서 정보 추출
-        subject = ''
-        sender = ''
-        date = ''
+        try:
+            while True:
+                response = self._execute(self.service.users().history().list(
+                    userId='me',
+                    startHistoryId=checkpoint['history_id'],
+                    historyTypes=['messageAdded'],
+                    pageToken=page_token
+                ), 'history.list')
+                
+                for record in response.get('history', []):
+                    for added in record.get('messagesAdded', []):
+                        message = added['message']
+                        # 작성 중인 임시보관 메일은 수정할 때마다 새로 추가되므로 제외
+                        if 'DRAFT' not in message.get('labelIds', []):
+                            added_ids.append(message['id'])
+                
+                history_id = response['historyId']
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
         
-        for header in headers:
-            if header['name'] == 'Subject':
-                subject = header['value']
-            elif header['name'] == 'From':
-                sender = header['value']
-            elif header['name'] == 'Date':
-                date = header['value']
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            # historyId 만료 (약 1주일 보관) → 마지막 동기화 시각 이후 메일을 날짜로 검색
+            print("동기화 기록이 만료되어 날짜 기준으로 다시 검색합니다.")
+            history_id = self._get_current_history_id()
+            since_ids = self._list_all_message_ids(self._after_query(query, checkpoint['synced_at']))
+            return (history_id, *self._take_emails(since_ids + pending_ids, max_results))
         
-        # 이메일 본문 추출
-        body = self._get_email_body(msg['payload'])
+        # history는 오래된 순서이므로 list()와 같이 최신순으로 뒤집고 중복 제거
+        added_ids = list(dict.fromkeys(reversed(added_ids)))
         
-        return {
-            'id': msg['id'],
-            'subject': subject,
-            'sender': sender,
-            'date': date,
-            'body': body,
-            'snippet': msg.get('snippet', '')
+        # 검색 쿼리가 있으면 같은 기간의 검색 결과와 교집합만 남김
+        if query and added_ids:
+            matched = set(self._list_all_message_ids(self._after_query(query, checkpoint['synced_at'])))
+            added_ids = [message_id for message_id in added_ids if message_id in matched]
+        
+        return (history_id, *self._take_emails(added_ids + pending_ids, max_results))
+    
+    def _list_all_message_ids(self, query: str) -> List[str]:
+        """검색 결과의 모든 페이지를 따라가며 메시지 ID 목록 조회 (최신순)"""
+        message_ids = []
+        page_token = None
+        while True:
+            page_ids, page_token, _ = self.list_message_page(query, page_token)
+            message_ids.extend(page_ids)
+            if not page_token:
+                return message_ids
+    
+    def _take_emails(self, message_ids: List[str], max_results: int) -> Tuple[List[Dict], List[str]]:
+        """
+        앞에서부터 max_results개의 이메일을 가져오고 나머지 ID는 반환 → (이메일 리스트, 남은 ID)
+        
+        조회에 실패해 빠진 메일(재시도 후에도 5xx/429 등)도 남은 ID에 넣어 다음 동기화 때 다시 가져옵니다.
+        relevance_filter로 빠진 메일과는 fetch_stats['skipped'] 증가량으로 구분합니다.
+        """
+        message_ids = list(dict.fromkeys(message_ids))
+        requested, rest = message_ids[:max_results], message_ids[max_results:]
+        
+        skipped_before = self.fetch_stats['skipped']
+        emails = self.get_emails_by_ids(requested)
+        filtered = self.fetch_stats['skipped'] - skipped_before
+        
+        returned = {email['id'] for email in emails}
+        missing = [message_id for message_id in requested if message_id not in returned]
+        if len(missing) > filtered:
+            # 어떤 메일이 후보가 아니어서 빠졌는지 알 수 없으므로 빠진 메일을 모두 다시 조회
+            # (후보가 아닌 메일은 다음에 모두 조회되면 다시 걸러져 빠짐)
+            print(f"가져오지 못한 메일 {len(missing) - filtered}개는 다음 동기화 때 다시 가져옵니다.")
+            rest = missing + rest
+        return emails, rest
+    
+    def _get_current_history_id(self) -> str:
+        """메일함의 현재 historyId 조회"""
+        profile = self._execute(self.service.users().getProfile(userId='me'), 'getProfile')
+        return profile['historyId']
+    
+    def _search_query(self, query: str) -> str:
+        """설정에 따라 처리 완료 라벨 제외 조건을 붙인 검색 쿼리"""
+        if not self.exclude_processed:
+            return query
+        exclusion = f'-label:{self._label_search_name(PROCESSED_LABEL)}'
+        return f'({query}) {exclusion}' if query else exclusion
+    
+    @staticmethod
+    def _label_search_name(label_name: str) -> str:
+        """검색 쿼리용 라벨 이름 ('CREA/Processed' → 'crea-processed')"""
+        return label_name.lower().replace('/', '-').replace(' ', '-')
+    
+    @staticmethod
+    def _after_query(query: str, timestamp: int) -> str:
+        """검색 쿼리에 날짜 하한(after:) 조건 추가"""
+        # 시계 오차를 고려해 1분 여유를 둠
+        after = f'after:{int(timestamp) - 60}'
+        return f'({query}) {after}' if query else after
+    
+    def _load_sync_state(self) -> Dict:
+        """저장된 동기화 체크포인트 로드"""
+        if os.path.exists(SYNC_STATE_FILE):
+            try:
+                with open(SYNC_STATE_FILE, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        return {}
+    
+    def _save_sync_state(self, state: Dict):
+        """동기화 체크포인트 저장"""
+        try:
+            with open(SYNC_STATE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"동기화 상태 저장 오류: {e}")
+    
+    def _get_full_messages(self, message_ids: List[str]) -> List[Dict]:
+        """
+        본문까지 포함한 메시지 조회
+        
+        relevance_filter가 있으면 먼저 format='metadata'로 헤더와 snippet만 받아
+        후보로 판정된 메시지만 format='full'로 다시 가져옵니다 (2단계 조회).
+        """
+        if self.relevance_filter is None:
+            messages = self._get_messages(message_ids, format='full')
+            self._record_fetch('full', messages)
+            return messages
+        
+        # 1단계: 헤더와 snippet만 조회
+        metadata = self._get_messages(
+            message_ids,
+            format='metadata',
+            metadata_headers=METADATA_HEADERS
+        )
+        self._record_fetch('metadata', metadata)
+        
+        candidate_ids = []
+        for msg in metadata:
+            if self.relevance_filter(self._parse_email(msg)):
+                candidate_ids.append(msg['id'])
+            else:
+                self.fetch_stats['skipped'] += 1
+                self.fetch_stats['bytes_skipped'] += self._full_response_size(msg)
+        
+        # 2단계: 후보만 본문까지 조회
+        messages = self._get_messages(candidate_ids, format='full')
+        self._record_fetch('full', messages)
+        return messages
+    
+    def reset_fetch_stats(self):
+        """조회 통계 초기화"""
+        self.fetch_stats = {
+            'metadata_fetched': 0,    # metadata 형식으로 받은 메시지 수
+            'full_fetched': 0,        # full 형식으로 받은 메시지 수
+            'skipped': 0,             # 후보가 아니어서 본문을 받지 않은 메시지 수
+            'bytes_transferred': 0,   # 받은 full 응답 예상 크기 (metadata 응답은 헤더뿐이라 제외)
+            'bytes_skipped': 0,       # 건너뛴 메시지의 full 응답 예상 크기
+            'quota_units': 0,         # 사용한 할당량 단위
+            'quota_units_single_phase': 0,  # 모든 메시지를 full로 받았을 때의 할당량 단위
+            'replied_threads_skipped': 0  # 이미 회신해서 건너뛴 대화 수
         }
     
-    def _get_email_body(self, payload: Dict) -> str:
-        """이메일 본문 추출"""
-        body = ''
-        
-        if 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain':
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(
-                            part['body']['data']
-                        ).decode('utf-8')
-                        break
-                elif part['mimeType'] == 'text/html' and not body:
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(
-                            part['body']['data']
-                        ).decode('utf-8')
-        else:
-            if 'body' in payload and 'data' in payload['body']:
-                body = base64.urlsafe_b64decode(
-                    payload['body']['data']
-                ).decode('utf-8')
+    def _count_quota(self, method: str, count: int = 1):
+        """할당량 사용량 기록 (1단계/2단계 공통 호출)"""
+        units = QUOTA_UNITS[method] * count
+        self.fetch_stats['quota_units'] += units
+        self.fetch_stats['quota_units_single_phase'] += units
+    
+    def _record_fetch(self, format: str, messages: List[Dict]):
+        """messages.get 결과의 전송량과 할당량 기록"""
+        units = QUOTA_UNITS['messages.get'] * len(messages)
+        self.fetch_stats['quota_units'] += units
+        if format == 'metadata' or self.relevance_filter is None:
+            self.fetch_stats['quota_units_single_phase'] += units
         
-        return body
+        self.fetch_stats[f'{format}_fetched'] += len(messages)
+        if format == 'full':
+            self.fetch_stats['bytes_transferred'] += sum(self._full_response_size(msg) for msg in messages)
+    
+    @staticmethod
+    def _full_response_size(msg: Dict) -> int:
+        """
+        full 형식 응답의 예상 크기
+        
+        응답을 다시 직렬화하지 않고 서버가 알려준 sizeEstimate(원문 크기)를 씁니다.
+        full 형식 응답은 원문을 base64로 담으므로 약 4/3배입니다.
+        """
+        return msg.get('sizeEstimate', 0) * 4 // 3
     
-    def search_sponsorship_emails(self, max_results: int = 20) -> List[Dict]:
-        """협찬 관련 이메일 검색"""
-        # 협찬 관련 키워드로 검색 (포괄적인 키워드 사용)
-        keywords = [
-            '협찬',
-            '광고',
-            '홍보',
-            '제휴',
-            '파트너십',
-            'sponsorship',
-            'sponsored',
-            'partnership',
-            'collaboration',
-            'influencer',
-            '인플루언서',
-            '마케팅',
-            '브랜드',
-            '수익',
-            '광고비',
-            '협찬료'
-        ]
-        # 따옴표 없이 사용하여 부분 매칭 허용
-        query = ' OR '.join(keywords)
+    @staticmethod
+    def is_sponsorship_candidate(email_data: Dict) -> bool:
+        """
+        헤더와 snippet만으로 협찬 이메일 후보인지 판정 (API 호출 없음)
         
-        return self.get_emails(query=query, max_results=max_results)
+        제목/snippet/발신자에 협찬 키워드가 없거나,
+        뉴스레터(List-Unsubscribe)인데 강한 협찬 키워드가 없으면 후보에서 제외합니다.
+        """
+        text = ' '.join([
+            email_data.get('subject', ''),
+            email_data.get('snippet', ''),
+            email_data.get('sender', '')
+        ]).lower()
         
-    def send_reply(self, original_message_id: str, reply_subject: str, reply_body: str, recipient_email: str) -> Dict:
-        """이메일 회신 전송"""
-        try:
-            # 원본 메시지 가져오기
-            original_message = self.service.users().messages().get(
-                userId='me',
-                id=original_message_id,
-                format='full'
-            ).execute()
+        if not any(keyword in text for keyword in SPONSORSHIP_KEYWORDS):
+            return False
+        
+        if email_data.get('list_unsubscribe'):
+            return any(keyword in text for keyword in STRONG_SPONSORSHIP_KEYWORDS)
+        
+        return True
+    
+    def _get_messages(self, message_ids: List[str], format: str = 'full',
+                      metadata_headers: Optional[List[str]] = None) -> List[Dict]:
+        """messages.get 일괄 조회 (스레드 풀을 쓸 수 있으면 동시 실행, 아니면 배치 요청)"""
+        if self._use_thread_pool():
+            return self._parallel_get_messages(message_ids, format, metadata_headers)
+        return self._batch_get_messages(message_ids, format, metadata_headers)
+    
+    @staticmethod
+    def _message_request(format: str, metadata_headers: Optional[List[str]] = None) -> Callable:
+        """(서비스, 메시지 ID)를 받아 messages.get 요청을 만드는 함수 반환"""
+        return lambda service, message_id: service.users().messages().get(
+            userId='me',
+            id=message_id,
+            format=format,
+            metadataHeaders=metadata_headers
+        )
+    
+    def _batch_get_messages(self, message_ids: List[str], format: str = 'full',
+                            metadata_headers: Optional[List[str]] = None) -> List[Dict]:
+        """
+        messages.get 요청을 Gmail 배치 HTTP 요청으로 묶어서 실행
+        
+        Args:
+            message_ids: 가져올 메시지 ID 목록
+            format: 메시지 형식 ('full', 'metadata', 'minimal', 'raw')
+            metadata_headers: format='metadata'일 때 받을 헤더 목록
+        
+        Returns:
+            메시지 리소스 리스트 (message_ids 순서, 끝내 실패한 메시지는 제외)
+        """
+        make_request = self._message_request(format, metadata_headers)
+        return self._batch_execute(
+            message_ids,
+            lambda message_id: make_request(self._active_service(), message_id),
+            method='messages.get'
+        )
+    
+    def _parallel_get_messages(self, message_ids: List[str], format: str = 'full',
+                               metadata_headers: Optional[List[str]] = None) -> List[Dict]:
+        """messages.get 요청을 스레드 풀에서 동시에 실행 (인자와 반환값은 _batch_get_messages와 동일)"""
+        return self._parallel_execute(
+            message_ids,
+            self._message_request(format, metadata_headers),
+            method='messages.get'
+        )
+    
+    def _batch_execute(self, resource_ids: List[str], make_request: Callable,
+                       method: str = 'messages.get') -> List[Dict]:
+        """
+        리소스 ID별 요청을 Gmail 배치 HTTP 요청으로 묶어서 실행
+        
+        실패한 하위 요청만 지수 백오프로 재시도하며,
+        결과는 resource_ids(list() 결과)와 같은 순서로 반환합니다.
+        배치 하나를 보내기 전에 하위 요청 수만큼의 할당량 단위를 스케줄러에서 확보합니다.
+        
+        Args:
+            resource_ids: 조회할 리소스(메시지, 스레드) ID 목록
+            make_request: ID를 받아 API 요청 객체를 만드는 함수
+            method: 하위 요청의 메서드 이름 (할당량 계산용)
+        
+        Returns:
+            리소스 리스트 (끝내 실패한 리소스는 제외)
+        """
+        results = self._batch_execute_by_id(resource_ids, make_request, method)
+        return [results[resource_id] for resource_id in resource_ids if resource_id in results]
+    
+    def _batch_execute_by_id(self, request_ids: List[str], make_request: Callable,
+                             method: str = 'messages.get', batch_size: int = BATCH_SIZE,
+                             retryable_status: set = RETRYABLE_STATUS,
+                             results: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        _batch_execute와 같지만 {요청 ID: 응답} 딕셔너리로 반환
+        
+        Args:
+            request_ids: 하위 요청 ID 목록
+            make_request: ID를 받아 API 요청 객체를 만드는 함수
+            method: 하위 요청의 메서드 이름 (할당량 계산용)
+            batch_size: 배치 요청 하나에 담을 하위 요청 수
+            retryable_status: 재시도할 HTTP 상태 코드 (전송처럼 중복 실행되면 안 되는 요청은 429만)
+            results: 응답을 받는 대로 채울 딕셔너리 (도중에 예외가 나도 그때까지의 응답을 알 수 있음)
+        """
+        results = {} if results is None else results
+        pending = list(dict.fromkeys(request_ids))  # 순서를 유지한 채 중복 제거
+        
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            failed = []
             
-            # 원본 메시지의 헤더에서 정보 추출
-            headers = original_message['payload']['headers']
-            original_subject = ''
-            original_message_id_header = ''
+            def callback(request_id, response, exception):
+                if exception is None:
+                    results[request_id] = response
+                elif self._is_rate_limited(exception):
+                    self.scheduler.penalize()
+                    failed.append(request_id)
+                elif (isinstance(exception, HttpError)
+                      and exception.resp.status in retryable_status):
+                    failed.append(request_id)
+                else:
+                    print(f"이메일 가져오기 실패 ({request_id}): {exception}")
             
-            for header in headers:
-                if header['name'] == 'Subject':
-                    original_subject = header['value']
-                elif header['name'] == 'Message-ID':
-                    original_message_id_header = header['value']
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                batch = self._active_service().new_batch_http_request(callback=callback)
+                for resource_id in chunk:
+                    batch.add(make_request(resource_id), request_id=resource_id)
+                self.scheduler.acquire(method, len(chunk))
+                try:
+                    batch.execute()
+                except HttpError as e:
+                    # 배치 요청 자체가 실패하면 아직 응답이 없는 하위 요청 모두 재시도
+                    print(f"배치 요청 오류: {e}")
+                    if e.resp.status not in retryable_status and not self._is_rate_limited(e):
+                        # 재시도해도 실패할 오류는 빈 결과로 숨기지 않고 호출한 쪽으로 전달
+                        raise
+                    failed.extend(
+                        resource_id for resource_id in chunk
+                        if resource_id not in results and resource_id not in failed
+                    )
             
-            # 회신 제목 생성 (Re: 추가)
-            if not reply_subject.startswith('Re:'):
-                reply_subject = f"Re: {reply_subject}"
+            if not failed:
+                break
             
-            # 한글 제목 인코딩 (RFC 2047)
-            import email.header
-            encoded_subject = email.header.Header(reply_subject, 'utf-8').encode()
+            if attempt < BATCH_MAX_RETRIES:
+                # 지수 백오프 + 지터
+                time.sleep((2 ** attempt) + random.random())
+                # 재시도도 원래 순서대로 보내도록 정렬
+                order = {resource_id: i for i, resource_id in enumerate(pending)}
+                pending = sorted(failed, key=order.get)
+            else:
+                print(f"재시도 후에도 {len(failed)}개 요청을 처리하지 못했습니다.")
+        
+        return results
+    
+    def _use_thread_pool(self) -> bool:
+        """스레드 풀 조회를 쓸 수 있는지 (동시 실행 수가 2 이상이고 스레드별 서비스를 만들 수 있을 때)"""
+        return self.max_workers > 1 and (self.service_factory is not None or self.credentials is not None)
+    
+    def _thread_service(self):
+        """
+        현재 작업 스레드 전용 서비스 객체
+        
+        httplib2.Http는 스레드 안전하지 않으므로 스레드마다 자신의 AuthorizedHttp를 가진
+        서비스를 한 번 만들어 재사용합니다. 인증 정보(credentials)는 모든 스레드가 공유합니다.
+        """
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            if self.service_factory is not None:
+                service = self.service_factory()
+            else:
+                service = build_service('gmail', 'v1', self.credentials)
+            self._thread_local.service = service
+        return service
+    
+    def _active_service(self):
+        """현재 스레드가 쓸 서비스 객체 (미리 가져오기 스레드는 전용 서비스, 그 밖에는 self.service)"""
+        if getattr(self._thread_local, 'prefetching', False):
+            return self._thread_service()
+        return self.service
+    
+    def _refresh_credentials(self):
+        """만료된 토큰을 여러 스레드가 동시에 갱신하지 않도록 작업 스레드 시작 전에 한 번 갱신"""
+        creds = self.credentials
+        if creds is not None and not creds.valid and creds.refresh_token:
+            creds.refresh(Request())
+    
+    def _parallel_execute(self, resource_ids: List[str], make_request: Callable,
+                          method: str = 'messages.get') -> List[Dict]:
+        """
+        리소스 ID별 요청을 스레드 풀에서 동시에 실행
+        
+        동시 실행 수는 max_workers로 제한되며, 작업 스레드는 클라이언트가 살아 있는 동안 재사용됩니다.
+        결과는 _batch_execute와 같이 resource_ids 순서로 반환합니다.
+        
+        Args:
+            resource_ids: 조회할 리소스(메시지, 스레드) ID 목록
+            make_request: (서비스, ID)를 받아 API 요청 객체를 만드는 함수
+            method: 요청의 메서드 이름 (할당량 계산용)
+        
+        Returns:
+            리소스 리스트 (끝내 실패한 리소스는 제외)
+        """
+        self._refresh_credentials()
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='gmail-fetch')
+        
+        unique_ids = list(dict.fromkeys(resource_ids))
+        responses = self._executor.map(
+            lambda resource_id: self._execute_with_retry(make_request, resource_id, method),
+            unique_ids
+        )
+        results = {
+            resource_id: response
+            for resource_id, response in zip(unique_ids, responses)
+            if response is not None
+        }
+        return [results[resource_id] for resource_id in resource_ids if resource_id in results]
+    
+    def _execute_with_retry(self, make_request: Callable, resource_id: str, method: str) -> Optional[Dict]:
+        """작업 스레드에서 요청 하나를 실행하고 일시적 오류는 지수 백오프로 재시도 (실패 시 None)"""
+        service = self._thread_service()
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            self.scheduler.acquire(method)
+            try:
+                return make_request(service, resource_id).execute()
+            except HttpError as e:
+                if self._is_rate_limited(e):
+                    self.scheduler.penalize()
+                elif e.resp.status not in RETRYABLE_STATUS:
+                    print(f"이메일 가져오기 실패 ({resource_id}): {e}")
+                    return None
+            except Exception as e:
+                print(f"이메일 가져오기 실패 ({resource_id}): {e}")
+                return None
             
-            # 회신 메시지 생성
-            reply_message = f"""To: {recipient_email}
-Subject: {encoded_subject}
-In-Reply-To: {original_message_id_header}
-References: {original_message_id_header}
-
-{reply_body}"""
+            if attempt < BATCH_MAX_RETRIES:
+                time.sleep((2 ** attempt) + random.random())
+        
+        print(f"재시도 후에도 이메일을 가져오지 못했습니다 ({resource_id}).")
+        return None
+    
+    def close(self):
+        """스레드 풀 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def get_threads(self, query: str = '', max_results: int = 10, include_replied: bool = False) -> List[Dict]:
+        """
+        대화(스레드) 단위로 이메일 가져오기
+        
+        threads.get으로 대화 전체를 받아 메시지들을 하나의 요약 문서로 합칩니다.
+        마지막 메시지가 내가 보낸 메일(SENT)인 대화는 이미 회신한 것으로 보고 건너뛰며,
+        그 뒤에 상대방의 새 메일이 도착하면 다시 포함됩니다.
+        
+        Args:
+            query: Gmail 검색 쿼리
+            max_results: 가져올 최대 대화 개수
+            include_replied: True이면 이미 회신한 대화도 포함
+        
+        Returns:
+            대화 정보 리스트. get_emails와 같은 키에 더해 replied, message_count, message_ids를 가지며,
+            id는 상대방이 보낸 가장 최근 메시지 ID, body는 대화 요약 문서입니다.
+        """
+        try:
+            results = self._execute(self.service.users().threads().list(
+                userId='me',
+                q=self._search_query(query),
+                maxResults=max_results
+            ), 'threads.list')
             
-            # Base64 인코딩
-            import base64
-            message_bytes = reply_message.encode('utf-8')
-            message_b64 = base64.urlsafe_b64encode(message_bytes).decode('utf-8')
+            thread_ids = [thread['id'] for thread in results.get('threads', [])]
+            make_request = lambda service, thread_id: service.users().threads().get(
+                userId='me',
+                id=thread_id,
+                format='full'
+            )
+            if self._use_thread_pool():
+                threads = self._parallel_execute(thread_ids, make_request, method='threads.get')
+            else:
+                threads = self._batch_execute(
+                    thread_ids,
+                    lambda thread_id: make_request(self.service, thread_id),
+                    method='threads.get'
+                )
+            self._count_quota('threads.get', len(threads))
+        
+        except Exception as e:
+            self._report_error(e)
+            return []
+        
+        parsed_threads = []
+        for thread in threads:
+            messages = [
+                msg for msg in thread.get('messages', [])
+                if 'DRAFT' not in msg.get('labelIds', [])
+            ]
+            if not messages:
+                continue
             
-            # 메시지 전송
-            message = {
-                'raw': message_b64
-            }
+            # 마지막 메시지가 내가 보낸 회신이면 새 문의가 없는 대화
+            if not include_replied and 'SENT' in messages[-1].get('labelIds', []):
+                self.fetch_stats['replied_threads_skipped'] += 1
+                continue
             
-            sent_message = self.service.users().messages().send(
+            try:
+                parsed_threads.append(self._parse_thread(thread['id'], messages))
+            except Exception as e:
+                print(f"대화 파싱 오류 ({thread['id']}): {e}")
+        
+        return parsed_threads
+    
+    def _parse_thread(self, thread_id: str, messages: List[Dict]) -> Dict:
+        """스레드의 메시지들을 하나의 대화 정보로 합치기"""
+        entries = []
+        latest_inbound = None
+        
+        for msg in messages:
+            email_data = self._parse_email(msg)
+            is_sent = 'SENT' in msg.get('labelIds', [])
+            if not is_sent:
+                latest_inbound = email_data
+            entries.append((email_data, is_sent))
+        
+        first = entries[0][0]
+        latest = latest_inbound or entries[-1][0]
+        
+        return {
+            'id': latest['id'],
+            'thread_id': thread_id,
+            'subject': first['subject'],
+            'sender': latest['sender'],
+            'date': latest['date'],
+            'body': self._build_thread_document(entries),
+            'snippet': latest['snippet'],
+            'list_unsubscribe': latest['list_unsubscribe'],
+            'precedence': latest['precedence'],
+            'return_path': latest['return_path'],
+            'label_ids': latest['label_ids'],
+            'message_id_header': latest['message_id_header'],
+            'references': latest['references'],
+            'attachments': [
+                attachment for email_data, _ in entries for attachment in email_data['attachments']
+            ],
+            'replied': any(is_sent for _, is_sent in entries),
+            'message_count': len(messages),
+            'message_ids': [email_data['id'] for email_data, _ in entries]
+        }
+    
+    @staticmethod
+    def _build_thread_document(entries: List) -> str:
+        """대화의 메시지들을 시간순으로 이어 붙인 요약 문서 생성 (인용문 제거)"""
+        sections = []
+        total = len(entries)
+        
+        for i, (email_data, is_sent) in enumerate(entries, 1):
+            direction = '나 (회신)' if is_sent else email_data['sender']
+            text = strip_quoted_text(email_data['body'])[:THREAD_MESSAGE_CHARS]
+            sections.append(f"[{i}/{total}] {email_data['date']} | 보낸 사람: {direction}\n{text}")
+        
+        document = '\n\n'.join(sections)
+        if len(document) > THREAD_DOCUMENT_CHARS:
+            # 최근 메시지가 분류에 더 중요하므로 앞부분을 잘라냄
+            document = '...\n' + document[-THREAD_DOCUMENT_CHARS:]
+        return document
+    
+    def ensure_labels(self, label_names: List[str]) -> Dict[str, str]:
+        """
+        라벨 이름 → 라벨 ID 조회 (없는 라벨은 생성)
+        
+        Args:
+            label_names: 라벨 이름 목록 (예: ['CREA/Processed', 'CREA/Tier1'])
+        
+        Returns:
+            {라벨 이름: 라벨 ID}
+        """
+        missing = [name for name in label_names if name not in self._label_ids]
+        if missing:
+            response = self._execute(self.service.users().labels().list(userId='me'), 'labels.list')
+            for label in response.get('labels', []):
+                self._label_ids[label['name']] = label['id']
+        
+        for name in missing:
+            if name not in self._label_ids:
+                label = self._execute(self.service.users().labels().create(
+                    userId='me',
+                    body={
+                        'name': name,
+                        'labelListVisibility': 'labelShow',
+                        'messageListVisibility': 'show'
+                    }
+                ), 'labels.create')
+                self._label_ids[name] = label['id']
+        
+        return {name: self._label_ids[name] for name in label_names}
+    
+    def apply_labels(self, message_ids: List[str], add_labels: List[str] = None,
+                     remove_labels: List[str] = None) -> bool:
+        """
+        여러 메시지에 라벨을 한꺼번에 추가/제거 (users.messages.batchModify)
+        
+        Args:
+            message_ids: 대상 메시지 ID 목록 (1000개씩 나누어 요청)
+            add_labels: 추가할 라벨 이름 목록
+            remove_labels: 제거할 라벨 이름 목록
+        
+        Returns:
+            성공 여부
+        """
+        add_labels = add_labels or []
+        remove_labels = remove_labels or []
+        message_ids = list(dict.fromkeys(message_ids))
+        if not message_ids:
+            return True
+        
+        try:
+            label_ids = self.ensure_labels(add_labels + remove_labels)
+            for start in range(0, len(message_ids), BATCH_MODIFY_SIZE):
+                self._execute(self.service.users().messages().batchModify(
+                    userId='me',
+                    body={
+                        'ids': message_ids[start:start + BATCH_MODIFY_SIZE],
+                        'addLabelIds': [label_ids[name] for name in add_labels],
+                        'removeLabelIds': [label_ids[name] for name in remove_labels]
+                    }
+                ), 'messages.batchModify')
+            return True
+        
+        except Exception as e:
+            print(f"라벨 적용 오류: {e}")
+            return False
+    
+    def mark_processed(self, classifications: Dict[str, str]) -> bool:
+        """
+        분류가 끝난 메시지에 처리 완료 라벨과 분류 라벨 적용
+        
+        같은 분류끼리 묶어 batchModify 한 번(1000개 단위)으로 처리합니다.
+        
+        Args:
+            classifications: {메시지 ID: 분류 카테고리}
+        
+        Returns:
+            성공 여부
+        """
+        by_category: Dict[str, List[str]] = {}
+        for message_id, category in classifications.items():
+            by_category.setdefault(category, []).append(message_id)
+        
+        success = True
+        for category, message_ids in by_category.items():
+            labels = [PROCESSED_LABEL]
+            if category in CATEGORY_LABELS:
+                labels.append(CATEGORY_LABELS[category])
+            # 재분류로 카테고리가 바뀐 경우 이전 분류 라벨 제거
+            stale = [label for key, label in CATEGORY_LABELS.items() if key != category]
+            success = self.apply_labels(message_ids, add_labels=labels, remove_labels=stale) and success
+        return success
+    
+    def _parse_email(self, msg: Dict) -> Dict:
+        """이메일 메시지 파싱"""
+        return parse_message(msg, self.max_body_bytes)
+    
+    def get_attachment_data(self, attachment: Dict) -> bytes:
+        """
+        첨부파일 내용 다운로드
+        
+        Args:
+            attachment: 이메일 정보의 attachments 항목 (message_id, attachment_id 또는 part_index 포함)
+        """
+        if not attachment.get('attachment_id'):
+            # 메시지에 바로 들어 있는 작은 첨부파일: 이메일 정보에 데이터를 들고 있지 않으므로 메시지를 다시 조회
+            msg = self._execute(self.service.users().messages().get(
                 userId='me',
-                body=message
-            ).execute()
+                id=attachment['message_id'],
+                format='full'
+            ), 'messages.get')
+            part = attachment_part(msg.get('payload'), attachment.get('part_index', -1))
+            return decode_part_data(part) if part else b''
+        
+        response = self._execute(self.service.users().messages().attachments().get(
+            userId='me',
+            messageId=attachment['message_id'],
+            id=attachment['attachment_id']
+        ), 'messages.attachments.get')
+        return decode_part_data({'body': response})
+    
+    def _get_email_body(self, payload: Dict) -> str:
+        """이메일 본문 추출 (중첩 multipart, charset, HTML 변환 처리)"""
+        return extract_body(payload, self.max_body_bytes)
+    
+    @staticmethod
+    def sponsorship_query(exclusions: Optional[List[str]] = None) -> str:
+        """
+        협찬 키워드 검색 쿼리
+        
+        Args:
+            exclusions: 제외 조건 목록 (기본: DEFAULT_EXCLUSIONS, 예: '-category:promotions')
+        """
+        return build_query(
+            SPONSORSHIP_KEYWORDS,
+            exclusions=DEFAULT_EXCLUSIONS if exclusions is None else exclusions
+        )
+    
+    def search_sponsorship_emails(self, max_results: int = 20, incremental: bool = False,
+                                  reset: bool = False, exclusions: Optional[List[str]] = None) -> List[Dict]:
+        """
+        협찬 관련 이메일 검색
+        
+        Args:
+            max_results: 가져올 최대 이메일 개수
+            incremental: True이면 마지막 동기화 이후 새 이메일만 가져옴
+            reset: 증분 동기화 체크포인트를 무시하고 전체 검색 후 새로 기록
+            exclusions: 검색 제외 조건 목록 (기본: DEFAULT_EXCLUSIONS)
+        """
+        query = self.sponsorship_query(exclusions)
+        
+        if incremental:
+            return self.sync_emails(query=query, max_results=max_results, reset=reset)
+        return self.get_emails(query=query, max_results=max_results)
+        
+    def get_reply_context(self, message_id: str, email_data: Optional[Dict] = None) -> Dict:
+        """
+        회신에 필요한 원본 정보 (thread_id, message_id_header, references, subject)
+        
+        이미 가져온 이메일 정보가 있으면 그대로 사용하고,
+        없으면 본문 없이 format='metadata'로 필요한 헤더만 조회합니다.
+        """
+        if not email_data or not email_data.get('message_id_header') or not email_data.get('thread_id'):
+            email_data = self._parse_email(self._execute(self.service.users().messages().get(
+                userId='me',
+                id=message_id,
+                format='metadata',
+                metadataHeaders=REPLY_HEADERS
+            ), 'messages.get'))
+        
+        return {
+            'thread_id': email_data['thread_id'],
+            'message_id_header': email_data['message_id_header'],
+            'references': email_data.get('references', ''),
+            'subject': email_data.get('subject', '')
+        }
+    
+    @staticmethod
+    def build_reply(context: Dict, reply_subject: str, reply_body: str, recipient_email: str) -> Dict:
+        """
+        messages.send 요청 본문 생성 (threadId와 In-Reply-To/References로 원래 대화에 이어 붙임)
+        
+        Args:
+            context: get_reply_context 결과
+            reply_subject: 회신 제목 ('Re:'가 없으면 추가)
+            reply_body: 회신 본문
+            recipient_email: 받는 사람 이메일 주소
+        """
+        # 회신 제목 생성 (Re: 추가)
+        if not reply_subject.startswith('Re:'):
+            reply_subject = f"Re: {reply_subject}"
+        
+        # 한글 제목/본문 인코딩 (RFC 2047, UTF-8)
+        message = MIMEText(reply_body, 'plain', 'utf-8')
+        message['To'] = recipient_email
+        message['Subject'] = Header(reply_subject, 'utf-8').encode()
+        
+        original_message_id = context.get('message_id_header')
+        if original_message_id:
+            message['In-Reply-To'] = original_message_id
+            message['References'] = ' '.join(filter(None, [context.get('references'), original_message_id]))
+        
+        body = {'raw': base64.urlsafe_b64encode(message.as_bytes()).decode('ascii')}
+        if context.get('thread_id'):
+            body['threadId'] = context['thread_id']
+        return body
+    
+    def send_reply(self, original_message_id: str, reply_subject: str, reply_body: str, recipient_email: str,
+                   email_data: Optional[Dict] = None) -> Dict:
+        """
+        이메일 회신 전송
+        
+        Args:
+            original_message_id: 회신할 원본 메시지 ID
+            email_data: 이미 가져온 원본 이메일 정보 (있으면 원본을 다시 조회하지 않음)
+        """
+        try:
+            context = self.get_reply_context(original_message_id, email_data)
+            
+            sent_message = self._execute(self.service.users().messages().send(
+                userId='me',
+                body=self.build_reply(context, reply_subject, reply_body, recipient_email)
+            ), 'messages.send')
             
             return {
                 'success': True,
                 'message_id': sent_message['id'],
+                'thread_id': sent_message.get('threadId'),
                 'message': '회신이 성공적으로 전송되었습니다.'
             }
             
@@ -249,4 +1228,33 @@ References: {original_message_id_header}
                 'error': str(e),
                 'message': '회신 전송 중 오류가 발생했습니다.'
             }
-
+    
+    def send_messages(self, messages: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        여러 메시지를 배치 요청으로 전송
+        
+        전송은 중복 실행되면 안 되므로 처리되지 않았음이 확실한 속도 제한 응답만 재시도하며,
+        할당량 스케줄러(messages.send 100단위)가 배치 사이의 간격을 조절합니다.
+        
+        Args:
+            messages: {요청 ID: messages.send 요청 본문}
+        
+        Returns:
+            {요청 ID: 전송된 메시지 정보} (실패한 요청은 제외)
+            전송 도중 연결 오류 등으로 멈춰도 그때까지 전송된 메시지는 반환하므로
+            호출한 쪽은 같은 회신을 다시 보내지 않을 수 있습니다.
+        """
+        sent = {}
+        try:
+            self._batch_execute_by_id(
+                list(messages),
+                lambda request_id: self.service.users().messages().send(userId='me', body=messages[request_id]),
+                method='messages.send',
+                batch_size=SEND_BATCH_SIZE,
+                retryable_status={429},
+                results=sent
+            )
+        except Exception as e:
+            print(f"메일 전송 중단 ({len(sent)}/{len(messages)}개 전송됨): {e}")
+        self._count_quota('messages.send', len(sent))
+        return sent
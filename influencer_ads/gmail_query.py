@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+# 협찬 검색에서 기본으로 제외할 조건 (내가 보낸 메일, 임시보관함, 채팅)
+DEFAULT_EXCLUSIONS = ['-in:sent', '-in:drafts', '-in:chats']
+
+# 프로모션 탭 제외 조건 (뉴스레터가 많을 때 선택적으로 사용)
+PROMOTIONS_EXCLUSION = '-category:promotions'
+
+# 백필 시 한 번의 list()로 조회할 기간 (일)
+DEFAULT_WINDOW_DAYS = 30
+
+# 협찬 관련 검색 키워드 (포괄적인 키워드 사용)
+SPONSORSHIP_KEYWORDS = [
+    '협찬',
+    '광고',
+    '홍보',
+    '제휴',
+    '파트너십',
+    'sponsorship',
+    'sponsored',
+    'partnership',
+    'collaboration',
+    'influencer',
+    '인플루언서',
+    '마케팅',
+    '브랜드',
+    '수익',
+    '광고비',
+    '협찬료'
+]
+
+# 뉴스레터(List-Unsubscribe)라도 후보로 남길 만큼 강한 협찬 키워드
+STRONG_SPONSORSHIP_KEYWORDS = [
+    '협찬',
+    '협찬료',
+    '광고비',
+    '제휴',
+    '파트너십',
+    'sponsorship',
+    'sponsored',
+    'partnership',
+    'collaboration'
+]
+
+# 처리 상태를 기록하는 Gmail 라벨
+PROCESSED_LABEL = 'CREA/Processed'
+CATEGORY_LABELS = {
+    'tier1': 'CREA/Tier1',
+    'tier2': 'CREA/Tier2',
+    'tier3': 'CREA/Tier3',
+    'not_sponsorship': 'CREA/NotSponsorship',
+    'unclear': 'CREA/Unclear'
+}
+
+
+def quote_term(term: str) -> str:
+    """공백이나 따옴표가 있는 검색어는 구문 검색이 되도록 따옴표로 감쌈"""
+    term = term.strip()
+    if any(ch in term for ch in ' "()'):
+        return '"{}"'.format(term.replace('"', ''))
+    return term
+
+
+def build_query(keywords: Optional[List[str]] = None, exclusions: Optional[List[str]] = None,
+                extra: str = '', after: Optional[int] = None, before: Optional[int] = None) -> str:
+    """
+    Gmail 검색 쿼리 생성
+
+    Args:
+        keywords: OR로 묶을 키워드 목록 (중복은 한 번만 사용)
+        exclusions: 그대로 덧붙일 제외 조건 (예: '-category:promotions', '-in:sent')
+        extra: 추가 검색 조건 (예: 'from:example.com')
+        after: 이 시각(epoch 초) 이후 메일만
+        before: 이 시각(epoch 초) 이전 메일만
+
+    Returns:
+        Gmail 검색 쿼리 문자열
+    """
+    parts = []
+
+    terms = list(dict.fromkeys(quote_term(keyword) for keyword in keywords or [] if keyword.strip()))
+    if len(terms) == 1:
+        parts.append(terms[0])
+    elif terms:
+        parts.append('(' + ' OR '.join(terms) + ')')
+
+    if extra:
+        parts.append(f'({extra})')
+    parts.extend(exclusion for exclusion in exclusions or [] if exclusion)
+    if after is not None:
+        parts.append(f'after:{int(after)}')
+    if before is not None:
+        parts.append(f'before:{int(before)}')
+
+    return ' '.join(parts)
+
+
+def window_query(query: str, after: int, before: int) -> str:
+    """기존 쿼리에 after:/before: 기간 조건 추가"""
+    window = f'after:{int(after)} before:{int(before)}'
+    return f'({query}) {window}' if query else window
+
+
+def date_windows(start: datetime, end: datetime,
+                 days: int = DEFAULT_WINDOW_DAYS) -> List[Tuple[int, int]]:
+    """
+    [start, end) 기간을 days일 단위 구간으로 나누기
+
+    Returns:
+        (after, before) epoch 초 튜플 리스트 (최신 구간부터, Gmail 목록 순서와 동일)
+    """
+    windows = []
+    step = timedelta(days=max(1, days))
+    window_end = end
+    while window_end > start:
+        window_start = max(start, window_end - step)
+        # 경계 시각의 메일이 빠지지 않도록 1초 겹치게 함 (중복은 병합할 때 제거)
+        windows.append((int(window_start.timestamp()) - 1, int(window_end.timestamp())))
+        window_end = window_start
+    return windows
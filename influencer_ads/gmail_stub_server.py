@@ -0,0 +1,354 @@
+import base64
+import gzip
+import json
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class GmailStubServer:
+    """벤치마크용 로컬 Gmail API 스텁 서버
+
+    messages.list / messages.get / getProfile, 배치 엔드포인트(/batch, /batch/gmail/v1)와
+    디스커버리 문서(/discovery/{api}/{version}/rest)를 흉내내며,
+    HTTP 요청마다 `latency`초의 왕복 지연을 추가합니다.
+    실제 API처럼 fields 부분 응답 마스크와 gzip 전송(Accept-Encoding과
+    User-Agent에 모두 gzip이 있을 때)을 지원합니다.
+    """
+
+    def __init__(self, message_count: int = 500, latency: float = 0.03,
+                 fail_every: int = 0, body_size: int = 4000,
+                 fixture_path: Optional[str] = None):
+        """
+        Args:
+            message_count: 메일함에 들어 있는 메시지 수
+            latency: HTTP 요청 1회당 추가할 지연 시간 (초)
+            fail_every: N번째 배치 하위 요청마다 429 응답 (0이면 실패 없음)
+            body_size: 메시지 본문 크기 (바이트)
+            fixture_path: 기록해 둔 메시지 리소스(JSON 리스트) 파일. 지정하면 생성 메시지 대신 사용
+        """
+        self.latency = latency
+        self.fail_every = fail_every
+        if fixture_path:
+            with open(fixture_path, 'r', encoding='utf-8') as f:
+                self.messages = json.load(f)[:message_count]
+        else:
+            self.messages = [self._make_message(i, body_size) for i in range(message_count)]
+        self.by_id = {msg['id']: msg for msg in self.messages}
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._sub_request_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @staticmethod
+    def _make_message(index: int, body_size: int) -> Dict:
+        """테스트용 메시지 리소스 생성"""
+        sentence = f"안녕하세요. 협찬 제안 #{index} 드립니다. 영상 1개당 100만원을 지급합니다. "
+        text = sentence * (body_size // len(sentence.encode('utf-8')) + 1)
+        text = text.encode('utf-8')[:body_size].decode('utf-8', errors='ignore').encode('utf-8')
+        html = b'<html><body><div style="font-family:sans-serif">' + text + b'</div></body></html>'
+        received = [
+            {'name': 'Received', 'value': f'from mail{hop}.example.com (mail{hop}.example.com [10.0.0.{hop}]) '
+                                          f'by mx.google.com with ESMTPS id {index:08x}.{hop}; '
+                                          'Mon, 1 Jan 2024 09:00:00 +0900'}
+            for hop in range(4)
+        ]
+        return {
+            'id': f'{index:016x}',
+            'threadId': f'{index:016x}',
+            'labelIds': ['INBOX', 'UNREAD', 'CATEGORY_PERSONAL'],
+            'snippet': f'협찬 제안 #{index}',
+            'historyId': str(1000 + index),
+            'internalDate': str(1704067200000 + index * 1000),
+            'sizeEstimate': len(text) + len(html),
+            'payload': {
+                'partId': '',
+                'mimeType': 'multipart/alternative',
+                'filename': '',
+                'headers': received + [
+                    {'name': 'DKIM-Signature', 'value': 'v=1; a=rsa-sha256; d=example.com; b=' + 'A' * 340},
+                    {'name': 'Subject', 'value': f'협찬 제안 #{index}'},
+                    {'name': 'From', 'value': f'Brand {index} <brand{index}@example.com>'},
+                    {'name': 'Date', 'value': 'Mon, 1 Jan 2024 09:00:00 +0900'},
+                    {'name': 'Message-ID', 'value': f'<msg{index}@example.com>'},
+                ],
+                'body': {'size': 0},
+                'parts': [
+                    {
+                        'partId': '0',
+                        'mimeType': 'text/plain',
+                        'filename': '',
+                        'headers': [{'name': 'Content-Type', 'value': 'text/plain; charset="UTF-8"'}],
+                        'body': {'size': len(text), 'data': base64.urlsafe_b64encode(text).decode('ascii')},
+                    },
+                    {
+                        'partId': '1',
+                        'mimeType': 'text/html',
+                        'filename': '',
+                        'headers': [{'name': 'Content-Type', 'value': 'text/html; charset="UTF-8"'}],
+                        'body': {'size': len(html), 'data': base64.urlsafe_b64encode(html).decode('ascii')},
+                    },
+                ],
+            },
+        }
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self) -> 'GmailStubServer':
+        """백그라운드 스레드에서 서버 시작"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """서버 종료"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.request_count = 0
+            self.bytes_sent = 0
+            self._sub_request_count = 0
+
+    # ------------------------------------------------------------------
+    # 요청 처리
+    # ------------------------------------------------------------------
+
+    def handle_get(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        """단일 GET 요청 처리 → (상태 코드, JSON 응답)"""
+        status, payload = self._route_get(path, params)
+        if status == 200 and 'fields' in params:
+            payload = apply_field_mask(payload, parse_field_mask(params['fields'][0]))
+        return status, payload
+
+    def _route_get(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        if path == '/gmail/v1/users/me/messages':
+            return 200, self._list_messages(params)
+
+        if path == '/gmail/v1/users/me/profile':
+            return 200, {
+                'emailAddress': 'me@example.com',
+                'messagesTotal': len(self.messages),
+                'historyId': str(1000 + len(self.messages)),
+            }
+
+        match = re.fullmatch(r'/discovery/(\w+)/(\w+)/rest', path)
+        if match:
+            return 200, stub_discovery_document(self.url, match.group(1), match.group(2))
+
+        match = re.fullmatch(r'/gmail/v1/users/me/messages/([^/]+)', path)
+        if match:
+            msg = self.by_id.get(match.group(1))
+            if msg is None:
+                return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+            return 200, self._format_message(msg, params)
+
+        return 404, {'error': {'code': 404, 'message': f'Unknown path {path}'}}
+
+    def _list_messages(self, params: Dict[str, List[str]]) -> Dict:
+        max_results = int(params.get('maxResults', ['100'])[0])
+        offset = int(params.get('pageToken', ['0'])[0] or 0)
+        page = self.messages[offset:offset + max_results]
+        result = {
+            'messages': [{'id': m['id'], 'threadId': m['threadId']} for m in page],
+            'resultSizeEstimate': len(self.messages),
+        }
+        if offset + max_results < len(self.messages):
+            result['nextPageToken'] = str(offset + max_results)
+        return result
+
+    @staticmethod
+    def _format_message(msg: Dict, params: Dict[str, List[str]]) -> Dict:
+        fmt = params.get('format', ['full'])[0]
+        if fmt == 'full':
+            return msg
+        if fmt == 'minimal':
+            return {k: v for k, v in msg.items() if k != 'payload'}
+        # metadata: 요청한 헤더만 남기고 본문은 제외
+        wanted = set(params.get('metadataHeaders', []))
+        headers = [h for h in msg['payload']['headers'] if not wanted or h['name'] in wanted]
+        return {
+            **{k: v for k, v in msg.items() if k != 'payload'},
+            'payload': {'mimeType': msg['payload']['mimeType'], 'headers': headers},
+        }
+
+    def handle_batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        """multipart/mixed 배치 요청 처리 → (Content-Type, 응답 본문)"""
+        envelope = BytesParser(policy=HTTP).parsebytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode('ascii') + body
+        )
+        boundary = 'batch_stub_boundary'
+        out = []
+        for part in envelope.iter_parts():
+            content_id = part.get('Content-ID', '<stub+0>').strip('<>')
+            request_line = part.get_payload(decode=False).lstrip().split('\n', 1)[0].strip()
+            _method, target, _version = request_line.split(' ')
+            parsed = urlparse(target)
+
+            with self._lock:
+                self._sub_request_count += 1
+                should_fail = self.fail_every and self._sub_request_count % self.fail_every == 0
+
+            if should_fail:
+                status, payload = 429, {'error': {'code': 429, 'message': 'Rate Limit Exceeded'}}
+            else:
+                status, payload = self.handle_get(parsed.path, parse_qs(parsed.query))
+
+            reason = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests'}.get(status, 'Error')
+            data = json.dumps(payload)
+            out.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} {reason}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n'
+                f'Content-Length: {len(data.encode("utf-8"))}\r\n\r\n'
+                f'{data}\r\n'
+            )
+        out.append(f'--{boundary}--\r\n')
+        return f'multipart/mixed; boundary={boundary}', ''.join(out).encode('utf-8')
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                accepts_gzip = ('gzip' in self.headers.get('Accept-Encoding', '')
+                                and 'gzip' in self.headers.get('User-Agent', ''))
+                self.send_response(status)
+                if accepts_gzip:
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.bytes_sent += len(body)
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                parsed = urlparse(self.path)
+                status, payload = stub.handle_get(parsed.path, parse_qs(parsed.query))
+                self._send(status, 'application/json; charset=UTF-8',
+                           json.dumps(payload).encode('utf-8'))
+
+            def do_POST(self):
+                time.sleep(stub.latency)
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                # 클라이언트 버전에 따라 /batch 또는 /batch/gmail/v1로 보냄
+                path = urlparse(self.path).path
+                if path == '/batch' or path.startswith('/batch/'):
+                    content_type, data = stub.handle_batch(self.headers['Content-Type'], body)
+                    self._send(200, content_type, data)
+                else:
+                    self._send(404, 'application/json', b'{}')
+
+        return Handler
+
+
+def parse_field_mask(mask: str) -> Dict:
+    """fields 마스크 문자열을 {필드: 하위 마스크 또는 None(전체)} 트리로 변환
+
+    예: 'id,payload(headers,body/data)' → {'id': None, 'payload': {'headers': None, 'body': {'data': None}}}
+    """
+    pos = 0
+
+    def parse_list(tree: Dict):
+        nonlocal pos
+        while True:
+            parse_item(tree)
+            if pos < len(mask) and mask[pos] == ',':
+                pos += 1
+                continue
+            return tree
+
+    def parse_item(tree: Dict):
+        nonlocal pos
+        start = pos
+        while pos < len(mask) and mask[pos] not in ',()/':
+            pos += 1
+        name = mask[start:pos].strip()
+        if pos < len(mask) and mask[pos] in '/(':
+            opener = mask[pos]
+            pos += 1
+            sub = tree.get(name) or {}
+            if opener == '/':
+                parse_item(sub)
+            else:
+                parse_list(sub)
+                pos += 1  # ')'
+            # 이미 전체가 선택된 필드는 그대로 둠
+            if tree.get(name, {}) is not None:
+                tree[name] = sub
+        else:
+            tree[name] = None
+
+    return parse_list({})
+
+
+def apply_field_mask(value, tree: Optional[Dict]):
+    """parse_field_mask 결과에 따라 응답에서 선택된 필드만 남김"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_field_mask(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: apply_field_mask(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+def stub_discovery_document(base_url: str, api: str = 'gmail', version: str = 'v1') -> Dict:
+    """번들된 디스커버리 문서를 스텁 서버 주소를 가리키도록 수정해서 반환"""
+    from googleapiclient.discovery_cache import get_static_doc
+
+    doc = json.loads(get_static_doc(api, version))
+    doc['rootUrl'] = base_url
+    doc['baseUrl'] = base_url + doc.get('servicePath', '')
+    return doc
+
+
+def build_stub_service(base_url: str, api: str = 'gmail', version: str = 'v1',
+                       http=None, request_builder=None):
+    """
+    번들된 디스커버리 문서로 스텁 서버를 가리키는 서비스 객체 생성
+
+    Args:
+        base_url: 스텁 서버 주소
+        http: 사용할 httplib2.Http (기본: httplib2.Http())
+        request_builder: googleapiclient requestBuilder (기본: HttpRequest)
+    """
+    import httplib2
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.http import HttpRequest
+
+    doc = stub_discovery_document(base_url, api, version)
+    return build_from_document(doc, http=http or httplib2.Http(),
+                               requestBuilder=request_builder or HttpRequest)
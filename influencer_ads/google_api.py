@@ -0,0 +1,260 @@
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+import httplib2
+from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+# OAuth 클라이언트 정보 파일
+CLIENT_SECRETS_FILE = 'credentials.json'
+
+# 액세스 토큰 만료 몇 초 전에 백그라운드에서 미리 갱신할지
+REFRESH_MARGIN = 300
+# 갱신 실패 시 다시 시도할 간격 (초)
+REFRESH_RETRY_SECONDS = 60
+
+# 메서드별 부분 응답(fields) 마스크 - 앱에서 실제로 사용하는 필드만 요청
+# 'gmail.users.messages.get'은 format 파라미터별로 다른 마스크 사용
+_MESSAGE_FIELDS = {
+    'full': 'id,threadId,labelIds,snippet,sizeEstimate,'
+            'payload(mimeType,filename,headers,body(size,data,attachmentId),parts)',
+    'metadata': 'id,threadId,labelIds,snippet,sizeEstimate,payload(mimeType,headers)',
+    'minimal': 'id,threadId,labelIds,snippet,sizeEstimate'
+}
+
+FIELD_MASKS = {
+    'gmail.users.messages.list': 'messages(id,threadId),nextPageToken,resultSizeEstimate',
+    'gmail.users.messages.get': _MESSAGE_FIELDS,
+    'gmail.users.threads.list': 'threads(id,historyId),nextPageToken,resultSizeEstimate',
+    'gmail.users.threads.get': {
+        fmt: f'id,historyId,messages({fields})' for fmt, fields in _MESSAGE_FIELDS.items()
+    },
+    'gmail.users.messages.send': 'id,threadId',
+    'gmail.users.messages.attachments.get': 'data,size',
+    'gmail.users.history.list': 'history(messagesAdded(message(id,threadId,labelIds))),historyId,nextPageToken',
+    'gmail.users.getProfile': 'historyId',
+    'gmail.users.labels.list': 'labels(id,name)',
+    'gmail.users.labels.create': 'id,name',
+    'calendar.events.list': 'items(id,summary,description,location,start,end,htmlLink),nextPageToken',
+    'calendar.events.insert': 'id,htmlLink'
+}
+
+
+def field_mask_for(method_id: Optional[str], uri: str) -> Optional[str]:
+    """메서드 ID와 요청 URI에 맞는 fields 마스크 반환 (없으면 None)"""
+    mask = FIELD_MASKS.get(method_id)
+    if isinstance(mask, dict):
+        params = parse_qs(urlparse(uri).query)
+        mask = mask.get(params.get('format', ['full'])[0])
+    return mask
+
+
+class PartialResponseRequest(HttpRequest):
+    """fields 파라미터를 자동으로 붙이는 HttpRequest
+
+    build(requestBuilder=...)로 지정하면 배치 하위 요청을 포함한 모든 API 호출에
+    FIELD_MASKS의 마스크가 적용됩니다. 호출 시 fields를 직접 넘기면 그 값을 우선합니다.
+    """
+
+    def __init__(self, http, postproc, uri, method='GET', body=None, headers=None,
+                 methodId=None, resumable=None):
+        params = parse_qs(urlparse(uri).query)
+        mask = field_mask_for(methodId, uri)
+        if mask and 'fields' not in params:
+            separator = '&' if '?' in uri else '?'
+            uri = f"{uri}{separator}fields={quote(mask, safe='')}"
+        super().__init__(http, postproc, uri, method=method, body=body, headers=headers,
+                         methodId=methodId, resumable=resumable)
+
+
+class GzipHttp(httplib2.Http):
+    """모든 요청에 gzip 전송 헤더를 붙이는 httplib2.Http
+
+    Google API는 Accept-Encoding과 함께 User-Agent에 'gzip'이 있어야 압축 응답을 보냅니다.
+    개별 API 요청은 googleapiclient가 이미 붙이지만, 배치 요청 등 직접 보내는 요청에도 적용합니다.
+    """
+
+    def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+        headers = dict(headers or {})
+        headers['accept-encoding'] = 'gzip'
+        user_agent = headers.get('user-agent', '')
+        if 'gzip' not in user_agent:
+            headers['user-agent'] = f'{user_agent} (gzip)'.strip()
+        return super().request(uri, method, body, headers, *args, **kwargs)
+
+
+def build_service(api: str, version: str, credentials, http: Optional[httplib2.Http] = None):
+    """
+    부분 응답 마스크와 gzip 전송이 적용된 Google API 서비스 생성
+
+    Args:
+        api: API 이름 (예: 'gmail', 'calendar')
+        version: API 버전 (예: 'v1', 'v3')
+        credentials: google.auth 인증 정보
+        http: 사용할 httplib2.Http (없으면 GzipHttp 새로 생성)
+
+    Returns:
+        googleapiclient 서비스 객체
+    """
+    authorized_http = AuthorizedHttp(credentials, http=http or GzipHttp())
+    # 디스커버리 문서는 네트워크로 받지 않고 라이브러리에 포함된 정적 문서 사용
+    return build(api, version, http=authorized_http, requestBuilder=PartialResponseRequest,
+                 static_discovery=True, cache_discovery=False)
+
+
+def load_credentials(token_file: str, scopes: List[str]):
+    """
+    저장된 토큰을 불러오고, 없거나 만료됐으면 갱신/재로그인 후 저장
+
+    Args:
+        token_file: 토큰 pickle 파일 경로 (예: 'token.pickle')
+        scopes: 필요한 OAuth 스코프 목록
+
+    Returns:
+        google.oauth2 인증 정보
+    """
+    creds = None
+
+    # 토큰 파일이 있으면 기존 인증 정보 로드
+    if os.path.exists(token_file):
+        with open(token_file, 'rb') as token:
+            creds = pickle.load(token)
+
+    # 스코프가 추가된 경우 기존 토큰으로는 부족하므로 다시 로그인
+    if creds and not creds.has_scopes(scopes):
+        creds = None
+
+    # 유효한 인증 정보가 없으면 새로 로그인
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            if not os.path.exists(CLIENT_SECRETS_FILE):
+                raise FileNotFoundError(
+                    f"{CLIENT_SECRETS_FILE} 파일이 없습니다. "
+                    "Google Cloud Console에서 OAuth 2.0 클라이언트 ID를 생성하고 "
+                    f"{CLIENT_SECRETS_FILE} 파일을 다운로드하세요."
+                )
+            flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, scopes)
+            creds = flow.run_local_server(port=0)
+
+        _save_credentials(token_file, creds)
+
+    return creds
+
+
+def _save_credentials(token_file: str, creds):
+    with open(token_file, 'wb') as token:
+        pickle.dump(creds, token)
+
+
+class CredentialRefresher(threading.Thread):
+    """액세스 토큰이 만료되기 전에 백그라운드에서 미리 갱신하는 스레드
+
+    요청 도중 401을 받고 나서야 갱신하면 첫 요청이 그만큼 느려지므로,
+    만료 REFRESH_MARGIN초 전에 갱신하고 토큰 파일에도 저장합니다.
+    """
+
+    def __init__(self, token_file: str, creds):
+        super().__init__(name=f'credential-refresher:{token_file}', daemon=True)
+        self.token_file = token_file
+        self.creds = creds
+        self._stop_event = threading.Event()
+
+    def seconds_until_refresh(self) -> float:
+        """다음 갱신까지 남은 시간 (만료 시각을 모르면 REFRESH_RETRY_SECONDS)"""
+        expiry = self.creds.expiry  # google.auth는 UTC naive datetime 사용
+        if expiry is None:
+            return REFRESH_RETRY_SECONDS
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (expiry - now).total_seconds() - REFRESH_MARGIN
+
+    def run(self):
+        while not self._stop_event.is_set():
+            wait = self.seconds_until_refresh()
+            if wait > 0:
+                self._stop_event.wait(wait)
+                continue
+            if not self.creds.refresh_token:
+                return
+            try:
+                self.creds.refresh(Request())
+                _save_credentials(self.token_file, self.creds)
+            except Exception as e:
+                print(f"토큰 미리 갱신 실패 ({self.token_file}): {e}")
+                self._stop_event.wait(REFRESH_RETRY_SECONDS)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+# 프로세스 전체에서 공유하는 인증 정보와 서비스 객체
+_cache_lock = threading.Lock()
+_credentials: Dict[str, object] = {}
+_refreshers: Dict[str, CredentialRefresher] = {}
+_services: Dict[Tuple[str, str, str], object] = {}
+
+# 서비스 생성 소요 시간 기록 (API 이름 → 초), 첫 요청까지 걸리는 시간 측정용
+build_timings: Dict[str, float] = {}
+
+
+def get_credentials(token_file: str, scopes: List[str]):
+    """토큰 파일별로 한 번만 불러온 인증 정보 반환 (백그라운드 갱신 스레드 시작)"""
+    with _cache_lock:
+        creds = _credentials.get(token_file)
+        if creds is None or not creds.has_scopes(scopes):
+            creds = load_credentials(token_file, scopes)
+            _credentials[token_file] = creds
+            if token_file in _refreshers:
+                _refreshers.pop(token_file).stop()
+            if creds.refresh_token:
+                refresher = CredentialRefresher(token_file, creds)
+                refresher.start()
+                _refreshers[token_file] = refresher
+        return creds
+
+
+def get_service(api: str, version: str, token_file: str, scopes: List[str]):
+    """
+    프로세스 전체에서 공유하는 Google API 서비스 객체 반환
+
+    API/버전/토큰 파일별로 처음 한 번만 생성하고 이후에는 캐시된 객체를 반환합니다.
+    httplib2는 스레드 안전하지 않으므로 여러 스레드에서 동시에 요청할 때는
+    build_service로 스레드별 서비스를 따로 만들어야 합니다.
+
+    Args:
+        api: API 이름 (예: 'gmail', 'calendar')
+        version: API 버전 (예: 'v1', 'v3')
+        token_file: 토큰 pickle 파일 경로
+        scopes: 필요한 OAuth 스코프 목록
+    """
+    creds = get_credentials(token_file, scopes)
+    key = (api, version, token_file)
+    with _cache_lock:
+        service = _services.get(key)
+        if service is None or _credentials.get(token_file) is not creds:
+            start = time.perf_counter()
+            service = build_service(api, version, creds)
+            build_timings[api] = time.perf_counter() - start
+            _services[key] = service
+        return service
+
+
+def reset_credentials(token_file: Optional[str] = None):
+    """캐시된 인증 정보와 서비스 삭제 (토큰 재설정 시 사용, None이면 전체)"""
+    with _cache_lock:
+        token_files = [token_file] if token_file else list(_credentials)
+        for name in token_files:
+            _credentials.pop(name, None)
+            refresher = _refreshers.pop(name, None)
+            if refresher:
+                refresher.stop()
+        for key in [key for key in _services if key[2] in token_files]:
+            del _services[key]
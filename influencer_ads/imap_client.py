@@ -0,0 +1,701 @@
+import imaplib
+import json
+import os
+import re
+import select
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from gmail_query import CATEGORY_LABELS, SPONSORSHIP_KEYWORDS
+from mime_parser import (MAX_BODY_BYTES, SNIPPET_SOURCE_BYTES, attachment_part, decode_part_data, parse_message,
+                         raw_to_message)
+
+# 메일 서비스별 IMAP 서버 (SSL)
+IMAP_PROVIDERS = {
+    'naver': ('imap.naver.com', 993),
+    'daum': ('imap.daum.net', 993)
+}
+
+# UID FETCH 한 번(왕복 1회)에 요청할 메시지 수
+FETCH_CHUNK_SIZE = 100
+
+# 2단계 조회 1단계에서 헤더와 함께 받을 본문 앞부분 크기 (snippet 생성용, 바이트)
+SNIPPET_FETCH_BYTES = SNIPPET_SOURCE_BYTES
+
+# 증분 동기화 체크포인트(UIDVALIDITY, 마지막 UID) 저장 파일
+IMAP_SYNC_STATE_FILE = 'imap_sync_state.json'
+
+# IDLE 유지 시간 (서버가 30분 뒤 연결을 끊을 수 있어 그 전에 다시 시작)
+IDLE_TIMEOUT = 29 * 60
+
+# 처리 상태를 기록하는 IMAP 키워드 플래그 (Gmail 라벨 'CREA/Processed' 등에 대응)
+PROCESSED_KEYWORD = 'CREA_Processed'
+CATEGORY_KEYWORDS = {
+    category: label.replace('/', '_') for category, label in CATEGORY_LABELS.items()
+}
+
+# search_sponsorship_emails가 사용하는 검색어 (협찬 키워드 OR 검색으로 변환)
+SPONSORSHIP_QUERY = 'crea:sponsorship'
+
+# FETCH 응답 항목 파싱
+_FETCH_START = re.compile(rb'^\d+ \(')
+_FETCH_UID = re.compile(rb'UID (\d+)')
+_FETCH_FLAGS = re.compile(rb'FLAGS \(([^)]*)\)')
+_FETCH_SIZE = re.compile(rb'RFC822\.SIZE (\d+)')
+_FETCH_SECTION = re.compile(rb'(BODY\[[A-Z]*\](?:<\d+>)?|RFC822) \{\d+\}$')
+
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def imap_date(value: datetime) -> str:
+    """IMAP SEARCH 날짜 형식 (예: 01-Jan-2024, 로케일과 무관)"""
+    return f"{value.day:02d}-{_MONTHS[value.month - 1]}-{value.year}"
+
+
+def compress_uids(uids: List[int]) -> str:
+    """UID 목록을 범위 집합 문자열로 압축 ([1, 2, 3, 5] → '1:3,5')"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(str(start) if start == end else f'{start}:{end}' for start, end in ranges)
+
+
+def quote_string(value: str) -> str:
+    """ASCII 검색어를 IMAP 따옴표 문자열로 변환"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def parse_fetch_response(data: List) -> List[Dict]:
+    """
+    imaplib의 FETCH 응답을 메시지별로 정리
+
+    Returns:
+        [{'uid', 'flags', 'size', 'sections': {'BODY[HEADER]': bytes, ...}}] 리스트
+    """
+    items = []
+    for part in data:
+        prefix = part[0] if isinstance(part, tuple) else part
+        if not isinstance(prefix, bytes):
+            continue
+        if _FETCH_START.match(prefix):
+            items.append({'meta': b'', 'sections': {}})
+        if not items:
+            continue
+        item = items[-1]
+        item['meta'] += prefix
+        if isinstance(part, tuple):
+            section = _FETCH_SECTION.search(prefix)
+            if section:
+                item['sections'][section.group(1).decode('ascii')] = part[1]
+
+    results = []
+    for item in items:
+        uid = _FETCH_UID.search(item['meta'])
+        if not uid:
+            continue
+        flags = _FETCH_FLAGS.search(item['meta'])
+        size = _FETCH_SIZE.search(item['meta'])
+        results.append({
+            'uid': int(uid.group(1)),
+            'flags': flags.group(1).decode('utf-8', errors='replace').split() if flags else [],
+            'size': int(size.group(1)) if size else 0,
+            'sections': item['sections']
+        })
+    return results
+
+
+class ImapClient:
+    """IMAP(네이버 메일, 다음 메일 등)으로 이메일을 가져오는 클라이언트
+
+    GmailClient와 같은 메서드와 같은 형식의 이메일 정보를 제공하므로 app.py에서
+    그대로 바꿔 쓸 수 있습니다. 메시지는 UID 범위 집합으로 묶어 UID FETCH 한 번에
+    FETCH_CHUNK_SIZE개씩 받고, 증분 동기화는 UIDVALIDITY와 마지막 UID로 이어갑니다.
+    대화(스레드) 조회와 회신 전송은 지원하지 않습니다.
+    """
+
+    def __init__(self, host: str, username: str, password: str, port: int = 993,
+                 mailbox: str = 'INBOX', use_ssl: bool = True,
+                 relevance_filter: Optional[Callable[[Dict], bool]] = None,
+                 max_body_bytes: Optional[int] = MAX_BODY_BYTES, exclude_processed: bool = False,
+                 fetch_chunk_size: int = FETCH_CHUNK_SIZE):
+        """
+        Args:
+            host: IMAP 서버 주소
+            username: 로그인 아이디
+            password: 비밀번호 (네이버/다음은 2단계 인증 사용 시 애플리케이션 비밀번호)
+            port: IMAP 포트
+            mailbox: 검색할 메일함
+            use_ssl: False이면 암호화하지 않은 연결 사용 (로컬 스텁 서버 테스트용)
+            relevance_filter: 지정하면 2단계 조회 사용. 헤더와 본문 앞부분으로 파싱한 이메일을 받아
+                전체 메시지를 다운로드할지 결정하는 함수 (예: GmailClient.is_sponsorship_candidate)
+            max_body_bytes: 본문으로 디코딩할 최대 바이트 수 (None이면 제한 없음)
+            exclude_processed: True이면 검색 시 처리 완료 키워드(PROCESSED_KEYWORD)가 붙은 메일 제외
+            fetch_chunk_size: UID FETCH 한 번에 요청할 메시지 수
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.mailbox = mailbox
+        self.use_ssl = use_ssl
+        self.relevance_filter = relevance_filter
+        self.max_body_bytes = max_body_bytes
+        self.exclude_processed = exclude_processed
+        self.fetch_chunk_size = max(1, fetch_chunk_size)
+        self.conn: Optional[imaplib.IMAP4] = None
+        self.uidvalidity: Optional[int] = None
+        self.uidnext: Optional[int] = None
+        self.supports_keywords = False
+        self.reset_fetch_stats()
+
+    @classmethod
+    def from_env(cls, provider: str = 'naver', **kwargs) -> 'ImapClient':
+        """
+        환경 변수(IMAP_USER, IMAP_PASSWORD, 선택: IMAP_HOST, IMAP_PORT)로 클라이언트 생성
+
+        Args:
+            provider: IMAP_PROVIDERS의 메일 서비스 이름 (IMAP_HOST가 있으면 무시)
+        """
+        username = os.getenv('IMAP_USER')
+        password = os.getenv('IMAP_PASSWORD')
+        if not username or not password:
+            raise ValueError("IMAP_USER, IMAP_PASSWORD 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
+        host, port = IMAP_PROVIDERS[provider]
+        host = os.getenv('IMAP_HOST', host)
+        port = int(os.getenv('IMAP_PORT', port))
+        return cls(host, username, password, port=port, **kwargs)
+
+    # ------------------------------------------------------------------
+    # 연결
+    # ------------------------------------------------------------------
+
+    def connect(self):
+        """로그인 후 메일함 선택 (UIDVALIDITY, UIDNEXT, 키워드 지원 여부 기록)"""
+        self.close()
+        conn_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+        self.conn = conn_class(self.host, self.port)
+        self.conn.login(self.username, self.password)
+        self._select()
+
+    def _select(self):
+        """메일함을 다시 선택해 최신 UIDVALIDITY, UIDNEXT 확인"""
+        typ, data = self.conn.select(self.mailbox)
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"메일함을 열 수 없습니다: {self.mailbox} ({data})")
+        self.fetch_stats['round_trips'] += 1
+
+        _, uidvalidity = self.conn.response('UIDVALIDITY')
+        _, uidnext = self.conn.response('UIDNEXT')
+        _, permanent_flags = self.conn.response('PERMANENTFLAGS')
+        self.uidvalidity = int(uidvalidity[0]) if uidvalidity and uidvalidity[0] else None
+        self.uidnext = int(uidnext[0]) if uidnext and uidnext[0] else None
+        # '\*'가 있어야 CREA_Processed 같은 새 키워드를 저장할 수 있음
+        self.supports_keywords = any(b'\\*' in (flags or b'') for flags in permanent_flags or [])
+        # 이후 NOOP 등의 응답에 EXISTS가 오면 새 메일 도착으로 판단
+        self.conn.untagged_responses.pop('EXISTS', None)
+
+    def _ensure_connected(self):
+        """연결이 없거나 끊겼으면 다시 연결"""
+        if self.conn is None:
+            self.connect()
+            return
+        try:
+            self.conn.noop()
+            self.fetch_stats['round_trips'] += 1
+        except (imaplib.IMAP4.abort, OSError):
+            print("IMAP 연결이 끊겨 다시 연결합니다.")
+            self.connect()
+
+    def close(self):
+        """로그아웃 및 연결 종료"""
+        if self.conn is None:
+            return
+        try:
+            self.conn.logout()
+        except Exception:
+            pass
+        self.conn = None
+
+    def _report_error(self, e: Exception):
+        """IMAP 오류를 사용자에게 알기 쉬운 메시지로 출력"""
+        error_msg = str(e)
+        print(f"IMAP 오류: {error_msg}")
+        if 'authenticat' in error_msg.lower() or 'login' in error_msg.lower():
+            print("IMAP 로그인에 실패했습니다. 메일 설정에서 IMAP 사용을 켜고, "
+                  "2단계 인증을 쓰는 경우 애플리케이션 비밀번호를 사용하세요.")
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+
+    def parse_query(self, query: str) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Gmail 검색 문법 일부를 IMAP SEARCH 조건으로 변환
+
+        is:unread/is:read/is:starred, newer_than:Nd/Nm/Ny, from:, subject:와 일반 검색어를 지원하며
+        in:, category:, label:, 제외(-) 조건 같은 Gmail 전용 조건은 무시합니다.
+
+        Returns:
+            (SEARCH 조건, 모두 포함해야 하는 검색어, 하나라도 포함하면 되는 검색어)
+        """
+        if query.strip() == SPONSORSHIP_QUERY:
+            return [], [], list(SPONSORSHIP_KEYWORDS)
+
+        criteria = []
+        all_terms = []
+        for token in re.findall(r'\S+:"[^"]*"|"[^"]*"|\S+', query):
+            lower = token.lower()
+            newer_than = re.fullmatch(r'newer_than:(\d+)([dmy])', lower)
+            if lower == 'is:unread':
+                criteria.append('UNSEEN')
+            elif lower == 'is:read':
+                criteria.append('SEEN')
+            elif lower == 'is:starred':
+                criteria.append('FLAGGED')
+            elif newer_than:
+                days = int(newer_than.group(1)) * {'d': 1, 'm': 30, 'y': 365}[newer_than.group(2)]
+                criteria.extend(['SINCE', imap_date(datetime.now() - timedelta(days=days))])
+            elif lower.startswith(('from:', 'subject:')) and token.isascii():
+                key, _, value = token.partition(':')
+                criteria.extend([key.upper(), quote_string(value.strip('"'))])
+            elif lower.startswith(('-', 'in:', 'category:', 'label:', 'after:', 'before:')) or token in ('OR', '(', ')'):
+                continue
+            else:
+                all_terms.append(token.split(':', 1)[-1].strip('"'))
+        return criteria, all_terms, []
+
+    def search_uids(self, query: str = '', min_uid: Optional[int] = None,
+                    since: Optional[datetime] = None, before: Optional[datetime] = None) -> List[int]:
+        """
+        검색 쿼리에 맞는 UID 목록 (최신순)
+
+        한글 검색어는 literal로 보내야 하는데 명령 하나에 literal을 하나만 쓸 수 있어
+        한글 검색어마다 UID SEARCH를 한 번씩 보내고 결과를 합칩니다 (ASCII 검색어는 한 번에 검색).
+
+        Args:
+            query: 검색 쿼리 (Gmail 문법 일부 또는 SPONSORSHIP_QUERY)
+            min_uid: 이 UID 이상만 (증분 동기화)
+            since: 이 날짜 이후 메일만
+            before: 이 날짜 이전 메일만
+        """
+        criteria, all_terms, any_terms = self.parse_query(query)
+        if min_uid is not None:
+            criteria = ['UID', f'{min_uid}:*'] + criteria
+        if self.exclude_processed:
+            criteria += ['UNKEYWORD', PROCESSED_KEYWORD]
+        if since is not None:
+            criteria += ['SINCE', imap_date(since)]
+        if before is not None:
+            criteria += ['BEFORE', imap_date(before)]
+
+        # ASCII 검색어는 조건에 바로 넣고, 한글 검색어만 따로 검색
+        criteria += [part for term in all_terms if term.isascii() for part in ('TEXT', quote_string(term))]
+        literal_terms = [term for term in all_terms if not term.isascii()]
+
+        if literal_terms:
+            uids = None
+            for term in literal_terms:
+                found = self._search(criteria, term)
+                uids = found if uids is None else uids & found
+        else:
+            uids = None if any_terms else self._search(criteria)
+
+        if any_terms:
+            matched = set()
+            ascii_terms = [quote_string(term) for term in any_terms if term.isascii()]
+            if ascii_terms:
+                matched |= self._search(criteria + [self._or_criteria(ascii_terms)])
+            for term in any_terms:
+                if not term.isascii():
+                    matched |= self._search(criteria, term)
+            uids = matched if uids is None else uids & matched
+
+        # min_uid보다 UIDNEXT가 크면 'n:*'가 마지막 메시지를 돌려주므로 다시 거름
+        if min_uid is not None:
+            uids = {uid for uid in uids if uid >= min_uid}
+        return sorted(uids, reverse=True)
+
+    @staticmethod
+    def _or_criteria(terms: List[str]) -> str:
+        """TEXT 검색어 목록을 OR 조건으로 묶기 ('OR TEXT a OR TEXT b TEXT c')"""
+        if len(terms) == 1:
+            return f'TEXT {terms[0]}'
+        return f'OR TEXT {terms[0]} {ImapClient._or_criteria(terms[1:])}'
+
+    def _search(self, criteria: List[str], literal_term: Optional[str] = None) -> Set[int]:
+        """UID SEARCH 한 번 실행 (literal_term이 있으면 마지막 TEXT 조건의 literal로 보냄)"""
+        args = ['CHARSET', 'UTF-8'] + criteria if literal_term else list(criteria)
+        if literal_term:
+            args.append('TEXT')
+            self.conn.literal = literal_term.encode('utf-8')
+        if not args:
+            args = ['ALL']
+        typ, data = self.conn.uid('SEARCH', *args)
+        self.fetch_stats['round_trips'] += 1
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"검색 실패: {data}")
+        return {int(uid) for uid in b' '.join(part for part in data if part).split()}
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def get_emails(self, query: str = '', max_results: int = 10) -> List[Dict]:
+        """
+        이메일 목록 가져오기
+
+        Args:
+            query: 검색 쿼리 (Gmail 문법 일부 지원, parse_query 참고)
+            max_results: 가져올 최대 이메일 개수
+
+        Returns:
+            이메일 정보 리스트 (최신순)
+        """
+        try:
+            self._ensure_connected()
+            return self._fetch_emails(self.search_uids(query)[:max_results])
+        except (imaplib.IMAP4.error, OSError, ValueError) as e:
+            self._report_error(e)
+            return []
+
+    def backfill_emails(self, query: str, start: datetime, end: Optional[datetime] = None,
+                        window_days: int = 0, max_results: int = 500, max_workers: int = 1) -> List[Dict]:
+        """
+        [start, end) 기간의 이메일 조회 (GmailClient.backfill_emails와 같은 인터페이스)
+
+        IMAP은 SINCE/BEFORE 조건 한 번의 SEARCH로 전체 기간의 UID를 받으므로
+        기간을 나누지 않습니다 (window_days, max_workers는 무시).
+        """
+        try:
+            self._ensure_connected()
+            uids = self.search_uids(query, since=start, before=end or datetime.now() + timedelta(days=1))
+            return self._fetch_emails(uids[:max_results])
+        except (imaplib.IMAP4.error, OSError, ValueError) as e:
+            self._report_error(e)
+            return []
+
+    def _fetch_emails(self, uids: List[int]) -> List[Dict]:
+        """
+        UID 목록의 이메일을 가져와 파싱 (uids 순서 유지)
+
+        relevance_filter가 있으면 먼저 헤더와 본문 앞부분(SNIPPET_FETCH_BYTES)만 받아
+        후보로 판정된 메시지만 전체를 다운로드합니다.
+        """
+        if not uids:
+            return []
+
+        if self.relevance_filter is None:
+            candidates = uids
+        else:
+            previews = self._fetch(uids, f'(UID FLAGS RFC822.SIZE BODY.PEEK[HEADER] '
+                                         f'BODY.PEEK[TEXT]<0.{SNIPPET_FETCH_BYTES}>)')
+            self.fetch_stats['metadata_fetched'] += len(previews)
+            relevant = set()
+            for item in previews:
+                raw = item['sections'].get('BODY[HEADER]', b'') + item['sections'].get('BODY[TEXT]<0>', b'')
+                if self.relevance_filter(parse_message(self._to_message(item, raw), self.max_body_bytes)):
+                    relevant.add(item['uid'])
+                else:
+                    self.fetch_stats['skipped'] += 1
+                    self.fetch_stats['bytes_skipped'] += max(0, item['size'] - len(raw))
+            candidates = [uid for uid in uids if uid in relevant]
+
+        fetched = {
+            item['uid']: item
+            for item in self._fetch(candidates, '(UID FLAGS RFC822.SIZE BODY.PEEK[])')
+        }
+        self.fetch_stats['full_fetched'] += len(fetched)
+
+        emails = []
+        for uid in candidates:
+            item = fetched.get(uid)
+            if item is None:
+                continue
+            message = self._to_message(item, item['sections'].get('BODY[]', b''))
+            emails.append(parse_message(message, self.max_body_bytes))
+        return emails
+
+    def _fetch(self, uids: List[int], items: str) -> List[Dict]:
+        """UID를 FETCH_CHUNK_SIZE개씩 범위 집합으로 묶어 UID FETCH (청크당 왕복 1회)"""
+        ordered = sorted(set(uids))
+        results = []
+        for start in range(0, len(ordered), self.fetch_chunk_size):
+            chunk = ordered[start:start + self.fetch_chunk_size]
+            typ, data = self.conn.uid('FETCH', compress_uids(chunk), items)
+            self.fetch_stats['round_trips'] += 1
+            if typ != 'OK':
+                print(f"메시지 조회 실패 ({len(chunk)}개): {data}")
+                continue
+            fetched = parse_fetch_response(data)
+            self.fetch_stats['bytes_transferred'] += sum(
+                len(section) for item in fetched for section in item['sections'].values()
+            )
+            results.extend(fetched)
+        return results
+
+    @staticmethod
+    def _to_message(item: Dict, raw: bytes) -> Dict:
+        """FETCH 결과를 Gmail 메시지 리소스 형식으로 변환 (IMAP 플래그 → 라벨 ID)"""
+        label_ids = [flag for flag in item['flags'] if not flag.startswith('\\')]
+        if '\\Seen' not in item['flags']:
+            label_ids.append('UNREAD')
+        if '\\Flagged' in item['flags']:
+            label_ids.append('STARRED')
+        return raw_to_message(raw, str(item['uid']), label_ids, size=item['size'])
+
+    def reset_fetch_stats(self):
+        """조회 통계 초기화 (GmailClient.fetch_stats와 같은 키 + IMAP 왕복 횟수)"""
+        self.fetch_stats = {
+            'metadata_fetched': 0,    # 헤더와 본문 앞부분만 받은 메시지 수
+            'full_fetched': 0,        # 전체를 받은 메시지 수
+            'skipped': 0,             # 후보가 아니어서 전체를 받지 않은 메시지 수
+            'bytes_transferred': 0,   # 받은 메시지 데이터 크기
+            'bytes_skipped': 0,       # 건너뛴 메시지의 남은 크기 (RFC822.SIZE 기준)
+            'quota_units': 0,         # IMAP은 할당량 단위가 없음 (GmailClient와 같은 키 유지)
+            'quota_units_single_phase': 0,
+            'replied_threads_skipped': 0,
+            'round_trips': 0          # IMAP 명령 왕복 횟수
+        }
+
+    def get_attachment_data(self, attachment: Dict) -> bytes:
+        """
+        첨부파일 내용 (이메일 정보에는 데이터를 두지 않으므로 메시지를 UID로 다시 받아 해당 파트를 디코딩)
+
+        Args:
+            attachment: 이메일 정보의 attachments 항목 (message_id(UID), part_index 포함)
+        """
+        self._ensure_connected()
+        fetched = self._fetch([int(attachment['message_id'])], '(UID FLAGS RFC822.SIZE BODY.PEEK[])')
+        if not fetched:
+            return b''
+        message = self._to_message(fetched[0], fetched[0]['sections'].get('BODY[]', b''))
+        part = attachment_part(message['payload'], attachment.get('part_index', -1))
+        return decode_part_data(part) if part else b''
+
+    # ------------------------------------------------------------------
+    # 증분 동기화
+    # ------------------------------------------------------------------
+
+    def sync_emails(self, query: str = '', max_results: int = 20, reset: bool = False) -> List[Dict]:
+        """
+        마지막 동기화 이후 새로 도착한 이메일만 가져오기 (증분 동기화)
+
+        메일함과 쿼리별로 UIDVALIDITY와 마지막 UID를 imap_sync_state.json에 저장해두고,
+        다음 호출 때는 'UID 마지막+1:*' 조건으로 그 이후 도착한 메시지만 검색합니다.
+        서버가 UIDVALIDITY를 바꾸면(메일함 재생성 등) 저장된 UID가 무효이므로 전체를 다시 검색합니다.
+
+        Args:
+            query: 검색 쿼리
+            max_results: 한 번에 가져올 최대 이메일 개수
+                (새 메일이 더 많으면 오래된 것부터 가져오고 나머지는 다음 동기화 때 가져옴)
+            reset: True이면 저장된 체크포인트를 무시하고 전체 검색
+
+        Returns:
+            새 이메일 정보 리스트 (최신순)
+        """
+        state = self._load_sync_state()
+        key = self._state_key(query)
+        checkpoint = None if reset else state.get(key)
+
+        try:
+            self._ensure_connected()
+            # 검색 전에 UIDNEXT를 기록해야 그 사이 도착한 메일을 다음 동기화에서 놓치지 않음
+            self._select()
+            if checkpoint and checkpoint['uidvalidity'] != self.uidvalidity:
+                print("메일함 UIDVALIDITY가 바뀌어 전체를 다시 검색합니다.")
+                checkpoint = None
+
+            min_uid = checkpoint['last_uid'] + 1 if checkpoint else None
+            uids = self.search_uids(query, min_uid=min_uid)
+            if checkpoint and len(uids) > max_results:
+                # 새 메일을 한 번에 다 가져오지 못하면 오래된 것부터 가져오고
+                # 마지막 UID는 실제로 가져온 곳까지만 전진 (나머지는 다음 동기화에서)
+                uids = uids[-max_results:]
+                last_uid = uids[0]
+            else:
+                last_uid = self.uidnext - 1 if self.uidnext else max(uids, default=min_uid - 1 if min_uid else 0)
+                uids = uids[:max_results]
+            emails = self._fetch_emails(uids)
+        except (imaplib.IMAP4.error, OSError, ValueError) as e:
+            self._report_error(e)
+            return []
+
+        state[key] = {
+            'uidvalidity': self.uidvalidity,
+            'last_uid': last_uid,
+            'synced_at': int(time.time())
+        }
+        self._save_sync_state(state)
+
+        return emails
+
+    def _state_key(self, query: str) -> str:
+        return f"{self.username}@{self.host}/{self.mailbox}|{query}"
+
+    def _load_sync_state(self) -> Dict:
+        """저장된 동기화 체크포인트 로드"""
+        if os.path.exists(IMAP_SYNC_STATE_FILE):
+            try:
+                with open(IMAP_SYNC_STATE_FILE, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        return {}
+
+    def _save_sync_state(self, state: Dict):
+        """동기화 체크포인트 저장"""
+        try:
+            with open(IMAP_SYNC_STATE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"동기화 상태 저장 오류: {e}")
+
+    # ------------------------------------------------------------------
+    # IDLE (새 메일 알림)
+    # ------------------------------------------------------------------
+
+    def wait_for_new_mail(self, timeout: float = IDLE_TIMEOUT) -> bool:
+        """
+        IDLE 명령으로 새 메일 도착을 기다림
+
+        Returns:
+            timeout초 안에 새 메일(EXISTS 알림)이 오면 True, 시간이 지나면 False
+        """
+        self._ensure_connected()
+        if 'IDLE' not in self.conn.capabilities:
+            raise imaplib.IMAP4.error("IDLE을 지원하지 않는 서버입니다.")
+        # 지난 IDLE 사이(NOOP 응답 등)에 이미 도착을 알린 경우
+        if self.conn.untagged_responses.pop('EXISTS', None):
+            return True
+
+        tag = self.conn._new_tag()
+        self.conn.send(tag + b' IDLE\r\n')
+        response = self.conn.readline()
+        if not response.startswith(b'+'):
+            raise imaplib.IMAP4.error(f"IDLE 시작 실패: {response!r}")
+
+        arrived = False
+        deadline = time.monotonic() + timeout
+        try:
+            while not arrived:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # 소켓 타임아웃을 쓰면 imaplib의 파일 버퍼가 망가지므로 select로 기다림
+                readable, _, _ = select.select([self.conn.sock], [], [], remaining)
+                if not readable:
+                    break
+                line = self.conn.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("IDLE 중 연결이 끊겼습니다.")
+                arrived = line.rstrip().upper().endswith(b'EXISTS')
+        finally:
+            self.conn.send(b'DONE\r\n')
+            # IDLE 명령의 완료 응답까지 읽어 다음 명령과 응답이 섞이지 않게 함
+            # (DONE 직전에 도착한 메일의 EXISTS 알림도 여기서 확인)
+            while True:
+                line = self.conn.readline()
+                if not line or line.startswith(tag):
+                    break
+                arrived = arrived or line.rstrip().upper().endswith(b'EXISTS')
+            self.fetch_stats['round_trips'] += 1
+        return arrived
+
+    def watch(self, callback: Callable[[List[Dict]], None], query: str = '', max_results: int = 20,
+              idle_timeout: float = IDLE_TIMEOUT, should_stop: Optional[Callable[[], bool]] = None):
+        """
+        IDLE 연결을 유지하며 새 메일이 올 때마다 증분 동기화 결과를 callback에 전달
+
+        처음에는 마지막 동기화 이후 쌓인 메일을 먼저 전달하고, 이후에는 IDLE로 기다립니다.
+
+        Args:
+            callback: 새 이메일 정보 리스트를 받을 함수
+            query: 검색 쿼리
+            max_results: 한 번에 가져올 최대 이메일 개수
+            idle_timeout: IDLE 한 번을 유지할 시간 (초)
+            should_stop: True를 반환하면 감시 종료
+        """
+        while should_stop is None or not should_stop():
+            emails = self.sync_emails(query=query, max_results=max_results)
+            if emails:
+                callback(emails)
+            try:
+                while not self.wait_for_new_mail(idle_timeout):
+                    if should_stop is not None and should_stop():
+                        return
+            except (imaplib.IMAP4.abort, OSError) as e:
+                print(f"IDLE 연결 오류, 다시 연결합니다: {e}")
+                self.conn = None
+
+    # ------------------------------------------------------------------
+    # 처리 상태 표시
+    # ------------------------------------------------------------------
+
+    def mark_processed(self, classifications: Dict[str, str]) -> bool:
+        """
+        분류가 끝난 메시지에 처리 완료 키워드와 분류 키워드 적용
+
+        같은 분류끼리 UID 범위 집합으로 묶어 UID STORE 한 번으로 처리합니다.
+
+        Args:
+            classifications: {메시지 ID(UID): 분류 카테고리}
+
+        Returns:
+            성공 여부 (서버가 사용자 키워드를 지원하지 않으면 False)
+        """
+        try:
+            self._ensure_connected()
+            if not self.supports_keywords:
+                print("이 메일 서버는 사용자 키워드를 저장할 수 없어 처리 상태를 기록하지 않습니다.")
+                return False
+
+            by_category: Dict[str, List[int]] = {}
+            for message_id, category in classifications.items():
+                by_category.setdefault(category, []).append(int(message_id))
+
+            success = True
+            for category, uids in by_category.items():
+                uid_set = compress_uids(uids)
+                keywords = [PROCESSED_KEYWORD]
+                if category in CATEGORY_KEYWORDS:
+                    keywords.append(CATEGORY_KEYWORDS[category])
+                # 재분류로 카테고리가 바뀐 경우 이전 분류 키워드 제거
+                stale = [keyword for key, keyword in CATEGORY_KEYWORDS.items() if key != category]
+                for command, flags in (('-FLAGS.SILENT', stale), ('+FLAGS.SILENT', keywords)):
+                    typ, data = self.conn.uid('STORE', uid_set, command, f"({' '.join(flags)})")
+                    self.fetch_stats['round_trips'] += 1
+                    success = typ == 'OK' and success
+            return success
+        except (imaplib.IMAP4.error, OSError, ValueError) as e:
+            print(f"처리 키워드 적용 오류: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # GmailClient 호환 메서드
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def sponsorship_query(exclusions: Optional[List[str]] = None) -> str:
+        """협찬 키워드 검색 쿼리 (Gmail 전용 제외 조건은 IMAP에서 의미가 없어 무시)"""
+        return SPONSORSHIP_QUERY
+
+    def search_sponsorship_emails(self, max_results: int = 20, incremental: bool = False,
+                                  reset: bool = False, exclusions: Optional[List[str]] = None) -> List[Dict]:
+        """
+        협찬 관련 이메일 검색 (SPONSORSHIP_KEYWORDS 중 하나라도 포함된 메일)
+
+        Args:
+            max_results: 가져올 최대 이메일 개수
+            incremental: True이면 마지막 동기화 이후 새 이메일만 가져옴
+            reset: 증분 동기화 체크포인트를 무시하고 전체 검색 후 새로 기록
+            exclusions: GmailClient와 같은 인터페이스를 위한 인자 (무시)
+        """
+        query = self.sponsorship_query(exclusions)
+
+        if incremental:
+            return self.sync_emails(query=query, max_results=max_results, reset=reset)
+        return self.get_emails(query=query, max_results=max_results)
@@ -0,0 +1,404 @@
+import email
+import re
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+from email import policy
+from email.message import EmailMessage
+from email.utils import format_datetime
+from typing import List, Optional, Set
+
+from mime_parser import extract_body, message_to_payload
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _imap_date(value: datetime) -> str:
+    return f"{value.day:02d}-{MONTHS[value.month - 1]}-{value.year}"
+
+
+def _parse_imap_date(value: str) -> datetime:
+    day, month, year = value.split('-')
+    return datetime(int(year), MONTHS.index(month.title()) + 1, int(day))
+
+
+def parse_uid_set(uid_set: str, max_uid: int) -> Set[int]:
+    """'1:5,7,9:*' 형태의 UID 집합을 정수 집합으로 변환"""
+    uids = set()
+    for item in uid_set.split(','):
+        if ':' in item:
+            start, end = item.split(':')
+            start = max_uid if start == '*' else int(start)
+            end = max_uid if end == '*' else int(end)
+            uids.update(range(min(start, end), max(start, end) + 1))
+        else:
+            uids.add(max_uid if item == '*' else int(item))
+    return uids
+
+
+class StubMessage:
+    """스텁 메일함의 메시지 한 통"""
+
+    def __init__(self, uid: int, raw: bytes, flags: Optional[Set[str]] = None,
+                 internal_date: Optional[datetime] = None):
+        self.uid = uid
+        self.raw = raw
+        self.flags = set(flags or ())
+        self.internal_date = internal_date or datetime.now()
+        parsed = email.message_from_bytes(raw, policy=policy.default)
+        self.header = raw.split(b'\r\n\r\n', 1)[0] + b'\r\n\r\n'
+        # FROM, TEXT 검색용 (소문자)
+        self.sender = str(parsed.get('From', '')).lower()
+        self.text = f"{parsed.get('Subject', '')} {extract_body(message_to_payload(parsed))}".lower()
+
+
+class ImapStubServer:
+    """벤치마크/동작 확인용 로컬 IMAP4rev1 스텁 서버
+
+    LOGIN, SELECT/EXAMINE, STATUS, UID SEARCH(OR/NOT, ALL, UID, SEEN/UNSEEN, FLAGGED,
+    SINCE/BEFORE, TEXT/SUBJECT/FROM, KEYWORD/UNKEYWORD, CHARSET과 literal 인자), UID FETCH(FLAGS,
+    RFC822.SIZE, INTERNALDATE, BODY.PEEK[HEADER], BODY.PEEK[TEXT]<0.n>, BODY.PEEK[]),
+    UID STORE, IDLE을 지원하며,
+    명령마다 `latency`초의 왕복 지연을 추가합니다. add_message()로 새 메일을 넣으면
+    IDLE 중인 연결에 EXISTS 알림을 보냅니다.
+    """
+
+    def __init__(self, message_count: int = 200, latency: float = 0.03, body_size: int = 4000,
+                 uidvalidity: int = 1):
+        """
+        Args:
+            message_count: 메일함에 들어 있는 메시지 수
+            latency: IMAP 명령 1회당 추가할 지연 시간 (초)
+            body_size: 생성 메시지 본문 크기 (바이트)
+            uidvalidity: 메일함 UIDVALIDITY
+        """
+        self.latency = latency
+        self.body_size = body_size
+        self.uidvalidity = uidvalidity
+        self.messages: List[StubMessage] = []
+        self.command_count = 0
+        self._lock = threading.Lock()
+        self._idlers: List = []
+        self._server = None
+        start = datetime.now() - timedelta(days=message_count)
+        for i in range(message_count):
+            self._append(self.make_message(i, body_size), internal_date=start + timedelta(days=i))
+
+    @staticmethod
+    def make_message(index: int, body_size: int = 4000) -> bytes:
+        """테스트용 메일 원문 생성 (짝수 번째는 협찬 제안, 홀수 번째는 뉴스레터)"""
+        message = EmailMessage()
+        if index % 2 == 0:
+            message['Subject'] = f'[협찬 제안] 브랜드 캠페인 #{index}'
+            sentence = f"안녕하세요. 협찬 제안 #{index} 드립니다. 영상 1개당 100만원을 지급합니다. "
+        else:
+            message['Subject'] = f'주간 뉴스레터 #{index}'
+            message['List-Unsubscribe'] = '<mailto:unsubscribe@news.example.com>'
+            sentence = f"이번 주 소식 #{index}을 전해 드립니다. "
+        message['From'] = f'Brand {index} <brand{index}@example.com>'
+        message['To'] = 'creator@example.com'
+        message['Date'] = format_datetime(datetime(2024, 1, 1, 9, 0))
+        message['Message-ID'] = f'<imap{index}@example.com>'
+        text = sentence * (body_size // len(sentence.encode('utf-8')) + 1)
+        text = text.encode('utf-8')[:body_size].decode('utf-8', errors='ignore')
+        message.set_content(text)
+        message.add_alternative(f'<html><body><p>{text}</p></body></html>', subtype='html')
+        return message.as_bytes(policy=policy.SMTP)
+
+    def _append(self, raw: bytes, flags: Optional[Set[str]] = None,
+                internal_date: Optional[datetime] = None) -> StubMessage:
+        uid = self.messages[-1].uid + 1 if self.messages else 1
+        msg = StubMessage(uid, raw, flags, internal_date)
+        self.messages.append(msg)
+        return msg
+
+    def add_message(self, raw: Optional[bytes] = None) -> int:
+        """새 메일 도착 (IDLE 중인 연결에 알림). 새 메시지의 UID 반환"""
+        with self._lock:
+            msg = self._append(raw or self.make_message(len(self.messages), self.body_size))
+            exists = len(self.messages)
+            idlers = list(self._idlers)
+        for notify in idlers:
+            try:
+                notify(exists)
+            except OSError:
+                pass
+        return msg.uid
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> 'ImapStubServer':
+        """백그라운드 스레드에서 서버 시작"""
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """서버 종료"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # 명령 처리
+    # ------------------------------------------------------------------
+
+    def search(self, criteria: List) -> List[int]:
+        """SEARCH 조건(나열된 조건은 AND)에 맞는 UID 목록"""
+        with self._lock:
+            messages = list(self.messages)
+        max_uid = messages[-1].uid if messages else 0
+        matched = []
+        for msg in messages:
+            tokens = list(criteria)
+            if tokens and str(tokens[0]).upper() == 'CHARSET':
+                tokens = tokens[2:]
+            ok = True
+            while tokens:
+                ok = self._match(msg, tokens, max_uid) and ok
+            if ok:
+                matched.append(msg.uid)
+        return matched
+
+    def _match(self, msg: StubMessage, tokens: List, max_uid: int) -> bool:
+        """검색 조건 하나를 tokens 앞에서 꺼내 평가 (OR, NOT, 괄호 목록 지원)"""
+        key = tokens.pop(0)
+        if isinstance(key, list):
+            group = list(key)
+            ok = True
+            while group:
+                ok = self._match(msg, group, max_uid) and ok
+            return ok
+        key = key.upper()
+        if key == 'OR':
+            left = self._match(msg, tokens, max_uid)
+            right = self._match(msg, tokens, max_uid)
+            return left or right
+        if key == 'NOT':
+            return not self._match(msg, tokens, max_uid)
+        if key == 'ALL':
+            return True
+        if key == 'UID':
+            return msg.uid in parse_uid_set(tokens.pop(0), max_uid)
+        if key in ('SEEN', 'UNSEEN', 'FLAGGED', 'UNFLAGGED'):
+            flag = '\\Seen' if key.endswith('SEEN') else '\\Flagged'
+            return (flag in msg.flags) != key.startswith('UN')
+        if key == 'SINCE':
+            return msg.internal_date.date() >= _parse_imap_date(tokens.pop(0)).date()
+        if key == 'BEFORE':
+            return msg.internal_date.date() < _parse_imap_date(tokens.pop(0)).date()
+        if key in ('TEXT', 'BODY', 'SUBJECT', 'FROM'):
+            value = tokens.pop(0)
+            value = value.decode('utf-8') if isinstance(value, bytes) else value
+            return value.lower() in (msg.sender if key == 'FROM' else msg.text)
+        if key == 'KEYWORD':
+            return tokens.pop(0) in msg.flags
+        if key == 'UNKEYWORD':
+            return tokens.pop(0) not in msg.flags
+        raise ValueError(f'지원하지 않는 검색 조건: {key}')
+
+    def fetch(self, uid_set: str, items: List[str]) -> List[bytes]:
+        """UID FETCH 응답 줄 목록"""
+        with self._lock:
+            messages = list(self.messages)
+        max_uid = messages[-1].uid if messages else 0
+        uids = parse_uid_set(uid_set, max_uid)
+        names = [item.upper() for item in items]
+        responses = []
+        for seq, msg in enumerate(messages, 1):
+            if msg.uid not in uids:
+                continue
+            parts = [f'UID {msg.uid}'.encode('ascii')]
+            literals = []
+            if 'FLAGS' in names:
+                parts.append(f"FLAGS ({' '.join(sorted(msg.flags))})".encode('ascii'))
+            if 'RFC822.SIZE' in names:
+                parts.append(f'RFC822.SIZE {len(msg.raw)}'.encode('ascii'))
+            if 'INTERNALDATE' in names:
+                parts.append(f'INTERNALDATE "{msg.internal_date.strftime("%d-%b-%Y %H:%M:%S")} +0900"'.encode('ascii'))
+            for name in names:
+                section = re.fullmatch(r'BODY(?:\.PEEK)?\[(HEADER|TEXT|)\](?:<(\d+)\.(\d+)>)?', name)
+                if name == 'RFC822':
+                    section = None
+                    literals.append((b'RFC822', msg.raw))
+                if not section:
+                    continue
+                kind, start, length = section.groups()
+                data = {'HEADER': msg.header, 'TEXT': msg.raw[len(msg.header):], '': msg.raw}[kind]
+                label = f'BODY[{kind}]'
+                if start is not None:
+                    data = data[int(start):int(start) + int(length)]
+                    label += f'<{start}>'
+                literals.append((label.encode('ascii'), data))
+            line = b'* ' + str(seq).encode('ascii') + b' FETCH (' + b' '.join(parts)
+            for label, data in literals:
+                line += b' ' + label + b' {' + str(len(data)).encode('ascii') + b'}\r\n' + data
+            responses.append(line + b')\r\n')
+        return responses
+
+    def store(self, uid_set: str, mode: str, flags: List[str]):
+        with self._lock:
+            max_uid = self.messages[-1].uid if self.messages else 0
+            uids = parse_uid_set(uid_set, max_uid)
+            for msg in self.messages:
+                if msg.uid in uids:
+                    if mode.startswith('+'):
+                        msg.flags.update(flags)
+                    elif mode.startswith('-'):
+                        msg.flags.difference_update(flags)
+                    else:
+                        msg.flags = set(flags)
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+
+            # 이 연결에 마지막으로 알려준 메시지 수 (SELECT 전에는 None)
+            exists = None
+
+            def write(self, data: bytes):
+                self.wfile.write(data)
+                self.wfile.flush()
+
+            def notify(self, exists: int):
+                """메일함이 늘었으면 EXISTS 응답 (실제 서버처럼 명령 응답이나 IDLE 중에 알림)"""
+                if self.exists is not None and exists != self.exists:
+                    self.exists = exists
+                    self.write(f'* {exists} EXISTS\r\n'.encode('ascii'))
+
+            def read_arguments(self, line: bytes) -> List:
+                """명령 인자 파싱 (따옴표 문자열, 괄호 목록, {n} literal 지원)"""
+                args = []
+                while True:
+                    literal = re.search(rb'\{(\d+)\}\r?\n?$', line)
+                    head = line[:literal.start()] if literal else line
+                    args.extend(_tokenize(head.decode('utf-8', errors='replace')))
+                    if not literal:
+                        return args
+                    self.write(b'+ Ready for literal\r\n')
+                    args.append(self.rfile.read(int(literal.group(1))))
+                    line = self.rfile.readline().rstrip(b'\r\n')
+
+            def handle(self):
+                self.write(b'* OK [CAPABILITY IMAP4rev1 IDLE] IMAP stub ready\r\n')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    time.sleep(stub.latency)
+                    with stub._lock:
+                        stub.command_count += 1
+                    args = self.read_arguments(line.rstrip(b'\r\n'))
+                    if len(args) < 2:
+                        continue
+                    tag, command, rest = args[0], args[1].upper(), args[2:]
+                    try:
+                        if not self.dispatch(tag, command, rest):
+                            return
+                    except Exception as e:
+                        self.write(f'{tag} BAD {e}\r\n'.encode('utf-8'))
+
+            def dispatch(self, tag: str, command: str, args: List) -> bool:
+                if command == 'UID':
+                    command, args = 'UID ' + args[0].upper(), args[1:]
+
+                if command == 'CAPABILITY':
+                    self.write(b'* CAPABILITY IMAP4rev1 IDLE\r\n')
+                elif command in ('LOGIN', 'NOOP', 'CHECK', 'CLOSE'):
+                    pass
+                elif command == 'LOGOUT':
+                    self.write(b'* BYE logging out\r\n')
+                    self.write(f'{tag} OK LOGOUT completed\r\n'.encode('ascii'))
+                    return False
+                elif command in ('SELECT', 'EXAMINE'):
+                    with stub._lock:
+                        exists = len(stub.messages)
+                        uidnext = (stub.messages[-1].uid if stub.messages else 0) + 1
+                    self.write(
+                        f'* {exists} EXISTS\r\n* 0 RECENT\r\n'
+                        f'* FLAGS (\\Seen \\Flagged \\Answered \\Deleted \\Draft)\r\n'
+                        f'* OK [PERMANENTFLAGS (\\Seen \\Flagged \\*)] Limited\r\n'
+                        f'* OK [UIDVALIDITY {stub.uidvalidity}] UIDs valid\r\n'
+                        f'* OK [UIDNEXT {uidnext}] Predicted next UID\r\n'.encode('ascii')
+                    )
+                    self.exists = exists
+                    mode = 'READ-ONLY' if command == 'EXAMINE' else 'READ-WRITE'
+                    self.write(f'{tag} OK [{mode}] {command} completed\r\n'.encode('ascii'))
+                    return True
+                elif command == 'STATUS':
+                    with stub._lock:
+                        uidnext = (stub.messages[-1].uid if stub.messages else 0) + 1
+                        exists = len(stub.messages)
+                    self.write(
+                        f'* STATUS {args[0]} (MESSAGES {exists} UIDNEXT {uidnext} '
+                        f'UIDVALIDITY {stub.uidvalidity})\r\n'.encode('ascii')
+                    )
+                elif command == 'UID SEARCH':
+                    uids = stub.search(args)
+                    self.write(('* SEARCH ' + ' '.join(map(str, uids))).rstrip().encode('ascii') + b'\r\n')
+                elif command == 'UID FETCH':
+                    items = args[1] if isinstance(args[1], list) else args[1:]
+                    for response in stub.fetch(args[0], items):
+                        self.write(response)
+                elif command == 'UID STORE':
+                    flags = args[2] if isinstance(args[2], list) else args[2:]
+                    stub.store(args[0], args[1].upper(), flags)
+                elif command == 'IDLE':
+                    self.write(b'+ idling\r\n')
+                    with stub._lock:
+                        stub._idlers.append(self.notify)
+                        exists = len(stub.messages)
+                    self.notify(exists)
+                    try:
+                        while True:
+                            line = self.rfile.readline()
+                            if not line or line.strip().upper() == b'DONE':
+                                break
+                    finally:
+                        with stub._lock:
+                            stub._idlers.remove(self.notify)
+                    if not line:
+                        return False
+                else:
+                    self.write(f'{tag} BAD unknown command {command}\r\n'.encode('ascii'))
+                    return True
+                with stub._lock:
+                    exists = len(stub.messages)
+                self.notify(exists)
+                self.write(f'{tag} OK {command} completed\r\n'.encode('ascii'))
+                return True
+
+        return Handler
+
+
+def _tokenize(text: str) -> List:
+    """IMAP 명령 인자 토큰화 (괄호 목록은 중첩 리스트로)"""
+    tokens = re.findall(r'"(?:[^"\\]|\\.)*"|\(|\)|[^\s()]+', text)
+    stack = [[]]
+    for token in tokens:
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            group = stack.pop()
+            stack[-1].append(group)
+        elif token.startswith('"'):
+            stack[-1].append(token[1:-1].replace('\\"', '"'))
+        else:
+            stack[-1].append(token)
+    return stack[0]
+
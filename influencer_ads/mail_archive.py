@@ -0,0 +1,371 @@
+"""
+메일 보관 파일(Google Takeout .mbox, .eml 폴더) 일괄 가져오기
+
+Gmail API 없이 과거 메일을 한 번에 분류할 때 사용합니다. mbox 파일은 메모리 매핑(mmap)한 뒤
+메시지 경계('From ' 줄)만 찾아 한 통씩 잘라 처리하므로 수 GB 파일도 메모리를 거의 쓰지 않습니다.
+
+사용법:
+    python mail_archive.py "Takeout/메일/전체보관함.mbox" --out archive_results.jsonl
+    python mail_archive.py ./eml_folder --out archive_results.jsonl --limit 500
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from mime_parser import MAX_BODY_BYTES, SNIPPET_SOURCE_BYTES, parse_message, raw_to_message
+from processed_ids import ProcessedIdSet
+
+# 메시지 하나에서 파싱할 최대 크기 (큰 첨부파일은 잘라서 본문과 헤더만 사용)
+MAX_ARCHIVE_MESSAGE_BYTES = 50 * 1024 * 1024
+
+# 처리한 메시지 ID를 이 개수마다 디스크에 반영 (fsync). 강제 종료되면 마지막 몇 개는 다시 분류될 수 있음
+DONE_IDS_FLUSH_EVERY = 100
+
+# Google Takeout의 X-Gmail-Labels 값 → Gmail 라벨 ID
+TAKEOUT_LABELS = {
+    'inbox': 'INBOX',
+    'unread': 'UNREAD',
+    'starred': 'STARRED',
+    'important': 'IMPORTANT',
+    'sent': 'SENT',
+    'drafts': 'DRAFT',
+    'draft': 'DRAFT',
+    'spam': 'SPAM',
+    'trash': 'TRASH',
+    'chat': 'CHAT',
+    'category promotions': 'CATEGORY_PROMOTIONS',
+    'category social': 'CATEGORY_SOCIAL',
+    'category updates': 'CATEGORY_UPDATES',
+    'category forums': 'CATEGORY_FORUMS',
+    'category personal': 'CATEGORY_PERSONAL'
+}
+
+# 기본으로 가져오지 않는 라벨 (협찬 검색의 DEFAULT_EXCLUSIONS와 같은 기준 + 스팸/휴지통)
+DEFAULT_SKIP_LABELS = {'SENT', 'DRAFT', 'CHAT', 'SPAM', 'TRASH'}
+
+# mbox 메시지 구분 줄 ('From 보낸사람 Mon Jan  1 00:00:00 2024')
+_FROM_LINE = re.compile(rb'From \S+.*\d\d:\d\d')
+# mboxrd 형식에서 본문의 'From '은 '>From '으로 이스케이프됨
+_ESCAPED_FROM = re.compile(rb'\n>(>*From )')
+_HEADER_END = re.compile(rb'\r?\n\r?\n')
+_MESSAGE_ID = re.compile(rb'^Message-ID:[ \t]*<?([^>\r\n]+)>?', re.IGNORECASE | re.MULTILINE)
+_GMAIL_LABELS = re.compile(rb'^X-Gmail-Labels:[ \t]*(.*(?:\r?\n[ \t].*)*)', re.IGNORECASE | re.MULTILINE)
+_GMAIL_THREAD = re.compile(rb'^X-GM-THRID:[ \t]*(\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+def iter_mbox_spans(data) -> Iterator[Tuple[int, int]]:
+    """
+    mbox 데이터(mmap 또는 bytes)에서 메시지 위치 찾기
+
+    Returns:
+        (메시지 시작, 끝) 오프셋. 시작은 'From ' 구분 줄 다음, 끝은 다음 구분 줄 앞
+    """
+    size = len(data)
+    if data[:5] == b'From ':
+        start = 0
+    else:
+        start = data.find(b'\nFrom ') + 1
+        if start == 0:
+            return
+    while start < size:
+        line_end = data.find(b'\n', start)
+        if line_end < 0:
+            return
+        body_start = line_end + 1
+
+        # 다음 구분 줄 찾기 (이스케이프되지 않은 본문의 'From '은 날짜 형식으로 걸러냄)
+        end = body_start
+        while True:
+            end = data.find(b'\nFrom ', end)
+            if end < 0:
+                end = size
+                break
+            next_line_end = data.find(b'\n', end + 1)
+            line = data[end + 1:next_line_end if next_line_end >= 0 else size]
+            if _FROM_LINE.match(line):
+                break
+            end += 1
+
+        yield body_start, end
+        start = end + 1
+
+
+def unescape_mbox(raw: bytes) -> bytes:
+    """mboxrd 이스케이프('>From ') 복원"""
+    if b'>From ' not in raw:
+        return raw
+    return _ESCAPED_FROM.sub(rb'\n\1', raw)
+
+
+def takeout_labels(headers: bytes) -> List[str]:
+    """X-Gmail-Labels 헤더의 라벨을 Gmail 라벨 ID로 변환 (모르는 라벨은 그대로)"""
+    match = _GMAIL_LABELS.search(headers)
+    if not match:
+        return []
+    value = re.sub(rb'\r?\n[ \t]', b' ', match.group(1)).decode('utf-8', errors='replace')
+    labels = []
+    for label in value.split(','):
+        label = label.strip()
+        if label:
+            labels.append(TAKEOUT_LABELS.get(label.lower(), label))
+    return labels
+
+
+class MailArchive:
+    """mbox 파일이나 .eml 폴더의 메일을 GmailClient와 같은 형식의 이메일 정보로 하나씩 읽는 클래스
+
+    Takeout mbox의 X-Gmail-Labels로 보낸 메일/임시보관/채팅/스팸은 건너뛰고,
+    relevance_filter가 있으면 헤더와 본문 앞부분만 먼저 파싱해 후보만 전체 파싱합니다.
+    이메일은 제너레이터로 한 통씩 돌려주므로 결과를 모아 두지 않으면 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, path: str, relevance_filter: Optional[Callable[[Dict], bool]] = None,
+                 max_body_bytes: Optional[int] = MAX_BODY_BYTES,
+                 skip_labels: Optional[set] = None):
+        """
+        Args:
+            path: .mbox 파일, .eml 파일 또는 .eml 파일이 있는 폴더
+            relevance_filter: 헤더와 본문 앞부분으로 파싱한 이메일을 받아 전체를 파싱할지 결정하는 함수
+                (예: GmailClient.is_sponsorship_candidate)
+            max_body_bytes: 본문으로 디코딩할 최대 바이트 수 (None이면 제한 없음)
+            skip_labels: 이 라벨이 붙은 메일은 건너뜀 (기본: DEFAULT_SKIP_LABELS)
+        """
+        self.path = path
+        self.relevance_filter = relevance_filter
+        self.max_body_bytes = max_body_bytes
+        self.skip_labels = DEFAULT_SKIP_LABELS if skip_labels is None else skip_labels
+        self.total_bytes = self._total_bytes()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """진행 통계 초기화"""
+        self.stats = {
+            'messages': 0,        # 읽은 메시지 수
+            'parsed': 0,          # 전체를 파싱한 메시지 수
+            'skipped_label': 0,   # 라벨(보낸 메일 등) 때문에 건너뛴 메시지 수
+            'skipped': 0,         # 후보가 아니어서 전체를 파싱하지 않은 메시지 수
+            'truncated': 0,       # MAX_ARCHIVE_MESSAGE_BYTES를 넘어 잘라서 파싱한 메시지 수
+            'bytes_scanned': 0    # 처리한 원문 크기
+        }
+
+    def _total_bytes(self) -> int:
+        if os.path.isdir(self.path):
+            return sum(os.path.getsize(path) for path in self._eml_paths())
+        return os.path.getsize(self.path)
+
+    def _eml_paths(self) -> Iterator[str]:
+        """폴더 안의 .eml 파일 경로 (하위 폴더 포함, 이름순)"""
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.eml'):
+                    yield os.path.join(root, name)
+
+    def iter_raw(self) -> Iterator[Tuple[str, bytes]]:
+        """(기본 ID, 메일 원문) 순회. 기본 ID는 Message-ID가 없을 때 사용하는 파일 위치"""
+        if os.path.isdir(self.path):
+            for path in self._eml_paths():
+                with open(path, 'rb') as f:
+                    raw = f.read(MAX_ARCHIVE_MESSAGE_BYTES + 1)
+                self.stats['bytes_scanned'] += os.path.getsize(path)
+                yield os.path.relpath(path, self.path), raw
+            return
+
+        if not self.path.lower().endswith('.mbox'):
+            with open(self.path, 'rb') as f:
+                raw = f.read(MAX_ARCHIVE_MESSAGE_BYTES + 1)
+            self.stats['bytes_scanned'] = self.total_bytes
+            yield os.path.basename(self.path), raw
+            return
+
+        if os.path.getsize(self.path) == 0:
+            return
+        name = os.path.basename(self.path)
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start, end in iter_mbox_spans(data):
+                # 메시지 하나만 복사 (너무 큰 메시지는 앞부분만)
+                raw = data[start:min(end, start + MAX_ARCHIVE_MESSAGE_BYTES + 1)]
+                self.stats['bytes_scanned'] = end
+                yield f'{name}:{start}', unescape_mbox(raw)
+
+    def iter_emails(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        보관 파일의 이메일 정보를 한 통씩 반환 (GmailClient._parse_email과 같은 형식)
+
+        Args:
+            limit: 최대 반환 개수 (None이면 전체)
+        """
+        returned = 0
+        for default_id, raw in self.iter_raw():
+            if limit is not None and returned >= limit:
+                return
+            self.stats['messages'] += 1
+
+            if len(raw) > MAX_ARCHIVE_MESSAGE_BYTES:
+                raw = raw[:MAX_ARCHIVE_MESSAGE_BYTES]
+                self.stats['truncated'] += 1
+
+            header_end = _HEADER_END.search(raw)
+            headers = raw[:header_end.end()] if header_end else raw
+            labels = takeout_labels(headers)
+            if self.skip_labels & set(labels):
+                self.stats['skipped_label'] += 1
+                continue
+
+            message_id = _MESSAGE_ID.search(headers)
+            message_id = message_id.group(1).decode('ascii', errors='replace').strip() if message_id else default_id
+            thread_id = _GMAIL_THREAD.search(headers)
+            thread_id = thread_id.group(1).decode('ascii') if thread_id else ''
+
+            if self.relevance_filter is not None:
+                preview = raw_to_message(raw[:len(headers) + SNIPPET_SOURCE_BYTES], message_id,
+                                         labels, thread_id, size=len(raw))
+                if not self.relevance_filter(parse_message(preview, self.max_body_bytes)):
+                    self.stats['skipped'] += 1
+                    continue
+
+            self.stats['parsed'] += 1
+            returned += 1
+            yield parse_message(raw_to_message(raw, message_id, labels, thread_id), self.max_body_bytes)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_emails()
+
+    def progress(self) -> float:
+        """처리한 비율 (0~1)"""
+        return min(1.0, self.stats['bytes_scanned'] / self.total_bytes) if self.total_bytes else 1.0
+
+
+def classify_archive(archive: MailArchive, classifier, out_path: str, prefilter=None,
+                     limit: Optional[int] = None, delay: float = 1.0,
+                     done_ids: Optional[ProcessedIdSet] = None) -> Dict:
+    """
+    보관 파일의 메일을 읽는 즉시 분류해 JSON Lines 파일에 한 줄씩 기록
+
+    Args:
+        archive: MailArchive
+        classifier: SponsorshipClassifier
+        out_path: 결과를 추가할 .jsonl 파일
+        prefilter: BulkMailPrefilter (대량 발송 메일은 분류 API 호출 없이 기록)
+        limit: 최대 분류 개수 (이미 분류해 건너뛴 메일은 세지 않음)
+        delay: 분류 API 호출 사이 대기 시간 (초)
+        done_ids: 이미 분류한 메시지 ID 집합 (있으면 건너뛰고, 새로 분류한 ID를 추가해
+            DONE_IDS_FLUSH_EVERY개마다와 끝날 때 디스크에 반영)
+
+    Returns:
+        카테고리별 개수
+    """
+    counts: Dict[str, int] = {}
+    already_done = 0
+    failed = 0
+    unflushed = 0
+    started = time.time()
+    with open(out_path, 'a', encoding='utf-8') as out:
+        try:
+            for email_data in archive.iter_emails():
+                if done_ids is not None and email_data['id'] in done_ids:
+                    already_done += 1
+                    continue
+                if limit is not None and sum(counts.values()) >= limit:
+                    break
+                reason = prefilter.apply(email_data) if prefilter else None
+                if reason:
+                    classification, explanation, details = prefilter.skip_result(reason)
+                else:
+                    try:
+                        classification, explanation, details = classifier.classify_email(email_data)
+                    except Exception as e:
+                        # 일시적 API 오류: 기록하지 않고 넘어감 (처리한 ID에 없으므로 다시 실행하면 다시 분류)
+                        print(f"\n분류하지 못했습니다 ({email_data['id']}): {e}", file=sys.stderr)
+                        failed += 1
+                        time.sleep(delay)
+                        continue
+                    time.sleep(delay)
+
+                out.write(json.dumps({
+                    'id': email_data['id'],
+                    'thread_id': email_data['thread_id'],
+                    'subject': email_data['subject'],
+                    'sender': email_data['sender'],
+                    'date': email_data['date'],
+                    'classification': classification,
+                    'explanation': explanation,
+                    'details': details
+                }, ensure_ascii=False) + '\n')
+                out.flush()
+                if done_ids is not None:
+                    done_ids.add(email_data['id'])
+                    unflushed += 1
+                    if unflushed >= DONE_IDS_FLUSH_EVERY:
+                        done_ids.flush()
+                        unflushed = 0
+                counts[classification] = counts.get(classification, 0) + 1
+
+                print(f"\r{archive.progress() * 100:5.1f}% · 읽은 메일 {archive.stats['messages']}개 · "
+                      f"분류 {sum(counts.values())}개 · 이미 분류 {already_done}개 · 실패 {failed}개 · "
+                      f"{time.time() - started:.0f}초",
+                      end='', file=sys.stderr)
+        finally:
+            # 중단되더라도 이미 기록한 결과의 ID는 디스크에 남김
+            if done_ids is not None and unflushed:
+                done_ids.flush()
+    print(file=sys.stderr)
+    return counts
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from classifier import SponsorshipClassifier
+    from gmail_client import GmailClient
+    from prefilter import BulkMailPrefilter
+
+    parser = argparse.ArgumentParser(description="메일 보관 파일(mbox, eml) 일괄 분류")
+    parser.add_argument('path', help=".mbox 파일, .eml 파일 또는 .eml 폴더")
+    parser.add_argument('--out', default='archive_results.jsonl', help="결과 JSON Lines 파일")
+    parser.add_argument('--limit', type=int, help="최대 분류 개수")
+    parser.add_argument('--delay', type=float, default=1.0, help="분류 API 호출 사이 대기 (초)")
+    parser.add_argument('--all', action='store_true', help="협찬 키워드가 없는 메일도 분류")
+    parser.add_argument('--no-prefilter', action='store_true', help="대량 발송 메일 사전 필터 끄기")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv('CLOVA_STUDIO_KEY')
+    if not api_key:
+        parser.error("CLOVA_STUDIO_KEY 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
+
+    # 같은 결과 파일로 다시 실행하면 이미 분류한 메일은 건너뜀
+    done_ids = ProcessedIdSet(os.path.splitext(args.out)[0] + '.processed')
+    if not len(done_ids) and os.path.exists(args.out):
+        with open(args.out, 'r', encoding='utf-8') as f:
+            done_ids.update(json.loads(line)['id'] for line in f if line.strip())
+
+    archive = MailArchive(
+        args.path,
+        relevance_filter=None if args.all else GmailClient.is_sponsorship_candidate
+    )
+    classifier = SponsorshipClassifier(api_key)
+    counts = classify_archive(
+        archive,
+        classifier,
+        args.out,
+        prefilter=None if args.no_prefilter else BulkMailPrefilter(),
+        limit=args.limit,
+        delay=args.delay,
+        done_ids=done_ids
+    )
+    done_ids.close()
+    classifier.close()
+    print(f"완료: {archive.stats['messages']}개 중 {sum(counts.values())}개 분류 "
+          f"(후보 아님 {archive.stats['skipped']}개, 보낸 메일 등 {archive.stats['skipped_label']}개 제외)")
+    for category, count in counts.items():
+        print(f"  {category}: {count}개")
+
+
+if __name__ == '__main__':
+    main()
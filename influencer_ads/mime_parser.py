@@ -0,0 +1,538 @@
+import base64
+import codecs
+import email
+import math
+import re
+from email import policy
+from email.header import decode_header
+from email.message import Message
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional
+
+# 파이썬 코덱 이름이 없거나 더 좁은 범위를 가리키는 한국어 메일 charset 별칭
+# (EUC-KR로 표시된 메일도 실제로는 확장 완성형(CP949) 문자를 쓰는 경우가 많음)
+CHARSET_ALIASES = {
+    'euc-kr': 'cp949',
+    'euc_kr': 'cp949',
+    'ks_c_5601-1987': 'cp949',
+    'ks_c_5601': 'cp949',
+    'x-windows-949': 'cp949',
+    'unicode-1-1-utf-7': 'utf-7'
+}
+
+# charset 선언이 없거나 잘못된 경우 순서대로 시도할 인코딩
+FALLBACK_CHARSETS = ['utf-8', 'cp949']
+
+# HTML → 텍스트 변환 시 한 번에 파서에 넣을 문자 수
+HTML_CHUNK_SIZE = 64 * 1024
+
+# 본문으로 디코딩할 최대 바이트 수 (이후 내용은 버림)
+MAX_BODY_BYTES = 256 * 1024
+
+# 원문 메일로 snippet을 만들 때 디코딩할 본문 바이트 수와 snippet 글자 수
+SNIPPET_SOURCE_BYTES = 4096
+SNIPPET_CHARS = 200
+
+# 줄바꿈으로 바꿀 블록 태그
+BLOCK_TAGS = {
+    'p', 'div', 'br', 'tr', 'li', 'ul', 'ol', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'section', 'article', 'header', 'footer', 'hr', 'pre'
+}
+
+# 내용을 통째로 버릴 태그
+SKIP_TAGS = {'script', 'style', 'head', 'title', 'noscript', 'template'}
+
+# 회신/전달 메일에서 이 줄부터는 이전 메일 인용으로 보고 버림
+QUOTE_HEADER_PATTERNS = [
+    re.compile(r'^On .+wrote:$'),
+    re.compile(r'^-+\s*(Original Message|Forwarded message|원본 메시지|전달된 메시지)\s*-+', re.IGNORECASE),
+    re.compile(r'^\d{4}년 .+작성:$'),
+    re.compile(r'^(From|보낸 사람)\s*:.+')
+]
+
+
+def get_header(part: Dict, name: str) -> str:
+    """파트 헤더 값 조회 (대소문자 무시)"""
+    name = name.lower()
+    for header in part.get('headers', []):
+        if header['name'].lower() == name:
+            return header['value']
+    return ''
+
+
+def get_charset(part: Dict) -> Optional[str]:
+    """Content-Type 헤더의 charset 파라미터 반환"""
+    match = re.search(r'charset\s*=\s*"?([^";\s]+)', get_header(part, 'Content-Type'), re.IGNORECASE)
+    return match.group(1).lower() if match else None
+
+
+def is_attachment(part: Dict) -> bool:
+    """첨부파일 파트인지 확인"""
+    if part.get('filename'):
+        return True
+    if part.get('body', {}).get('attachmentId'):
+        return True
+    return get_header(part, 'Content-Disposition').lower().startswith('attachment')
+
+
+def walk_parts(payload: Dict) -> Iterator[Dict]:
+    """multipart 구조를 깊이 우선으로 따라가며 말단 파트를 반환"""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            # 원래 순서대로 방문하도록 역순으로 쌓음
+            stack.extend(reversed(children))
+        else:
+            yield part
+
+
+def list_attachments(payload: Dict) -> List[Dict]:
+    """
+    첨부파일 목록 (본문 데이터 없이 다운로드에 필요한 정보만)
+
+    Returns:
+        [{'filename', 'mime_type', 'size', 'attachment_id', 'part_index'}] 리스트.
+        attachment_id가 없는 첨부파일(IMAP, 보관 파일 메일과 Gmail의 작은 첨부파일)은 내용이 메시지에
+        바로 들어 있으므로, 메시지를 다시 받아 part_index(walk_parts 순서)의 파트를 디코딩합니다.
+    """
+    attachments = []
+    for part_index, part in enumerate(walk_parts(payload or {})):
+        if not is_attachment(part):
+            continue
+        body = part.get('body', {})
+        attachments.append({
+            'filename': part.get('filename', ''),
+            'mime_type': part.get('mimeType', '').lower(),
+            'size': body.get('size', 0),
+            'attachment_id': body.get('attachmentId', ''),
+            'part_index': part_index
+        })
+    return attachments
+
+
+def attachment_part(payload: Dict, part_index: int) -> Optional[Dict]:
+    """list_attachments의 part_index에 해당하는 파트 (없으면 None)"""
+    for index, part in enumerate(walk_parts(payload or {})):
+        if index == part_index:
+            return part
+    return None
+
+
+def decode_bytes(data, charset: Optional[str] = None, truncated: bool = False) -> str:
+    """
+    바이트(또는 memoryview)를 문자열로 디코딩
+
+    선언된 charset을 먼저 시도하고, 실패하면 UTF-8 → CP949 순서로 시도합니다.
+    모두 실패하면 깨진 문자를 대체 문자로 바꿔서라도 반환합니다.
+
+    Args:
+        data: 디코딩할 바이트열 (bytes-like)
+        charset: 선언된 문자 인코딩
+        truncated: 중간에 잘린 데이터이면 True (끝의 불완전한 멀티바이트 문자는 버림)
+    """
+    candidates = []
+    if charset:
+        candidates.append(CHARSET_ALIASES.get(charset, charset))
+    candidates += [c for c in FALLBACK_CHARSETS if c not in candidates]
+
+    for candidate in candidates:
+        try:
+            decoder = codecs.getincrementaldecoder(candidate)()
+            return decoder.decode(data, final=not truncated)
+        except (LookupError, UnicodeDecodeError):
+            continue
+
+    return str(data, 'utf-8', errors='replace')
+
+
+def decode_part_data(part: Dict, max_bytes: Optional[int] = None) -> bytes:
+    """
+    파트 본문(base64url)을 바이트로 디코딩
+
+    max_bytes를 지정하면 base64 문자열 중 그 크기에 해당하는 앞부분만 디코딩합니다.
+    """
+    data = part.get('body', {}).get('data', '')
+    if max_bytes is not None:
+        # base64 4글자 = 3바이트
+        data = data[:math.ceil(max_bytes / 3) * 4]
+    # Gmail은 패딩을 생략하는 경우가 있어 보충
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def decode_part(part: Dict) -> str:
+    """파트 본문을 charset에 맞춰 문자열로 디코딩"""
+    return decode_bytes(decode_part_data(part), get_charset(part))
+
+
+class HtmlToTextParser(HTMLParser):
+    """HTML을 조금씩 받아 읽을 수 있는 텍스트로 바꾸는 스트리밍 파서
+
+    feed()로 여러 번 나누어 넣을 수 있으며, 스크립트/스타일은 버리고
+    블록 태그는 줄바꿈으로, 링크는 '텍스트 (URL)' 형태로 남깁니다.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._chunks: List[str] = []
+        self._skip_depth = 0
+        self._href: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._chunks.append('\n')
+        elif tag == 'a':
+            self._href = dict(attrs).get('href')
+        elif tag == 'td':
+            self._chunks.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._chunks.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._chunks.append('\n')
+        elif tag == 'a':
+            if self._href and self._href.startswith('http'):
+                self._chunks.append(f' ({self._href})')
+            self._href = None
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._chunks.append(data)
+
+    def get_text(self) -> str:
+        """지금까지 변환된 텍스트 (공백 정리)"""
+        text = ''.join(self._chunks)
+        text = re.sub(r'[ \t\r\f\v\xa0]+', ' ', text)
+        text = re.sub(r' *\n *', '\n', text)
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        return text.strip()
+
+
+def html_to_text(html: str) -> str:
+    """HTML 문자열을 일반 텍스트로 변환"""
+    parser = HtmlToTextParser()
+    for start in range(0, len(html), HTML_CHUNK_SIZE):
+        parser.feed(html[start:start + HTML_CHUNK_SIZE])
+    parser.close()
+    return parser.get_text()
+
+
+def strip_quoted_text(text: str) -> str:
+    """회신 메일 본문에서 인용된 이전 메일('>' 줄, 'On ... wrote:' 이후)을 제거"""
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if any(pattern.match(stripped) for pattern in QUOTE_HEADER_PATTERNS):
+            break
+        if stripped.startswith('>'):
+            continue
+        lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+def find_body_part(payload: Dict) -> Optional[Dict]:
+    """
+    본문으로 사용할 파트 선택
+
+    중첩된 multipart(예: multipart/mixed > multipart/alternative)를 모두 따라가
+    첫 번째 text/plain 파트를, 없으면 첫 번째 text/html 파트를 반환합니다.
+    첨부파일과 이미지 등 텍스트가 아닌 파트는 디코딩하지 않고 건너뜁니다.
+    """
+    html_part = None
+    for part in walk_parts(payload):
+        if is_attachment(part) or not part.get('body', {}).get('data'):
+            continue
+        mime_type = part.get('mimeType', '').lower()
+        if mime_type == 'text/plain':
+            return part
+        if mime_type == 'text/html' and html_part is None:
+            html_part = part
+    return html_part
+
+
+class LazyBody:
+    """처음 접근할 때만 디코딩하는 이메일 본문
+
+    본문 파트의 base64 데이터 중 max_bytes에 해당하는 앞부분만 디코딩해
+    memoryview로 보관하므로, 잘라 읽을 때(slice) 복사가 일어나지 않습니다.
+    텍스트로 변환한 뒤에는 원본 payload 참조를 놓아 메모리에서 해제되게 합니다.
+    """
+
+    def __init__(self, payload: Dict, max_bytes: Optional[int] = MAX_BODY_BYTES, fallback: str = ''):
+        """
+        Args:
+            payload: Gmail 메시지 payload
+            max_bytes: 디코딩할 최대 바이트 수 (None이면 제한 없음)
+            fallback: 디코딩에 실패했을 때 사용할 텍스트 (예: snippet)
+        """
+        self.max_bytes = max_bytes
+        self.fallback = fallback
+        self._part = find_body_part(payload) if payload else None
+        self._buffer: Optional[memoryview] = None
+        self._text: Optional[str] = None
+        self.truncated = False
+
+    @property
+    def mime_type(self) -> str:
+        return self._part.get('mimeType', '').lower() if self._part else ''
+
+    @property
+    def buffer(self) -> memoryview:
+        """디코딩된 본문 바이트 (최대 max_bytes)"""
+        if self._buffer is None:
+            if self._part is None:
+                self._buffer = memoryview(b'')
+            else:
+                size = self._part.get('body', {}).get('size', 0)
+                data = decode_part_data(self._part, self.max_bytes)
+                self.truncated = self.max_bytes is not None and (
+                    len(data) > self.max_bytes or size > self.max_bytes
+                )
+                self._buffer = memoryview(data)[:self.max_bytes]
+        return self._buffer
+
+    def slice(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """복사 없이 디코딩된 본문의 일부를 반환"""
+        return self.buffer[start:end]
+
+    @property
+    def text(self) -> str:
+        """본문 텍스트 (HTML이면 일반 텍스트로 변환)"""
+        if self._text is None:
+            try:
+                charset = get_charset(self._part) if self._part else None
+                text = decode_bytes(self.buffer, charset, truncated=self.truncated)
+                if self.mime_type == 'text/html':
+                    text = html_to_text(text)
+                self._text = text
+            except Exception as e:
+                print(f"본문 디코딩 오류: {e}")
+                self._text = self.fallback
+            # 텍스트가 준비되면 원본 데이터는 더 이상 필요 없음
+            self._part = None
+            self._buffer = None
+        return self._text
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class LazyEmail(dict):
+    """'body' 값을 처음 읽을 때 디코딩하는 이메일 정보 dict
+
+    email['body'], email.get('body'), 'body' in email 은 일반 dict처럼 동작하고,
+    전체를 순회하거나 복사할 때({**email} 등)도 본문을 디코딩해 포함합니다.
+    """
+
+    def __init__(self, *args, body: LazyBody, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lazy_body = body
+
+    def _materialize(self):
+        if self._lazy_body is not None:
+            self['body'] = self._lazy_body.text
+
+    def __missing__(self, key):
+        if key == 'body' and self._lazy_body is not None:
+            self._materialize()
+            return dict.__getitem__(self, 'body')
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'body':
+            self._lazy_body = None
+        super().__setitem__(key, value)
+
+    def __contains__(self, key):
+        return super().__contains__(key) or (key == 'body' and self._lazy_body is not None)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        self._materialize()
+        return super().__iter__()
+
+    def __len__(self):
+        self._materialize()
+        return super().__len__()
+
+    def keys(self):
+        self._materialize()
+        return super().keys()
+
+    def items(self):
+        self._materialize()
+        return super().items()
+
+    def values(self):
+        self._materialize()
+        return super().values()
+
+    def copy(self):
+        self._materialize()
+        return dict(super().items())
+
+    def __reduce__(self):
+        # pickle(세션 저장 등) 시에는 일반 dict로 저장
+        self._materialize()
+        return (dict, (dict(super().items()),))
+
+
+def extract_body(payload: Dict, max_bytes: Optional[int] = MAX_BODY_BYTES) -> str:
+    """이메일 본문 텍스트 추출 (find_body_part로 고른 파트를 디코딩)"""
+    return LazyBody(payload, max_bytes).text
+
+
+def decode_header_value(value) -> str:
+    """
+    원문 메일 헤더 값 디코딩 (RFC 2047 인코딩, 인코딩 없이 들어온 8비트 한글, 접힌 줄 처리)
+
+    charset은 decode_bytes와 같은 별칭/대체 규칙을 사용하며, 디코딩에 실패하면 원문을 반환합니다.
+    """
+    if not isinstance(value, str):
+        value = str(value)
+    value = re.sub(r'\r?\n[ \t]+', ' ', value)
+    try:
+        if '=?' not in value:
+            # compat32 파서는 8비트 헤더를 surrogateescape로 남겨 둠
+            return decode_bytes(value.encode('ascii', 'surrogateescape')) if not value.isascii() else value
+        parts = []
+        for data, charset in decode_header(value):
+            parts.append(decode_bytes(data, charset) if isinstance(data, bytes) else data)
+        return ''.join(parts)
+    except Exception:
+        return value
+
+
+def message_to_payload(message: Message) -> Dict:
+    """
+    email 패키지의 Message(IMAP, mbox 등 원문 메일)를 Gmail API payload 형식으로 변환
+
+    변환해 두면 본문 추출(extract_body, LazyBody)과 첨부파일 목록을 Gmail 메시지와 같은 코드로 처리합니다.
+    헤더 값은 Gmail API처럼 디코딩된 문자열로 넣습니다.
+    """
+    headers = [
+        {'name': name, 'value': decode_header_value(value)}
+        # raw_items: 8비트 헤더가 대체 문자로 바뀌기 전의 원래 값
+        for name, value in message.raw_items()
+    ]
+
+    payload = {
+        'mimeType': message.get_content_type(),
+        'filename': decode_header_value(message.get_filename() or ''),
+        'headers': headers,
+        'body': {'size': 0}
+    }
+
+    if message.is_multipart():
+        payload['parts'] = [message_to_payload(part) for part in message.get_payload()]
+    else:
+        data = message.get_payload(decode=True) or b''
+        payload['body'] = {
+            'size': len(data),
+            'data': base64.urlsafe_b64encode(data).decode('ascii')
+        }
+    return payload
+
+
+def raw_to_message(raw: bytes, message_id: str, label_ids: Optional[List[str]] = None,
+                   thread_id: str = '', size: Optional[int] = None) -> Dict:
+    """
+    원문 메일(RFC 822 바이트)을 Gmail 메시지 리소스 형식으로 변환 (parse_message로 파싱)
+
+    Args:
+        raw: 메일 원문 (헤더만 있거나 본문 앞부분만 있어도 됨)
+        message_id: 메시지 ID (IMAP UID, 보관 파일의 Message-ID 등)
+        label_ids: Gmail 라벨 ID 형식의 상태 (UNREAD, STARRED, CATEGORY_PROMOTIONS 등)
+        thread_id: 대화 ID
+        size: 전체 메일 크기 (raw가 일부분일 때)
+    """
+    # policy.default의 헤더 객체 생성은 느리므로 compat32로 파싱하고 헤더는 decode_header_value로 디코딩
+    payload = message_to_payload(email.message_from_bytes(raw, policy=policy.compat32))
+    snippet = ' '.join(extract_body(payload, max_bytes=SNIPPET_SOURCE_BYTES).split())[:SNIPPET_CHARS]
+    return {
+        'id': message_id,
+        'threadId': thread_id,
+        'labelIds': list(label_ids or []),
+        'snippet': snippet,
+        'sizeEstimate': len(raw) if size is None else size,
+        'payload': payload
+    }
+
+
+def parse_message(msg: Dict, max_body_bytes: Optional[int] = MAX_BODY_BYTES) -> LazyEmail:
+    """
+    Gmail 메시지 리소스(또는 같은 형식으로 변환한 메시지)를 이메일 정보로 파싱
+
+    Args:
+        msg: id, threadId, labelIds, snippet, payload를 가진 메시지 딕셔너리
+        max_body_bytes: 본문으로 디코딩할 최대 바이트 수 (None이면 제한 없음)
+    """
+    headers = msg['payload']['headers']
+
+    # 헤더에서 정보 추출
+    subject = ''
+    sender = ''
+    date = ''
+    list_unsubscribe = ''
+    precedence = ''
+    return_path = ''
+    message_id_header = ''
+    references = ''
+
+    for header in headers:
+        # 원본 메일의 헤더 이름 대소문자가 제각각이므로 소문자로 비교
+        name = header['name'].lower()
+        if name == 'subject':
+            subject = header['value']
+        elif name == 'from':
+            sender = header['value']
+        elif name == 'date':
+            date = header['value']
+        elif name == 'list-unsubscribe':
+            list_unsubscribe = header['value']
+        elif name == 'precedence':
+            precedence = header['value']
+        elif name == 'return-path':
+            return_path = header['value']
+        elif name == 'message-id':
+            message_id_header = header['value']
+        elif name == 'references':
+            references = header['value']
+
+    # 이메일 본문은 처음 읽을 때 디코딩 (실패하면 이 이메일만 snippet으로 대체)
+    body = LazyBody(msg['payload'], max_body_bytes, fallback=msg.get('snippet', ''))
+
+    return LazyEmail(
+        {
+            'id': msg['id'],
+            'thread_id': msg.get('threadId', ''),
+            'subject': subject,
+            'sender': sender,
+            'date': date,
+            'snippet': msg.get('snippet', ''),
+            'list_unsubscribe': list_unsubscribe,
+            'precedence': precedence,
+            'return_path': return_path,
+            'label_ids': msg.get('labelIds', []),
+            'message_id_header': message_id_header,
+            'references': references,
+            'attachments': [
+                {**attachment, 'message_id': msg['id']}
+                for attachment in list_attachments(msg['payload'])
+            ]
+        },
+        body=body
+    )
@@ -0,0 +1,149 @@
+from email.utils import parseaddr
+from typing import Dict, List, Optional, Tuple
+
+from attachments import document_attachments
+from gmail_query import STRONG_SPONSORSHIP_KEYWORDS
+
+# 대량 발송으로 보는 Precedence 헤더 값
+BULK_PRECEDENCE = {'bulk', 'list', 'junk'}
+
+# 대량 발송으로 보는 Gmail 카테고리 라벨
+BULK_LABELS = {'CATEGORY_PROMOTIONS', 'CATEGORY_SOCIAL'}
+
+# 뉴스레터/마케팅 메일 발송 서비스(ESP) 도메인 (발신자 또는 Return-Path 도메인 기준)
+ESP_DOMAINS = [
+    'mcsv.net',            # Mailchimp
+    'mcdlv.net',
+    'rsgsv.net',
+    'mailchimpapp.net',
+    'sendgrid.net',
+    'amazonses.com',
+    'mailgun.org',
+    'sendinblue.com',
+    'brevo.com',
+    'hubspotemail.net',
+    'hs-email.net',
+    'klaviyomail.com',
+    'exacttarget.com',     # Salesforce Marketing Cloud
+    'exct.net',
+    'createsend.com',      # Campaign Monitor
+    'cmail19.com',
+    'cmail20.com',
+    'constantcontact.com',
+    'mailerlite.com',
+    'stibee.com',          # 스티비
+    'maily.so',            # 메일리
+]
+
+# 건너뛴 사유별 표시명
+SKIP_REASONS = {
+    'precedence': 'Precedence: bulk 헤더',
+    'category': '프로모션/소셜 탭 메일',
+    'esp': '대량 발송 서비스 도메인',
+    'list_unsubscribe': '수신 거부 링크(List-Unsubscribe)'
+}
+
+
+def _domain(address: str) -> str:
+    """'이름 <user@example.com>' 형태의 주소에서 도메인 추출 (소문자)"""
+    _, email_address = parseaddr(address or '')
+    return email_address.rpartition('@')[2].lower()
+
+
+def is_esp_domain(domain: str) -> bool:
+    """ESP 도메인 또는 그 하위 도메인인지 확인"""
+    return any(domain == esp or domain.endswith('.' + esp) for esp in ESP_DOMAINS)
+
+
+class BulkMailPrefilter:
+    """헤더 정보만으로 마케팅/뉴스레터 메일을 걸러내는 사전 필터
+
+    번역(Papago)과 분류(HyperCLOVA) 전에 실행해서 대량 발송 메일은 유료 API 호출 없이
+    not_sponsorship으로 처리합니다. 제목이나 snippet에 강한 협찬 키워드가 있거나
+    내가 회신한 대화는 대량 발송 신호가 있어도 걸러내지 않습니다.
+    대량 발송 신호가 있지만 PDF/DOCX 같은 문서가 첨부된 메일은 미디어킷일 수 있어
+    걸러내지 않고 '모호한 메일'로 표시합니다 (is_ambiguous).
+    """
+
+    def __init__(self):
+        self.reset_stats()
+
+    def reset_stats(self):
+        """실행 단위 통계 초기화"""
+        self.stats = {
+            'checked': 0,
+            'skipped': 0,
+            'ambiguous': 0,
+            'by_reason': {reason: 0 for reason in SKIP_REASONS}
+        }
+
+    def check(self, email_data: Dict) -> Optional[str]:
+        """
+        대량 발송 메일인지 판정
+
+        Args:
+            email_data: GmailClient가 파싱한 이메일(또는 대화) 정보
+
+        Returns:
+            걸러낼 대량 발송 메일이면 사유 키(SKIP_REASONS), 아니면 None
+        """
+        reason = self.bulk_reason(email_data)
+        if reason is not None and document_attachments(email_data):
+            return None
+        return reason
+
+    def is_ambiguous(self, email_data: Dict) -> bool:
+        """대량 발송 신호가 있지만 문서 첨부파일 때문에 걸러내지 않은 메일인지 확인"""
+        return self.bulk_reason(email_data) is not None and bool(document_attachments(email_data))
+
+    def bulk_reason(self, email_data: Dict) -> Optional[str]:
+        """첨부파일을 고려하지 않은 대량 발송 신호 (사유 키 또는 None)"""
+        if email_data.get('replied'):
+            return None
+
+        text = f"{email_data.get('subject', '')} {email_data.get('snippet', '')}".lower()
+        if any(keyword in text for keyword in STRONG_SPONSORSHIP_KEYWORDS):
+            return None
+
+        if email_data.get('precedence', '').strip().lower() in BULK_PRECEDENCE:
+            return 'precedence'
+        if BULK_LABELS & set(email_data.get('label_ids', [])):
+            return 'category'
+        if any(is_esp_domain(_domain(email_data.get(key, ''))) for key in ('sender', 'return_path')):
+            return 'esp'
+        if email_data.get('list_unsubscribe'):
+            return 'list_unsubscribe'
+        return None
+
+    def apply(self, email_data: Dict) -> Optional[str]:
+        """check()와 같지만 결과를 실행 통계에 누적"""
+        self.stats['checked'] += 1
+        reason = self.check(email_data)
+        if reason is not None:
+            self.stats['skipped'] += 1
+            self.stats['by_reason'][reason] += 1
+        elif self.is_ambiguous(email_data):
+            self.stats['ambiguous'] += 1
+        return reason
+
+    def skip_result(self, reason: str) -> Tuple[str, str, Dict]:
+        """걸러낸 메일의 분류 결과 (SponsorshipClassifier.classify_email과 같은 형식)"""
+        explanation = f"대량 발송 메일로 판단되어 번역/분류를 건너뛰었습니다 ({SKIP_REASONS[reason]})."
+        return 'not_sponsorship', explanation, {'사전 필터': SKIP_REASONS[reason]}
+
+    def split(self, emails: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, str]]]:
+        """
+        이메일 목록을 분류할 메일과 걸러낸 메일로 나누고 통계 누적
+
+        Returns:
+            (분류할 이메일 리스트, (걸러낸 이메일, 사유) 리스트)
+        """
+        kept = []
+        skipped = []
+        for email_data in emails:
+            reason = self.apply(email_data)
+            if reason is None:
+                kept.append(email_data)
+            else:
+                skipped.append((email_data, reason))
+        return kept, skipped
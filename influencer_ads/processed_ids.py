@@ -0,0 +1,308 @@
+"""
+처리 완료 메시지 ID 집합 - 수백만 개 규모의 "이미 처리했나?" 판정
+
+Gmail 메시지 ID는 16자리 16진수(64비트 정수)이므로 8바이트 정수로 압축해 저장합니다.
+(Message-ID 헤더처럼 16진수가 아닌 ID는 64비트 해시로 바꿔 저장)
+
+파일 구성 (path가 'backfill_jobs/작업/processed'이면):
+    processed.ids   : 정렬된 uint64 배열. mmap으로 열어 이진 탐색하므로 메모리에 올리지 않음
+    processed.log   : 마지막 압축 이후 추가된 ID (추가 전용, 시작할 때 메모리 set으로 읽음)
+    processed.bloom : 블룸 필터. 처리하지 않은 ID는 대부분 디스크를 보지 않고 바로 판정
+
+100만 개 기준 블룸 필터(오탐률 1%) 약 1.2MB + 최근 추가분 set만 메모리에 두고,
+블룸 필터가 "있을 수도 있음"이라고 답한 경우에만 정렬 배열에서 정확히 확인합니다.
+"""
+import bisect
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+from array import array
+from typing import Iterable, List, Optional
+
+# 블룸 필터 기본 크기 (예상 ID 개수, 오탐률)
+DEFAULT_EXPECTED_ITEMS = 1_000_000
+DEFAULT_ERROR_RATE = 0.01
+
+# 로그의 ID가 이 개수를 넘으면 정렬 배열로 병합 (메모리의 set 크기 제한)
+COMPACT_THRESHOLD = 50_000
+
+# 블룸 필터 파일 헤더 (매직, 비트 수, 해시 함수 수, 필터에 넣은 정렬 배열 ID 수)
+_BLOOM_HEADER = struct.Struct('<4sQQQ')
+_BLOOM_MAGIC = b'CRBF'
+
+_HEX_ID = re.compile(r'^[0-9a-f]{1,16}$')
+_MASK64 = (1 << 64) - 1
+
+
+def id_to_int(message_id: str) -> int:
+    """메시지 ID → 64비트 정수 (Gmail 16진수 ID는 그대로, 그 밖의 ID는 blake2b 64비트 해시)"""
+    if _HEX_ID.match(message_id):
+        return int(message_id, 16)
+    return int.from_bytes(hashlib.blake2b(message_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _mix64(value: int) -> int:
+    """splitmix64 섞기 (연속된 Gmail ID도 비트가 고르게 퍼지도록)"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class BloomFilter:
+    """64비트 정수용 블룸 필터 (이중 해싱으로 해시 함수 k개 생성)"""
+
+    def __init__(self, bit_count: int, hash_count: int, bits: Optional[bytearray] = None):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = DEFAULT_ERROR_RATE) -> 'BloomFilter':
+        """capacity개를 넣었을 때 오탐률이 error_rate가 되도록 크기 결정"""
+        capacity = max(1, capacity)
+        bit_count = max(64, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        hash_count = max(1, int(round(bit_count / capacity * math.log(2))))
+        return cls(bit_count, hash_count)
+
+    @property
+    def capacity(self) -> int:
+        """설계 오탐률을 유지하는 최대 개수 (대략)"""
+        return int(self.bit_count * math.log(2) / self.hash_count)
+
+    def _positions(self, value: int) -> List[int]:
+        h1 = _mix64(value)
+        h2 = _mix64(h1) | 1
+        bit_count = self.bit_count
+        return [(h1 + i * h2) % bit_count for i in range(self.hash_count)]
+
+    def add(self, value: int):
+        bits = self.bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, value: int) -> bool:
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def save(self, path: str, item_count: int):
+        """임시 파일에 쓴 뒤 교체"""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, self.bit_count, self.hash_count, item_count))
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """저장된 필터 읽기 → (BloomFilter, 저장 당시 ID 수) 또는 None"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            header = f.read(_BLOOM_HEADER.size)
+            if len(header) < _BLOOM_HEADER.size:
+                return None
+            magic, bit_count, hash_count, item_count = _BLOOM_HEADER.unpack(header)
+            bits = bytearray(f.read())
+        if magic != _BLOOM_MAGIC or len(bits) != (bit_count + 7) // 8:
+            return None
+        return cls(bit_count, hash_count, bits), item_count
+
+
+class ProcessedIdSet:
+    """블룸 필터 + 정렬된 uint64 배열(mmap) + 추가 로그로 만든 처리 완료 ID 집합
+
+    사용 예:
+        done = ProcessedIdSet('backfill_jobs/2024/processed')
+        if message_id not in done:
+            ...분류...
+            done.add(message_id)
+        done.flush()   # 로그를 디스크에 반영 (체크포인트 저장 전에 호출)
+    """
+
+    def __init__(self, path: str, expected_items: int = DEFAULT_EXPECTED_ITEMS,
+                 error_rate: float = DEFAULT_ERROR_RATE, compact_threshold: int = COMPACT_THRESHOLD,
+                 read_only: bool = False):
+        """
+        Args:
+            path: 파일 경로 접두사 (.ids, .log, .bloom을 붙여 사용)
+            expected_items: 블룸 필터 초기 크기 (넘으면 두 배로 다시 만듦)
+            error_rate: 블룸 필터 오탐률 (오탐은 정렬 배열 탐색 한 번으로 걸러짐)
+            compact_threshold: 로그를 정렬 배열로 병합할 로그 ID 수
+            read_only: True이면 add()를 메모리에만 반영 (다른 프로세스가 쓰는 중인 집합을 읽을 때)
+        """
+        self.sorted_path = path + '.ids'
+        self.log_path = path + '.log'
+        self.bloom_path = path + '.bloom'
+        self.expected_items = expected_items
+        self.error_rate = error_rate
+        self.compact_threshold = compact_threshold
+        self.read_only = read_only
+
+        self._mmap: Optional[mmap.mmap] = None
+        self._sorted = array('Q')
+        self._recent = set()
+        self._log_file = None
+
+        directory = os.path.dirname(path)
+        if directory and not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self._open_sorted()
+        self._bloom = self._load_bloom()
+        self._load_log()
+
+    # ------------------------------------------------------------------
+    # 조회/추가
+    # ------------------------------------------------------------------
+
+    def __contains__(self, message_id: str) -> bool:
+        return self._contains_value(id_to_int(message_id))
+
+    def _contains_value(self, value: int) -> bool:
+        if not self._bloom.might_contain(value):
+            return False
+        if value in self._recent:
+            return True
+        index = bisect.bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent)
+
+    def add(self, message_id: str) -> bool:
+        """ID 추가 (새로 추가했으면 True, 이미 있었으면 False)"""
+        value = id_to_int(message_id)
+        if self._contains_value(value):
+            return False
+        self._recent.add(value)
+        self._bloom.add(value)
+        if self.read_only:
+            return True
+
+        if self._log_file is None:
+            self._log_file = open(self.log_path, 'ab')
+        self._log_file.write(value.to_bytes(8, 'little'))
+        if len(self._recent) >= self.compact_threshold:
+            self.compact()
+        return True
+
+    def update(self, message_ids: Iterable[str]) -> int:
+        """여러 ID 추가 → 새로 추가한 개수"""
+        return sum(1 for message_id in message_ids if self.add(message_id))
+
+    def flush(self):
+        """추가 로그를 디스크에 반영 (fsync)"""
+        if self._log_file is not None:
+            self._log_file.flush()
+            os.fsync(self._log_file.fileno())
+
+    def close(self):
+        self.flush()
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        self._close_sorted()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 파일
+    # ------------------------------------------------------------------
+
+    def _open_sorted(self):
+        """정렬 배열 파일을 읽기 전용 mmap으로 열기 (빈 파일이면 빈 배열)"""
+        if not os.path.exists(self.sorted_path) or os.path.getsize(self.sorted_path) < 8:
+            self._sorted = array('Q')
+            return
+        with open(self.sorted_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        usable = len(self._mmap) - len(self._mmap) % 8
+        self._sorted = memoryview(self._mmap)[:usable].cast('Q')
+
+    def _close_sorted(self):
+        if isinstance(self._sorted, memoryview):
+            self._sorted.release()
+        self._sorted = array('Q')
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _load_bloom(self) -> BloomFilter:
+        """저장된 블룸 필터가 현재 정렬 배열과 맞으면 사용, 아니면 다시 만듦"""
+        loaded = BloomFilter.load(self.bloom_path)
+        if loaded is not None:
+            bloom, item_count = loaded
+            if item_count == len(self._sorted) and item_count <= bloom.capacity:
+                return bloom
+        return self._build_bloom(len(self._sorted))
+
+    def _build_bloom(self, item_count: int) -> BloomFilter:
+        """정렬 배열의 모든 ID로 블룸 필터 생성 (개수가 늘면 두 배 크기로)"""
+        bloom = BloomFilter.for_capacity(max(self.expected_items, item_count * 2), self.error_rate)
+        for value in self._sorted:
+            bloom.add(value)
+        if not self.read_only and len(self._sorted):
+            bloom.save(self.bloom_path, len(self._sorted))
+        return bloom
+
+    def _load_log(self):
+        """추가 로그 읽기 (기록 도중 잘린 마지막 ID는 버림)"""
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+        complete = len(data) - len(data) % 8
+        if complete < len(data) and not self.read_only:
+            with open(self.log_path, 'rb+') as f:
+                f.truncate(complete)
+        for offset in range(0, complete, 8):
+            value = int.from_bytes(data[offset:offset + 8], 'little')
+            # 압축 직후 로그를 비우기 전에 종료된 경우 정렬 배열에 이미 있음
+            if not self._contains_value(value):
+                self._recent.add(value)
+                self._bloom.add(value)
+
+    def compact(self):
+        """
+        추가 로그를 정렬 배열 파일로 병합
+
+        새 배열을 임시 파일에 쓰고 교체한 뒤 로그를 비웁니다.
+        교체 후 로그를 비우기 전에 종료되어도 다음 시작 때 중복 ID는 무시됩니다.
+        """
+        if self.read_only or not self._recent:
+            return
+        self.flush()
+        merged = array('Q', heapq.merge(self._sorted, sorted(self._recent)))
+        temp_path = self.sorted_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            merged.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 열려 있는 mmap을 닫아야 Windows에서도 파일을 교체할 수 있음
+        self._close_sorted()
+        os.replace(temp_path, self.sorted_path)
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        open(self.log_path, 'wb').close()
+        self._recent = set()
+        self._open_sorted()
+
+        if len(self._sorted) > self._bloom.capacity:
+            self._bloom = self._build_bloom(len(self._sorted))
+        else:
+            self._bloom.save(self.bloom_path, len(self._sorted))
@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import Dict, Optional
+
+# 메서드별 Gmail API 할당량 단위
+# https://developers.google.com/gmail/api/reference/quota
+GMAIL_QUOTA_UNITS = {
+    'messages.list': 5,
+    'messages.get': 5,
+    'messages.send': 100,
+    'messages.batchModify': 50,
+    'messages.attachments.get': 5,
+    'threads.list': 10,
+    'threads.get': 10,
+    'history.list': 2,
+    'getProfile': 1,
+    'labels.list': 1,
+    'labels.create': 5
+}
+
+# 사용자당 초당 할당량 단위 한도
+GMAIL_USER_UNITS_PER_SECOND = 250
+
+# 한도에 닿지 않도록 남겨둘 여유 비율
+SAFETY_RATIO = 0.9
+
+# 속도 제한 오류(429 등)를 받았을 때 기본으로 쉬는 시간 (초)
+RATE_LIMIT_PENALTY = 2.0
+
+# HyperCLOVA 분당 요청 한도와 한 번에 몰아 보낼 수 있는 요청 수
+CLOVA_REQUESTS_PER_MINUTE = 60
+CLOVA_BURST_REQUESTS = 4
+
+
+class QuotaScheduler:
+    """할당량 단위 기반 토큰 버킷 요청 속도 조절기
+
+    초당 units_per_second만큼 토큰이 채워지고(최대 capacity), 요청할 때마다
+    메서드별 단위만큼 토큰을 소비합니다. 토큰이 부족하면 채워질 때까지 기다립니다.
+    여러 스레드와 클라이언트가 같은 인스턴스를 공유해도 안전합니다.
+    """
+
+    def __init__(self, units_per_second: float = GMAIL_USER_UNITS_PER_SECOND * SAFETY_RATIO,
+                 capacity: Optional[float] = None, costs: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            units_per_second: 초당 허용할 할당량 단위
+            capacity: 한 번에 몰아 쓸 수 있는 최대 단위 (기본: 1초 분량)
+            costs: 메서드별 단위 (기본: GMAIL_QUOTA_UNITS)
+        """
+        self.units_per_second = units_per_second
+        self.capacity = capacity or units_per_second
+        self.costs = costs or GMAIL_QUOTA_UNITS
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.used_units = 0
+        self.request_count = 0
+        self.wait_seconds = 0.0
+
+    def cost(self, method: str, count: int = 1) -> int:
+        """메서드 호출 count회의 할당량 단위"""
+        return self.costs.get(method, 5) * count
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.units_per_second)
+        self._updated = now
+
+    def acquire(self, method: str, count: int = 1) -> float:
+        """
+        요청을 보낼 수 있을 때까지 대기한 뒤 토큰 소비
+
+        배치 요청처럼 한 번에 capacity보다 많은 단위가 필요하면 버킷이 가득 찰 때까지만
+        기다렸다가 보내고, 모자란 만큼은 이후 요청이 기다리는 것으로 갚습니다.
+
+        Args:
+            method: API 메서드 이름 (예: 'messages.get')
+            count: 호출 횟수 (배치 하위 요청 수)
+
+        Returns:
+            기다린 시간 (초)
+        """
+        units = self.cost(method, count)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                pause = self._paused_until - now
+                needed = min(units, self.capacity)
+                if pause <= 0 and self._tokens >= needed:
+                    self._tokens -= units
+                    self.used_units += units
+                    self.request_count += count
+                    self.wait_seconds += waited
+                    return waited
+                delay = max(pause, (needed - self._tokens) / self.units_per_second)
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, method: str, count: int = 1) -> bool:
+        """기다리지 않고 바로 보낼 수 있으면 토큰을 소비하고 True 반환"""
+        units = self.cost(method, count)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until or self._tokens < min(units, self.capacity):
+                return False
+            self._tokens -= units
+            self.used_units += units
+            self.request_count += count
+            return True
+
+    def penalize(self, seconds: float = RATE_LIMIT_PENALTY):
+        """속도 제한 응답을 받았을 때 모든 요청을 잠시 멈추고 버킷을 비움"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0)
+
+    def available(self) -> float:
+        """지금 바로 쓸 수 있는 할당량 단위"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return 0.0 if now < self._paused_until else max(self._tokens, 0.0)
+
+    def estimate_seconds(self, calls: Dict[str, int]) -> float:
+        """
+        여러 메서드 호출을 모두 보내는 데 걸릴 예상 시간 (할당량 기준)
+
+        Args:
+            calls: {메서드 이름: 호출 횟수} (예: {'messages.list': 10, 'messages.get': 5000})
+        """
+        units = sum(self.cost(method, count) for method, count in calls.items())
+        return max(0.0, units - self.available()) / self.units_per_second
+
+    def status(self) -> Dict:
+        """UI/작업 계획용 현재 예산 상태"""
+        return {
+            'available_units': round(self.available(), 1),
+            'capacity': self.capacity,
+            'units_per_second': self.units_per_second,
+            'used_units': self.used_units,
+            'request_count': self.request_count,
+            'wait_seconds': round(self.wait_seconds, 2)
+        }
+
+
+# 같은 사용자 계정으로 보내는 모든 Gmail 요청이 공유하는 스케줄러
+gmail_scheduler = QuotaScheduler()
+
+# 같은 API 키로 보내는 모든 HyperCLOVA 요청이 공유하는 스케줄러 (요청 1회 = 1단위)
+clova_scheduler = QuotaScheduler(
+    units_per_second=CLOVA_REQUESTS_PER_MINUTE / 60 * SAFETY_RATIO,
+    capacity=CLOVA_BURST_REQUESTS,
+    costs={'chat-completions': 1}
+)
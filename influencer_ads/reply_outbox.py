@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class ReplyOutbox:
+    """보낼 회신을 모아 두었다가 배치 요청으로 한 번에 보내는 보낼편지함
+
+    회신을 추가할 때 원본 정보(threadId, Message-ID)로 전송 요청 본문을 미리 만들어 두고,
+    send_all()에서 GmailClient.send_messages로 묶어서 보냅니다.
+    전송에 실패한 회신은 보낼편지함에 남아 다음에 다시 보낼 수 있습니다.
+    """
+
+    def __init__(self):
+        self.items: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, gmail_client, original_message_id: str, reply_subject: str, reply_body: str,
+            recipient_email: str, email_data: Optional[Dict] = None) -> Dict:
+        """
+        회신을 보낼편지함에 추가
+
+        Args:
+            gmail_client: GmailClient (원본 정보가 캐시에 없을 때 metadata 조회에 사용)
+            original_message_id: 회신할 원본 메시지 ID
+            reply_subject: 회신 제목
+            reply_body: 회신 본문
+            recipient_email: 받는 사람 이메일 주소
+            email_data: 이미 가져온 원본 이메일 정보
+
+        Returns:
+            추가된 항목
+        """
+        # 같은 메일에 대한 회신은 마지막으로 작성한 것만 남김
+        self.items = [item for item in self.items if item['original_message_id'] != original_message_id]
+
+        context = gmail_client.get_reply_context(original_message_id, email_data)
+        item = {
+            'id': uuid.uuid4().hex,
+            'original_message_id': original_message_id,
+            'recipient': recipient_email,
+            'subject': reply_subject,
+            'message': gmail_client.build_reply(context, reply_subject, reply_body, recipient_email),
+            'queued_at': datetime.now().isoformat()
+        }
+        self.items.append(item)
+        return item
+
+    def remove(self, item_id: str):
+        """보낼편지함에서 항목 삭제"""
+        self.items = [item for item in self.items if item['id'] != item_id]
+
+    def send_all(self, gmail_client) -> Dict:
+        """
+        보낼편지함의 회신을 모두 전송
+
+        Returns:
+            {'sent': 전송된 항목 리스트, 'failed': 실패한 항목 리스트}
+        """
+        if not self.items:
+            return {'sent': [], 'failed': []}
+
+        sent = gmail_client.send_messages({item['id']: item['message'] for item in self.items})
+
+        sent_items = [{**item, 'message_id': sent[item['id']]['id']} for item in self.items if item['id'] in sent]
+        self.items = [item for item in self.items if item['id'] not in sent]
+        return {'sent': sent_items, 'failed': list(self.items)}